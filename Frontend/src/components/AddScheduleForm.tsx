@@ -96,10 +96,22 @@ export const AddScheduleForm = ({ onScheduleAdded, refreshGroupNames }: AddSched
     fetchGroupNames();
   }, [refreshGroupNames]);
 
+  // The gap check above ran against the list we fetched; 412 means it changed meanwhile
+  const checkSaved = async (response: Response) => {
+    if (response.ok) return true;
+    if (response.status === 412) {
+      toast({ title: "Schedules changed meanwhile", description: "Please submit again.", variant: "destructive" });
+    } else {
+      toast({ title: "Failed to add schedule", variant: "destructive" });
+    }
+    return false;
+  };
+
   const handleAddSchedule = async () => {
     setLoading(true);
     try {
       const response = await fetch(`${API_BASE}/schedules`, { method: "GET" });
+      const etag = response.headers.get("ETag");
       const currentSchedules = await response.json();
 
       let newSchedule;
@@ -160,11 +172,12 @@ export const AddScheduleForm = ({ onScheduleAdded, refreshGroupNames }: AddSched
         }
       }
 
-      await fetch(`${API_BASE}/schedules/load`, {
+      const saveResponse = await fetch(`${API_BASE}/schedules`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ entries: [...currentSchedules, newSchedule] }),
+        headers: { "Content-Type": "application/json", ...(etag ? { "If-Match": etag } : {}) },
+        body: JSON.stringify(newSchedule),
       });
+      if (!(await checkSaved(saveResponse))) return;
 
       toast({ title: "Schedule added successfully" });
       onScheduleAdded();
@@ -190,6 +203,7 @@ export const AddScheduleForm = ({ onScheduleAdded, refreshGroupNames }: AddSched
     setLoading(true);
     try {
       const response = await fetch(`${API_BASE}/schedules`, { method: "GET" });
+      const etag = response.headers.get("ETag");
       const currentSchedules = await response.json();
 
       const newSchedules = [];
@@ -284,11 +298,12 @@ export const AddScheduleForm = ({ onScheduleAdded, refreshGroupNames }: AddSched
         newSchedules.push(newSchedule);
       }
 
-      await fetch(`${API_BASE}/schedules/load`, {
+      const saveResponse = await fetch(`${API_BASE}/schedules/bulk`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ entries: [...currentSchedules, ...newSchedules] }),
+        headers: { "Content-Type": "application/json", ...(etag ? { "If-Match": etag } : {}) },
+        body: JSON.stringify({ operations: newSchedules.map((entry) => ({ op: "create", entry })) }),
       });
+      if (!(await checkSaved(saveResponse))) return;
 
       toast({
         title: `${selectedGroups.length} schedules added successfully`,
@@ -27,6 +27,7 @@ import { cn } from "@/lib/utils";
 const API_BASE = "http://localhost:8000";
 
 interface Schedule {
+  id?: string;
   type: "message" | "image" | "video" | "poll";
   group_name: string;
   message?: string;
@@ -5,6 +5,7 @@ import { MessageSquare, Image, BarChart3, Trash2, Calendar, Edit, Video } from "
 import { format } from "date-fns";
 
 interface Schedule {
+  id?: string;
   type: "message" | "image" | "video" | "poll";
   group_name: string;
   message?: string;
@@ -29,8 +29,14 @@ export const SchedulerHeader = () => {
 
   useEffect(() => {
     fetchStatus();
-    const interval = setInterval(fetchStatus, 5000);
-    return () => clearInterval(interval);
+    // Refresh as soon as the server reports a change; the slow poll only covers a dropped stream
+    const events = new EventSource(`${API_BASE}/events`);
+    ["scheduler", "schedules", "reset"].forEach((type) => events.addEventListener(type, fetchStatus));
+    const interval = setInterval(fetchStatus, 30000);
+    return () => {
+      events.close();
+      clearInterval(interval);
+    };
   }, []);
 
   const handleStart = async () => {
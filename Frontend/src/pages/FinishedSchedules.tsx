@@ -1,6 +1,8 @@
 import { useState, useEffect } from "react";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
+import { Input } from "@/components/ui/input";
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { CheckCircle2, MessageSquare, Image, BarChart3, ArrowLeft, Calendar, Clock, Trash2 } from "lucide-react";
 import { useNavigate } from "react-router-dom";
 import { toast } from "@/hooks/use-toast";
@@ -9,6 +11,7 @@ import { Footer } from "@/components/Footer";
 const API_BASE = "http://localhost:8000";
 
 interface FinishedSchedule {
+  record_id: number;
   type: "message" | "image" | "poll";
   group_name: string;
   message?: string;
@@ -24,22 +27,55 @@ interface FinishedSchedule {
   status: string;
 }
 
+interface FinishedSchedulesPage {
+  items: FinishedSchedule[];
+  next_cursor: number | null;
+  total: number;
+}
+
+const PAGE_SIZE = 50;
+
+interface HistoryFilters {
+  q: string;
+  group: string;
+  type: string;
+  date: string;
+}
+
+const emptyFilters: HistoryFilters = { q: "", group: "", type: "all", date: "" };
+
 const FinishedSchedules = () => {
   const [finishedSchedules, setFinishedSchedules] = useState<FinishedSchedule[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [total, setTotal] = useState(0);
+  const [filters, setFilters] = useState<HistoryFilters>(emptyFilters);
   const navigate = useNavigate();
 
   useEffect(() => {
-    fetchFinishedSchedules();
-  }, []);
+    // Debounce so typing in the search box doesn't fire a request per keystroke
+    const timeout = setTimeout(() => fetchFinishedSchedules(), 300);
+    return () => clearTimeout(timeout);
+  }, [filters]);
 
-  const fetchFinishedSchedules = async () => {
+  const fetchFinishedSchedules = async (cursor: number | null = null) => {
     try {
-      setLoading(true);
-      const response = await fetch(`${API_BASE}/finished-schedules`);
+      if (cursor === null) setLoading(true);
+      const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+      if (cursor !== null) params.set("cursor", String(cursor));
+      if (filters.q.trim()) params.set("q", filters.q.trim());
+      if (filters.group.trim()) params.set("group", filters.group.trim());
+      if (filters.type !== "all") params.set("type", filters.type);
+      if (filters.date) {
+        params.set("since", filters.date);
+        params.set("until", filters.date);
+      }
+      const response = await fetch(`${API_BASE}/finished-schedules?${params}`);
       if (!response.ok) throw new Error("Failed to fetch");
-      const data = await response.json();
-      setFinishedSchedules(data);
+      const data: FinishedSchedulesPage = await response.json();
+      setFinishedSchedules((prev) => (cursor === null ? data.items : [...prev, ...data.items]));
+      setNextCursor(data.next_cursor);
+      setTotal(data.total);
     } catch (error) {
       toast({
         title: "Failed to load finished schedules",
@@ -50,9 +86,9 @@ const FinishedSchedules = () => {
     }
   };
 
-  const handleDelete = async (index: number) => {
+  const handleDelete = async (recordId: number) => {
     try {
-      const response = await fetch(`${API_BASE}/finished-schedules/${index}`, {
+      const response = await fetch(`${API_BASE}/finished-schedules/${recordId}`, {
         method: "DELETE",
       });
       if (!response.ok) throw new Error("Failed to delete");
@@ -62,8 +98,8 @@ const FinishedSchedules = () => {
         description: "Finished schedule removed successfully",
       });
 
-      // Refresh the list
-      fetchFinishedSchedules();
+      setFinishedSchedules((prev) => prev.filter((s) => s.record_id !== recordId));
+      setTotal((prev) => prev - 1);
     } catch (error) {
       toast({
         title: "Failed to delete schedule",
@@ -127,7 +163,9 @@ const FinishedSchedules = () => {
           <div className="flex items-center justify-between">
             <div>
               <h1 className="text-4xl font-bold text-gray-900 mb-2">Finished Schedules</h1>
-              <p className="text-gray-600">View all completed WhatsApp schedules</p>
+              <p className="text-gray-600">
+                View all completed WhatsApp schedules{total > 0 && ` (${total})`}
+              </p>
             </div>
             <div className="flex gap-2">
               {finishedSchedules.length > 0 && (
@@ -143,6 +181,38 @@ const FinishedSchedules = () => {
             </div>
           </div>
 
+          <Card>
+            <CardContent className="p-4 grid gap-3 md:grid-cols-4">
+              <Input
+                placeholder="Search text..."
+                value={filters.q}
+                onChange={(e) => setFilters({ ...filters, q: e.target.value })}
+              />
+              <Input
+                placeholder="Group name"
+                value={filters.group}
+                onChange={(e) => setFilters({ ...filters, group: e.target.value })}
+              />
+              <Select value={filters.type} onValueChange={(value) => setFilters({ ...filters, type: value })}>
+                <SelectTrigger>
+                  <SelectValue placeholder="Type" />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="all">All types</SelectItem>
+                  <SelectItem value="message">Message</SelectItem>
+                  <SelectItem value="image">Image</SelectItem>
+                  <SelectItem value="video">Video</SelectItem>
+                  <SelectItem value="poll">Poll</SelectItem>
+                </SelectContent>
+              </Select>
+              <Input
+                type="date"
+                value={filters.date}
+                onChange={(e) => setFilters({ ...filters, date: e.target.value })}
+              />
+            </CardContent>
+          </Card>
+
           {loading ? (
             <Card>
               <CardContent className="p-8 text-center">
@@ -159,8 +229,8 @@ const FinishedSchedules = () => {
             </Card>
           ) : (
             <div className="grid gap-4">
-              {finishedSchedules.map((schedule, index) => (
-                <Card key={index} className="shadow-lg hover:shadow-xl transition-shadow">
+              {finishedSchedules.map((schedule) => (
+                <Card key={schedule.record_id} className="shadow-lg hover:shadow-xl transition-shadow">
                   <CardHeader>
                     <div className="flex items-center justify-between">
                       <div className="flex items-center gap-3 flex-1">
@@ -193,7 +263,7 @@ const FinishedSchedules = () => {
                         <Button
                           variant="ghost"
                           size="icon"
-                          onClick={() => handleDelete(index)}
+                          onClick={() => handleDelete(schedule.record_id)}
                           className="text-red-500 hover:text-red-700 hover:bg-red-50"
                         >
                           <Trash2 className="h-4 w-4" />
@@ -252,6 +322,11 @@ const FinishedSchedules = () => {
                   </CardContent>
                 </Card>
               ))}
+              {nextCursor !== null && (
+                <Button onClick={() => fetchFinishedSchedules(nextCursor)} variant="outline">
+                  Load more
+                </Button>
+              )}
             </div>
           )}
         </div>
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { SchedulerHeader } from "@/components/SchedulerHeader";
 import { ScheduleCard } from "@/components/ScheduleCard";
 import { AddScheduleForm } from "@/components/AddScheduleForm";
@@ -10,6 +10,7 @@ import { toast } from "@/hooks/use-toast";
 const API_BASE = "http://localhost:8000";
 
 interface Schedule {
+  id?: string;
   type: "message" | "image" | "poll";
   group_name: string;
   message?: string;
@@ -60,10 +61,17 @@ const Index = () => {
   const [loading, setLoading] = useState(true);
   const [editingSchedule, setEditingSchedule] = useState<{ schedule: Schedule; index: number } | null>(null);
   const [groupNamesRefresh, setGroupNamesRefresh] = useState(0);
+  // Version of the list we last loaded; sent as If-Match so stale edits are rejected
+  const etagRef = useRef<string | null>(null);
 
   const fetchSchedules = async () => {
     try {
-      const response = await fetch(`${API_BASE}/schedules`);
+      // Unchanged lists come back as an empty 304, so polling skips parsing and re-rendering
+      const response = await fetch(`${API_BASE}/schedules`, {
+        headers: etagRef.current ? { "If-None-Match": etagRef.current } : {},
+      });
+      if (response.status === 304) return;
+      etagRef.current = response.headers.get("ETag");
       const data = await response.json();
       // Sort schedules by time
       const sortedSchedules = data.sort((a: Schedule, b: Schedule) => {
@@ -82,22 +90,42 @@ const Index = () => {
   useEffect(() => {
     fetchSchedules();
 
-    // Auto-refresh every 5 seconds to show completed schedules
+    // Refresh when the schedule list changes (e.g. a schedule completed); the slow poll only covers a dropped stream
+    const events = new EventSource(`${API_BASE}/events`);
+    ["schedules", "reset"].forEach((type) => events.addEventListener(type, () => fetchSchedules()));
     const interval = setInterval(() => {
       fetchSchedules();
-    }, 5000);
+    }, 30000);
 
-    return () => clearInterval(interval);
+    return () => {
+      events.close();
+      clearInterval(interval);
+    };
   }, []);
 
+  const versionHeaders = (): Record<string, string> =>
+    etagRef.current ? { "If-Match": etagRef.current } : {};
+
+  // Returns false (and reloads the list) when the server rejected the change
+  const checkResponse = async (response: Response, failureTitle: string) => {
+    if (response.ok) return true;
+    if (response.status === 412) {
+      toast({ title: "Schedules changed elsewhere", description: "The list was reloaded, please try again.", variant: "destructive" });
+    } else {
+      const data = await response.json().catch(() => ({}));
+      toast({ title: failureTitle, description: data.detail, variant: "destructive" });
+    }
+    fetchSchedules();
+    return false;
+  };
+
   const handleDelete = async (index: number) => {
     try {
-      const newSchedules = schedules.filter((_, i) => i !== index);
-      await fetch(`${API_BASE}/schedules/load`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ entries: newSchedules }),
+      const response = await fetch(`${API_BASE}/schedules/${schedules[index].id}`, {
+        method: "DELETE",
+        headers: versionHeaders(),
       });
+      if (!(await checkResponse(response, "Failed to delete schedule"))) return;
       toast({ title: "Schedule deleted" });
       fetchSchedules();
     } catch (error) {
@@ -140,14 +168,12 @@ const Index = () => {
         }
       }
 
-      const newSchedules = [...schedules];
-      newSchedules[editingSchedule.index] = editedSchedule;
-
-      await fetch(`${API_BASE}/schedules/load`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ entries: newSchedules }),
+      const response = await fetch(`${API_BASE}/schedules/${editedSchedule.id}`, {
+        method: "PATCH",
+        headers: { "Content-Type": "application/json", ...versionHeaders() },
+        body: JSON.stringify(editedSchedule),
       });
+      if (!(await checkResponse(response, "Failed to update schedule"))) return;
 
       toast({ title: "Schedule updated successfully" });
       fetchSchedules();
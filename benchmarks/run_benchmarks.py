@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the scheduler, persistence, API and bot hot paths.
+
+Every benchmark builds its own data in a temporary directory from a fixed
+seed, times its operation several times and reports the median. Results are
+compared with benchmarks/baseline.json; a benchmark slower than its baseline
+by more than the tolerance fails the run (exit code 1).
+
+    python benchmarks/run_benchmarks.py                    # run all, compare with the baseline
+    python benchmarks/run_benchmarks.py -k load -k save    # only names containing "load" or "save"
+    python benchmarks/run_benchmarks.py --update-baseline  # record new baseline numbers
+
+Baseline numbers are machine-specific: record them on the machine that runs
+the comparison, and say in the PR which numbers changed and why.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# A benchmark fails when its median exceeds baseline * TOLERANCE and is also MIN_DELTA_MS slower
+TOLERANCE = 1.5
+MIN_DELTA_MS = 2.0
+
+# Fixed seed so every run works on the same data
+SEED = 42
+
+BENCHMARKS: List[Dict] = []
+
+
+class Skip(Exception):
+    """Raised by a benchmark that cannot run in this environment (e.g. no Chrome)."""
+
+
+def benchmark(name: str, repeat: int = 5, fresh: bool = False):
+    """
+    Register a benchmark
+
+    The decorated function does the untimed setup in a work directory and
+    returns the callable that is timed.
+
+    Args:
+        name (str): Name in reports and baseline.json
+        repeat (int): Timed runs; the median is reported
+        fresh (bool): Redo the setup before every timed run (for operations that consume their state)
+    """
+    def register(setup: Callable[[str], Callable[[], None]]):
+        BENCHMARKS.append({"name": name, "setup": setup, "repeat": repeat, "fresh": fresh})
+        return setup
+    return register
+
+
+# ----------------------------------------------------------------------
+# Data
+# ----------------------------------------------------------------------
+
+def _start() -> datetime:
+    """Midnight tomorrow, so generated one-time entries are all in the future."""
+    return (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _entries(count: int) -> List[Dict]:
+    from simulation import synthetic_entries
+    return synthetic_entries(count, _start(), days=30, seed=SEED)
+
+
+def _scheduler(work_dir: str, entries: Optional[List[Dict]] = None, bot=None):
+    import schedule
+    from scheduler import MessageScheduler
+    schedule.clear()
+    scheduler = MessageScheduler(bot, data_dir=work_dir)
+    if entries:
+        scheduler.reset_with_entries(entries)
+    return scheduler
+
+
+def _write_history(path: str, count: int):
+    """Write a finished-schedules history of count records straight to its JSONL file."""
+    rng = random.Random(SEED)
+    start = _start() - timedelta(days=365)
+    with open(path, 'w', encoding='utf-8') as f:
+        for record_id in range(1, count + 1):
+            completed = start + timedelta(minutes=record_id * 5)
+            record = {"record_id": record_id, "id": f"h{record_id}", "type": "message",
+                      "group_name": f"Group {rng.randrange(50)}", "message": f"History message number {record_id}",
+                      "time": completed.strftime("%Y-%m-%d %H:%M"), "repeat": "once",
+                      "completed_at": completed.strftime("%Y-%m-%d %H:%M:%S"), "status": "sent"}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# ----------------------------------------------------------------------
+# Bot
+# ----------------------------------------------------------------------
+
+@benchmark("emoji_shortcuts_2kb", repeat=7)
+def bench_emoji_shortcuts(work_dir: str):
+    from whatsapp_bot import WhatsAppBot
+    bot = WhatsAppBot()
+    text = ("Good morning team [smile] :coffee: standup at 9 [thumbsup] please be on time :pray: "
+            "اجتماع اليوم [fire] ") * 24
+
+    def run():
+        for _ in range(100):
+            bot._convert_emoji_shortcuts(text)
+    return run
+
+
+# ----------------------------------------------------------------------
+# Scheduler and persistence
+# ----------------------------------------------------------------------
+
+def _register_load(count: int, repeat: int):
+    @benchmark(f"load_file_{count // 1000}k", repeat=repeat, fresh=True)
+    def bench_load(work_dir: str):
+        path = os.path.join(work_dir, "load.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_entries(count), f)
+        scheduler = _scheduler(work_dir)
+        return lambda: scheduler.load_schedules_from_file(path)
+
+    @benchmark(f"reset_unchanged_{count // 1000}k", repeat=repeat)
+    def bench_reset_unchanged(work_dir: str):
+        scheduler = _scheduler(work_dir, _entries(count))
+        _, entries = scheduler.snapshot()
+        return lambda: scheduler.reset_with_entries(entries)
+
+
+for _count, _repeat in ((1_000, 7), (10_000, 5), (100_000, 3)):
+    _register_load(_count, _repeat)
+
+
+@benchmark("save_schedules_10k", repeat=5)
+def bench_save_schedules(work_dir: str):
+    scheduler = _scheduler(work_dir, _entries(10_000))
+    return lambda: scheduler.save_schedules_to_file(scheduler.schedules_file)
+
+
+@benchmark("save_finished_100k_history", repeat=5, fresh=True)
+def bench_save_finished(work_dir: str):
+    _write_history(os.path.join(work_dir, "finishedSchedules.jsonl"), 100_000)
+    scheduler = _scheduler(work_dir)
+    record = {"id": "new", "type": "message", "group_name": "Group 1", "message": "Done",
+              "time": "2025-01-01 09:00", "repeat": "once", "status": "sent",
+              "completed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+
+    def run():
+        for _ in range(100):
+            scheduler.save_to_finished_schedules(record)
+    return run
+
+
+@benchmark("has_upcoming_10k", repeat=7)
+def bench_has_upcoming(work_dir: str):
+    scheduler = _scheduler(work_dir, _entries(10_000))
+    batch_id = "missing-batch"
+
+    def run():
+        for _ in range(1000):
+            scheduler._has_upcoming_schedules(10)
+            scheduler._has_upcoming_schedules(10, batch_id=batch_id)
+    return run
+
+
+# ----------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------
+
+def _api_client(work_dir: str, count: int):
+    try:
+        import httpx
+        import server
+    except ImportError as e:
+        raise Skip(f"API dependencies missing: {e}")
+    server.scheduler = _scheduler(work_dir, _entries(count))
+    server.supervisor = None
+    transport = httpx.ASGITransport(app=server.app)
+    return server, lambda: httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+@benchmark("api_reads_50_clients_1k", repeat=5)
+def bench_api_reads(work_dir: str):
+    _, client_factory = _api_client(work_dir, 1_000)
+
+    async def client(http):
+        for _ in range(4):
+            await http.get("/schedules")
+            await http.get("/scheduler/status")
+
+    async def main():
+        async with client_factory() as http:
+            await asyncio.gather(*(client(http) for _ in range(50)))
+
+    return lambda: asyncio.run(main())
+
+
+@benchmark("api_polls_50_clients_1k", repeat=5)
+def bench_api_polls(work_dir: str):
+    _, client_factory = _api_client(work_dir, 1_000)
+
+    async def client(http):
+        etag = (await http.get("/schedules")).headers["ETag"]
+        for _ in range(4):
+            await http.get("/schedules", headers={"If-None-Match": etag})
+
+    async def main():
+        async with client_factory() as http:
+            await asyncio.gather(*(client(http) for _ in range(50)))
+
+    return lambda: asyncio.run(main())
+
+
+@benchmark("api_writes_20_clients_1k", repeat=5, fresh=True)
+def bench_api_writes(work_dir: str):
+    _, client_factory = _api_client(work_dir, 1_000)
+    due = (_start() + timedelta(days=2)).strftime("%Y-%m-%d %H:%M")
+
+    async def client(http, n: int):
+        for i in range(5):
+            response = await http.post("/schedules", json={
+                "type": "message", "group_name": f"Group {n}", "message": f"Client {n} #{i}", "time": due})
+            await http.patch(f"/schedules/{response.json()['id']}", json={"message": f"Edited {n} #{i}"})
+
+    async def main():
+        async with client_factory() as http:
+            await asyncio.gather(*(client(http, n) for n in range(20)))
+
+    return lambda: asyncio.run(main())
+
+
+# ----------------------------------------------------------------------
+# Send flows
+# ----------------------------------------------------------------------
+
+@benchmark("send_flow_fake_bot_200", repeat=5, fresh=True)
+def bench_send_flow_fake_bot(work_dir: str):
+    """Scheduler work around each send (journal, bookkeeping, history) with a bot that takes no time."""
+    from clock import VirtualClock
+    from simulation import FakeBot, DEFAULT_LATENCIES
+    bot = FakeBot(VirtualClock(time.time()), latencies={op: 0.0 for op in DEFAULT_LATENCIES}, seed=SEED)
+    scheduler = _scheduler(work_dir, _entries(200), bot=bot)
+    entries = [e for e in scheduler.scheduled_messages if e.repeat == "once"]
+
+    def run():
+        for entry in entries:
+            scheduler._run_entry(entry)
+    return run
+
+
+@benchmark("send_flow_standin_page", repeat=3)
+def bench_send_flow_standin(work_dir: str):
+    """Real WhatsAppBot and Chrome against the offline stand-in page, within the WebDriver command budgets (skipped without Chrome)."""
+    from whatsapp_standin import StandinServer, chrome_available
+    if not chrome_available():
+        raise Skip("Chrome not found")
+    import driver_accounting
+    from whatsapp_bot import WhatsAppBot
+    standin = StandinServer(groups=["Bench Group"], load_ms=0, search_ms=0, open_chat_ms=0, ack_ms=0).start()
+    bot = WhatsAppBot(headless=True, url=standin.url)
+    bot.start(profile_path=os.path.join(work_dir, "chrome_data"))
+    if bot.driver is None or not bot.wait_for_whatsapp_load(timeout=30):
+        standin.stop()
+        raise Skip("Chrome could not open the stand-in page")
+
+    def run():
+        with driver_accounting.enforce_budgets():
+            for i in range(5):
+                if not bot.send_message_to_group("Bench Group", f"Benchmark message {i}"):
+                    raise RuntimeError("Send to the stand-in page failed")
+    run.cleanup = lambda: (bot.close(), standin.stop())
+    return run
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+def _time(bench: Dict) -> List[float]:
+    """Return the timed durations of one benchmark in milliseconds."""
+    durations = []
+    run = None
+    with tempfile.TemporaryDirectory(prefix="bench-") as work_dir:
+        os.chdir(work_dir)
+        try:
+            for i in range(bench["repeat"]):
+                if run is None or bench["fresh"]:
+                    if run is not None and hasattr(run, "cleanup"):
+                        run.cleanup()
+                    run_dir = os.path.join(work_dir, str(i))
+                    os.makedirs(run_dir)
+                    run = bench["setup"](run_dir)
+                started = time.perf_counter()
+                run()
+                durations.append((time.perf_counter() - started) * 1000)
+        finally:
+            if run is not None and hasattr(run, "cleanup"):
+                run.cleanup()
+            os.chdir(ROOT)
+    return durations
+
+
+def _load_baseline() -> Dict[str, float]:
+    try:
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get("results", {})
+    except FileNotFoundError:
+        return {}
+
+
+def _save_baseline(results: Dict[str, float]):
+    baseline = {
+        "recorded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}",
+        "unit": "ms (median)",
+        "results": dict(sorted(results.items())),
+    }
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare with the baseline")
+    parser.add_argument("-k", action="append", dest="filters", metavar="TEXT",
+                        help="Only run benchmarks whose name contains TEXT (repeatable)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write the results to baseline.json instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help=f"Allowed slowdown factor against the baseline (default: {TOLERANCE})")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    # Per-entry INFO logs would dominate the timings
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+
+    selected = [b for b in BENCHMARKS if not args.filters or any(f in b["name"] for f in args.filters)]
+    baseline = _load_baseline()
+    results: Dict[str, float] = {}
+    regressions = []
+    report = []
+
+    for bench in selected:
+        name = bench["name"]
+        try:
+            durations = _time(bench)
+        except Skip as e:
+            print(f"{name:<32} skipped: {e}", file=sys.stderr)
+            report.append({"name": name, "skipped": str(e)})
+            continue
+        median = statistics.median(durations)
+        results[name] = round(median, 3)
+        base = baseline.get(name)
+        line = f"{name:<32} {median:10.2f} ms  (min {min(durations):.2f}, n={len(durations)})"
+        if base is not None:
+            change = median / base if base else float("inf")
+            line += f"  baseline {base:.2f} ms  x{change:.2f}"
+            if median > base * args.tolerance and median - base > MIN_DELTA_MS:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line, file=sys.stderr)
+        report.append({"name": name, "median_ms": round(median, 3), "min_ms": round(min(durations), 3),
+                       "runs": len(durations), "baseline_ms": base})
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.update_baseline:
+        _save_baseline({**baseline, **results})
+        print(f"Baseline written to {BASELINE_FILE}", file=sys.stderr)
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline x{args.tolerance}: {', '.join(regressions)}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
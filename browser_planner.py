@@ -0,0 +1,74 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+class BrowserPlanner:
+    """
+    Decides when to start WhatsApp Web ahead of a send and whether to close it between sends.
+
+    The lead time is learnt from the last few measured startups (Chrome launch
+    plus WhatsApp Web load), so a slow machine starts earlier and a fast one
+    keeps the browser closed longer.
+    """
+
+    def __init__(self, window: int = 20, default_startup_seconds: float = 60.0,
+                 safety_factor: float = 1.5, min_lead_seconds: float = 30.0,
+                 min_closed_seconds: float = 120.0):
+        """
+        Args:
+            window (int): How many recent startup durations to keep
+            default_startup_seconds (float): Assumed startup duration before anything was measured
+            safety_factor (float): Lead time = slow startup (90th percentile) x this factor
+            min_lead_seconds (float): Never start later than this before a send
+            min_closed_seconds (float): Only close between sends if the browser would stay closed at least this long
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.default_startup_seconds = default_startup_seconds
+        self.safety_factor = safety_factor
+        self.min_lead_seconds = min_lead_seconds
+        self.min_closed_seconds = min_closed_seconds
+
+    def record_startup(self, seconds: float):
+        """Record how long one browser start took until WhatsApp Web was usable."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def expected_startup(self) -> float:
+        """Return a pessimistic (90th percentile) startup duration in seconds."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return self.default_startup_seconds
+        return samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+
+    def lead_time(self) -> float:
+        """Return how many seconds before a send the browser should be started."""
+        return max(self.min_lead_seconds, self.expected_startup() * self.safety_factor)
+
+    def should_prewarm(self, next_due_ts: Optional[float], now_ts: float) -> bool:
+        """Return True if the next send is close enough that the browser should start now."""
+        return next_due_ts is not None and next_due_ts - now_ts <= self.lead_time()
+
+    def keep_open(self, next_due_ts: Optional[float], now_ts: float) -> bool:
+        """
+        Return True if the browser should stay open after a send.
+
+        Closing only pays off if, after stopping now and starting again one lead
+        time before the next send, it would stay closed for at least min_closed_seconds.
+        """
+        if next_due_ts is None:
+            return False
+        return next_due_ts - now_ts - self.lead_time() < self.min_closed_seconds
+
+    def stats(self) -> Dict:
+        """Return the measured startups and the resulting lead time."""
+        with self._lock:
+            samples = list(self._samples)
+        return {
+            "samples": len(samples),
+            "last_startup_seconds": round(samples[-1], 1) if samples else None,
+            "expected_startup_seconds": round(self.expected_startup(), 1),
+            "lead_time_seconds": round(self.lead_time(), 1),
+        }
@@ -0,0 +1,91 @@
+import time
+import datetime as _datetime
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class SystemClock:
+    """The real clock. MessageScheduler reads all times through a clock so tests and simulations can replace it."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def sleep_until(self, ts: float):
+        """Sleep until the given epoch time, finishing with a short spin for sub-10ms accuracy."""
+        while True:
+            remaining = ts - time.time()
+            if remaining <= 0:
+                return
+            if remaining > 0.02:
+                time.sleep(remaining - 0.01)
+
+
+class VirtualClock:
+    """
+    A clock that only moves when told to.
+
+    sleep() and sleep_until() advance it instantly, so code that waits for
+    seconds or hours runs in no real time. Use patch_schedule() to make the
+    `schedule` library read this clock too.
+    """
+
+    def __init__(self, start: float):
+        """
+        Args:
+            start (float): Initial epoch time
+        """
+        self._ts = float(start)
+
+    def time(self) -> float:
+        return self._ts
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self._ts)
+
+    def monotonic(self) -> float:
+        return self._ts
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self._ts += seconds
+
+    def sleep_until(self, ts: float):
+        self._ts = max(self._ts, ts)
+
+    def advance_to(self, ts: float):
+        """Move the clock forward to ts (never backwards)."""
+        self._ts = max(self._ts, ts)
+
+    @contextmanager
+    def patch_schedule(self):
+        """Make the `schedule` library use this clock for as long as the context is open."""
+        import schedule
+        clock = self
+
+        class _VirtualDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now() if tz is None else datetime.fromtimestamp(clock.time(), tz)
+
+        class _DatetimeModule:
+            datetime = _VirtualDatetime
+            date = _datetime.date
+            time = _datetime.time
+            timedelta = _datetime.timedelta
+
+        original = schedule.datetime
+        schedule.datetime = _DatetimeModule
+        try:
+            yield self
+        finally:
+            schedule.datetime = original
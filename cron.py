@@ -0,0 +1,162 @@
+import calendar
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+_MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+_DAY_NAMES = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+
+# How far ahead next_fire() looks before deciding an expression never fires (e.g. "0 0 30 2 *")
+_MAX_YEARS = 8
+
+
+def is_cron(repeat: Optional[str]) -> bool:
+    """Return True if a repeat value is a cron expression ("cron:<expr>" or five space-separated fields)."""
+    if not repeat:
+        return False
+    return repeat.startswith("cron:") or len(repeat.split()) == 5
+
+
+def _parse_value(token: str, names: dict) -> int:
+    token = token.strip().lower()
+    if token in names:
+        return names[token]
+    return int(token)
+
+
+def _parse_field(field: str, low: int, high: int, names: dict = None) -> Tuple[FrozenSet[int], bool]:
+    """Parse one cron field into the set of allowed values; the flag tells whether it was "*"."""
+    names = names or {}
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step in '{field}'")
+        if part in ("*", ""):
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = _parse_value(start_text, names), _parse_value(end_text, names)
+        else:
+            start = _parse_value(part, names)
+            end = high if step > 1 else start
+        if not (low <= start <= high and low <= end <= high) or start > end:
+            raise ValueError(f"Value out of range in '{field}' (allowed {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values), field.strip() == "*"
+
+
+class CronSpec:
+    """
+    A compiled five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Supports "*", lists ("8,17"), ranges ("9-18", "mon-fri"), steps ("*/15",
+    "9-18/2"), month and day names, and "day#n" for the n-th weekday of the
+    month ("mon#1" = first Monday). As in cron, when both day-of-month and
+    day-of-week are restricted a day matching either one fires.
+
+    next_fire() skips whole months, days and hours that cannot match, so
+    finding the next run costs a handful of steps, not one per minute.
+    """
+
+    def __init__(self, expression: str, second: int = 0):
+        """
+        Args:
+            expression (str): Cron expression, optionally prefixed with "cron:"
+            second (int): Second within the minute to fire at
+        """
+        self.expression = expression
+        text = expression[len("cron:"):] if expression.startswith("cron:") else expression
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields (minute hour day month weekday): '{expression}'")
+        minute, hour, dom, month, dow = fields
+
+        self.second = second
+        self.minutes = sorted(_parse_field(minute, 0, 59)[0])
+        self.hours = sorted(_parse_field(hour, 0, 23)[0])
+        self.days, dom_any = _parse_field(dom, 1, 31)
+        self.months, _ = _parse_field(month, 1, 12, _MONTH_NAMES)
+
+        # Day-of-week: plain values (0 = Sunday, 7 also accepted) and "day#n" nth-weekday terms
+        weekdays, nth = set(), set()
+        dow_any = dow.strip() == "*"
+        for part in dow.split(","):
+            if "#" in part:
+                day_text, n_text = part.split("#", 1)
+                n = int(n_text)
+                if not 1 <= n <= 5:
+                    raise ValueError(f"Invalid '#' in '{dow}' (use 1-5)")
+                nth.add((_parse_value(day_text, _DAY_NAMES) % 7, n))
+            else:
+                weekdays.update(v % 7 for v in _parse_field(part, 0, 7, _DAY_NAMES)[0])
+        self.weekdays = frozenset(weekdays)
+        self.nth_weekdays = frozenset(nth)
+
+        # Standard cron: restricting both day fields means "either matches"
+        self._day_or = not dom_any and not dow_any
+        self._dom_any = dom_any
+        self._dow_any = dow_any
+
+    def _day_matches(self, day: datetime) -> bool:
+        cron_weekday = (day.weekday() + 1) % 7  # Python: Monday = 0; cron: Sunday = 0
+        dow_match = cron_weekday in self.weekdays or (cron_weekday, (day.day - 1) // 7 + 1) in self.nth_weekdays
+        dom_match = day.day in self.days
+        if self._day_or:
+            return dom_match or dow_match
+        return (self._dom_any or dom_match) and (self._dow_any or dow_match)
+
+    def next_fire(self, after: datetime) -> Optional[datetime]:
+        """
+        Return the first fire time strictly after `after`
+
+        Args:
+            after (datetime): Reference time
+
+        Returns:
+            Optional[datetime]: Next fire time, or None if the expression never fires
+        """
+        candidate = after.replace(second=0, microsecond=0)
+        if candidate + timedelta(seconds=self.second) <= after:
+            candidate += timedelta(minutes=1)
+        limit_year = after.year + _MAX_YEARS
+
+        while candidate.year <= limit_year:
+            if candidate.month not in self.months:
+                # Jump to the first day of the next allowed month
+                year, month = candidate.year, candidate.month
+                while True:
+                    month += 1
+                    if month > 12:
+                        year, month = year + 1, 1
+                    if month in self.months:
+                        break
+                candidate = datetime(year, month, 1)
+                continue
+            if not self._day_matches(candidate):
+                candidate = datetime(candidate.year, candidate.month, candidate.day) + timedelta(days=1)
+                continue
+            hour = next((h for h in self.hours if h >= candidate.hour), None)
+            if hour is None:
+                candidate = datetime(candidate.year, candidate.month, candidate.day) + timedelta(days=1)
+                continue
+            if hour != candidate.hour:
+                candidate = candidate.replace(hour=hour, minute=0)
+            minute = next((m for m in self.minutes if m >= candidate.minute), None)
+            if minute is None:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            return candidate.replace(minute=minute, second=self.second)
+        return None
+
+    def __repr__(self) -> str:
+        return f"CronSpec({self.expression!r})"
+
+
+@lru_cache(maxsize=512)
+def compile_cron(expression: str, second: int = 0) -> CronSpec:
+    """Parse a cron expression once; repeated calls with the same text return the cached spec."""
+    return CronSpec(expression, second)
@@ -0,0 +1,148 @@
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Most WebDriver commands a single call of each bot operation may issue (including nested operations).
+# Measured against the stand-in page (whatsapp_standin.py --check-budgets, Chrome 140) with about 25% headroom
+# for wait polling; the measured maximum is in the comment. tests/test_driver_budgets.py fails above them.
+DRIVER_BUDGETS: Dict[str, int] = {
+    "wait_for_whatsapp_load": 10,   # 4 (1 once the page is up; polls while it loads)
+    "search_group": 20,             # 16
+    "stage_message": 26,            # 21
+    "press_send": 8,                # 6
+    "send_message_to_group": 32,    # 25
+    "stage_image": 14,              # 11
+    "stage_video": 14,              # 11
+    "send_image_to_group": 42,      # 34
+    "send_video_to_group": 42,      # 34
+    "send_poll": 48,                # 39
+    "send_poll_to_group": 68,       # 55
+}
+
+# Label of commands issued outside any operation
+NO_OPERATION = "other"
+
+WEBDRIVER_COMMANDS_TOTAL: metrics.Counter = metrics.REGISTRY.register(metrics.Counter(
+    "whatsapp_webdriver_commands_total", "WebDriver commands issued, by innermost bot operation and command",
+    ("operation", "command")))
+WEBDRIVER_SECONDS_TOTAL: metrics.Counter = metrics.REGISTRY.register(metrics.Counter(
+    "whatsapp_webdriver_seconds_total", "Time spent in WebDriver round trips, by innermost bot operation",
+    ("operation",)))
+WEBDRIVER_COMMANDS_PER_CALL: metrics.Histogram = metrics.REGISTRY.register(metrics.Histogram(
+    "whatsapp_webdriver_commands_per_operation", "WebDriver commands per call of a bot operation (including nested ones)",
+    ("operation",), buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)))
+
+
+class BudgetExceeded(AssertionError):
+    """A bot operation issued more WebDriver commands than its budget."""
+
+
+class _Frame:
+    """Commands issued while one call of an operation is running."""
+
+    __slots__ = ("operation", "commands", "seconds", "by_command")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.commands = 0
+        self.seconds = 0.0
+        self.by_command: Dict[str, int] = {}
+
+
+_local = threading.local()
+
+
+def _stack() -> List[_Frame]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _top_commands(frame: _Frame, limit: int = 4) -> str:
+    ranked = sorted(frame.by_command.items(), key=lambda item: -item[1])[:limit]
+    return ", ".join(f"{name} x{count}" for name, count in ranked)
+
+
+@contextmanager
+def operation(name: str):
+    """Attribute the WebDriver commands issued in the block to a bot operation."""
+    frame = _Frame(name)
+    stack = _stack()
+    stack.append(frame)
+    try:
+        yield frame
+    finally:
+        stack.pop()
+        WEBDRIVER_COMMANDS_PER_CALL.observe(frame.commands, operation=name)
+        # One INFO line per top-level operation; the operations nested in it only at DEBUG
+        level = logging.DEBUG if stack else logging.INFO
+        if frame.commands and logger.isEnabledFor(level):
+            logger.log(level, "%s: %d WebDriver commands in %.2fs (%s)", name, frame.commands, frame.seconds,
+                       _top_commands(frame))
+        recorder = getattr(_local, "recorder", None)
+        if recorder is not None:
+            recorder.append((name, frame.commands))
+
+
+def counted(name: str):
+    """Decorator form of operation()."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with operation(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument_driver(driver):
+    """Count and time every command the driver sends (element calls go through driver.execute too)."""
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        started = time.perf_counter()
+        try:
+            return execute(driver_command, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            stack = _stack()
+            for frame in stack:
+                frame.commands += 1
+                frame.seconds += elapsed
+                frame.by_command[driver_command] = frame.by_command.get(driver_command, 0) + 1
+            innermost = stack[-1].operation if stack else NO_OPERATION
+            WEBDRIVER_COMMANDS_TOTAL.inc(operation=innermost, command=driver_command)
+            WEBDRIVER_SECONDS_TOTAL.inc(elapsed, operation=innermost)
+
+    driver.execute = counted_execute
+    return driver
+
+
+@contextmanager
+def enforce_budgets(budgets: Optional[Dict[str, int]] = None):
+    """
+    Raise BudgetExceeded if any operation call in the block issued more commands than its budget
+
+    Args:
+        budgets (Dict[str, int]): Command budget per operation name (defaults to DRIVER_BUDGETS)
+    """
+    budgets = DRIVER_BUDGETS if budgets is None else budgets
+    calls: List[Tuple[str, int]] = []
+    previous = getattr(_local, "recorder", None)
+    _local.recorder = calls
+    try:
+        yield calls
+    finally:
+        _local.recorder = previous
+    over = [f"{name}: {count} commands (budget {budgets[name]})"
+            for name, count in calls if name in budgets and count > budgets[name]]
+    if over:
+        raise BudgetExceeded("WebDriver command budget exceeded - " + "; ".join(over))
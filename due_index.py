@@ -0,0 +1,149 @@
+import bisect
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class DueIndex:
+    """
+    Sorted index of pending due times.
+
+    Due times are stored as epoch seconds in one sorted list plus one sorted
+    list per batch, so "is anything due in the next N minutes?", "what is due
+    next?" and "how many are left in this batch?" are answered with a bisect
+    instead of a scan over every scheduled entry.
+    """
+
+    def __init__(self):
+        self._all: List[Tuple[float, int]] = []             # (due_ts, seq), ascending
+        self._batches: Dict[str, List[Tuple[float, int]]] = {}
+        self._items: Dict[Hashable, Tuple[float, int, Optional[str], Any]] = {}
+        self._keys: Dict[int, Hashable] = {}                 # seq -> key
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def add(self, key: Hashable, due_ts: float, batch_id: Optional[str] = None, item: Any = None):
+        """
+        Add or move an entry in the index
+
+        Args:
+            key (Hashable): Unique key of the entry
+            due_ts (float): Due time as epoch seconds
+            batch_id (str): Batch the entry belongs to (optional)
+            item (Any): Value returned by next_due() for this entry (defaults to the key)
+        """
+        self.discard(key)
+        self._seq += 1
+        seq = self._seq
+        pair = (due_ts, seq)
+        bisect.insort(self._all, pair)
+        if batch_id:
+            bisect.insort(self._batches.setdefault(batch_id, []), pair)
+        self._items[key] = (due_ts, seq, batch_id, key if item is None else item)
+        self._keys[seq] = key
+
+    def rebuild(self, entries: Iterable[Tuple[Hashable, float, Optional[str], Any]]):
+        """Replace the whole index with (key, due_ts, batch_id, item) tuples using one sort."""
+        self.clear()
+        for key, due_ts, batch_id, item in entries:
+            self._seq += 1
+            pair = (due_ts, self._seq)
+            self._all.append(pair)
+            if batch_id:
+                self._batches.setdefault(batch_id, []).append(pair)
+            self._items[key] = (due_ts, self._seq, batch_id, key if item is None else item)
+            self._keys[self._seq] = key
+        self._all.sort()
+        for pairs in self._batches.values():
+            pairs.sort()
+
+    def add_many(self, entries: Iterable[Tuple[Hashable, float, Optional[str], Any]]):
+        """Add or move many (key, due_ts, batch_id, item) tuples, sorting once instead of inserting one by one."""
+        touched = set()
+        for key, due_ts, batch_id, item in entries:
+            self.discard(key)
+            self._seq += 1
+            pair = (due_ts, self._seq)
+            self._all.append(pair)
+            if batch_id:
+                self._batches.setdefault(batch_id, []).append(pair)
+                touched.add(batch_id)
+            self._items[key] = (due_ts, self._seq, batch_id, key if item is None else item)
+            self._keys[self._seq] = key
+        self._all.sort()
+        for batch_id in touched:
+            self._batches[batch_id].sort()
+
+    def due(self, key: Hashable) -> Optional[float]:
+        """Return the due time an entry is indexed at (None if it is not indexed)."""
+        existing = self._items.get(key)
+        return existing[0] if existing is not None else None
+
+    def discard(self, key: Hashable):
+        """Remove an entry from the index if present."""
+        existing = self._items.pop(key, None)
+        if existing is None:
+            return
+        due_ts, seq, batch_id, _ = existing
+        del self._keys[seq]
+        self._remove_pair(self._all, (due_ts, seq))
+        if batch_id:
+            pairs = self._batches.get(batch_id)
+            if pairs is not None:
+                self._remove_pair(pairs, (due_ts, seq))
+                if not pairs:
+                    del self._batches[batch_id]
+
+    @staticmethod
+    def _remove_pair(pairs: List[Tuple[float, int]], pair: Tuple[float, int]):
+        pos = bisect.bisect_left(pairs, pair)
+        if pos < len(pairs) and pairs[pos] == pair:
+            del pairs[pos]
+
+    def clear(self):
+        self._all = []
+        self._batches = {}
+        self._items = {}
+        self._keys = {}
+
+    def _pairs(self, batch_id: Optional[str]) -> List[Tuple[float, int]]:
+        if batch_id:
+            return self._batches.get(batch_id, [])
+        return self._all
+
+    def any_between(self, start_ts: float, end_ts: float, batch_id: Optional[str] = None) -> bool:
+        """Return True if any entry (optionally within a batch) is due in [start_ts, end_ts]."""
+        pairs = self._pairs(batch_id)
+        pos = bisect.bisect_left(pairs, (start_ts,))
+        return pos < len(pairs) and pairs[pos][0] <= end_ts
+
+    def next_due(self, after_ts: Optional[float] = None, batch_id: Optional[str] = None) -> Optional[Tuple[float, Any]]:
+        """
+        Return the earliest (due_ts, item) at or after after_ts
+
+        Args:
+            after_ts (float): Ignore entries due before this time (optional; default is the earliest overall)
+            batch_id (str): Only consider entries in this batch (optional)
+        """
+        pairs = self._pairs(batch_id)
+        pos = 0 if after_ts is None else bisect.bisect_left(pairs, (after_ts,))
+        if pos >= len(pairs):
+            return None
+        due_ts, seq = pairs[pos]
+        return due_ts, self._items[self._keys[seq]][3]
+
+    def between(self, start_ts: float, end_ts: float) -> List[Tuple[float, Any]]:
+        """Return (due_ts, item) for every entry due after start_ts and at or before end_ts, earliest first."""
+        lo = bisect.bisect_left(self._all, (start_ts, float("inf")))
+        hi = bisect.bisect_left(self._all, (end_ts, float("inf")))
+        return [(due_ts, self._items[self._keys[seq]][3]) for due_ts, seq in self._all[lo:hi]]
+
+    def count(self, batch_id: Optional[str] = None, after_ts: Optional[float] = None) -> int:
+        """Return how many entries (optionally within a batch) are due at or after after_ts."""
+        pairs = self._pairs(batch_id)
+        if after_ts is None:
+            return len(pairs)
+        return len(pairs) - bisect.bisect_left(pairs, (after_ts,))
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Recent events kept for clients that reconnect with Last-Event-ID
+BUFFER_SIZE = int(os.environ.get("EVENTS_BUFFER", "1000"))
+# An idle stream gets a comment line this often, so proxies and the browser keep it open
+HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "15"))
+# How long a browser EventSource waits before reconnecting (sent as the SSE "retry" field)
+RETRY_MS = 3000
+
+# Event types (the SSE "event" field):
+#   scheduler  {"running"}                                  scheduler loop started or stopped
+#   schedules  {"version", "count"}                         the schedule list changed (version = /schedules ETag)
+#   job        {"id", "state", "type", "group_name", ...}   state: queued, started, progress, done, failed
+#   browser    {"state", "profile_path"}                    state: up, down
+# Events raised in a supervised worker also carry "worker" (its profile shard).
+#   reset      {"reason"}                                   missed events cannot be replayed; reload everything
+SCHEDULER = "scheduler"
+SCHEDULES = "schedules"
+JOB = "job"
+BROWSER = "browser"
+RESET = "reset"
+
+
+class Event:
+    """One published event."""
+
+    __slots__ = ("id", "type", "data", "ts")
+
+    def __init__(self, event_id: int, event_type: str, data: Dict, ts: float):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.ts = ts
+
+    def encode(self) -> bytes:
+        """Return the event as an SSE message."""
+        payload = json.dumps(dict(self.data, ts=self.ts), ensure_ascii=False, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class _Subscriber:
+    """Queue of one open stream, fed from any thread through its event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(BUFFER_SIZE)
+        # Set when the client fell BUFFER_SIZE events behind; the stream ends and the client resumes
+        self.lagging = False
+
+    def deliver(self, event: Event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+
+class EventBus:
+    """
+    Publishes state changes to server-sent event streams.
+
+    publish() may be called from any thread (API handlers, the scheduler
+    thread, supervisor reader threads); it appends to a ring buffer and wakes
+    the streams' event loops, so an idle stream costs nothing but a heartbeat.
+    Event ids start from the start time in ms, so an id a client kept from
+    before a restart is recognised as stale instead of being resumed.
+    """
+
+    def __init__(self, size: int = BUFFER_SIZE):
+        """
+        Args:
+            size (int): How many recent events are kept for resuming streams
+        """
+        self._events: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._last_id = int(time.time() * 1000)
+        self._subscribers: List[_Subscriber] = []
+        # When set, events are handed to this callback instead of being published here (supervised workers)
+        self.forward: Optional[Callable[[str, Dict], None]] = None
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event_type: str, **data) -> Optional[Event]:
+        """
+        Publish an event to every open stream
+
+        Args:
+            event_type (str): SSE event name (see the constants above)
+            **data: JSON-serializable event fields
+
+        Returns:
+            Optional[Event]: The event, or None if it was forwarded
+        """
+        if self.forward is not None:
+            self.forward(event_type, data)
+            return None
+        with self._lock:
+            self._last_id += 1
+            event = Event(self._last_id, event_type, data, round(time.time(), 3))
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Event loop already closed
+                self._unsubscribe(subscriber)
+        return event
+
+    def _subscribe(self, last_id: Optional[int]) -> Tuple[_Subscriber, Optional[List[Event]], int]:
+        """
+        Register a stream and return the events it missed since last_id, and the current last id
+
+        The backlog is None if those events are no longer (or were never) in the buffer.
+        """
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if last_id is None or last_id == self._last_id:
+                return subscriber, [], self._last_id
+            if last_id > self._last_id or not self._events or last_id < self._events[0].id - 1:
+                return subscriber, None, self._last_id
+            return subscriber, [event for event in self._events if event.id > last_id], self._last_id
+
+    def _unsubscribe(self, subscriber: _Subscriber):
+        with self._lock:
+            try:
+                self._subscribers.remove(subscriber)
+            except ValueError:
+                pass
+
+    def subscribers(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Yield an SSE stream: missed events since last_event_id, then live events and heartbeats
+
+        If the missed events cannot be replayed (too old, or from before a restart),
+        a "reset" event tells the client to reload its state first.
+        """
+        try:
+            last_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_id = -1
+        subscriber, backlog, current_id = self._subscribe(last_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode("utf-8")
+            if backlog is None:
+                # Too old for the buffer, or from before a restart
+                yield Event(current_id, RESET, {"reason": "missed_events"}, round(time.time(), 3)).encode()
+            else:
+                for event in backlog:
+                    yield event.encode()
+            # The queue only holds events published after _subscribe(), so nothing is sent twice
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+                    continue
+                yield event.encode()
+                if subscriber.lagging:
+                    logger.warning("Event stream client fell behind; closing it so it resumes from the buffer")
+                    return
+        finally:
+            self._unsubscribe(subscriber)
+
+
+BUS = EventBus()
+
+# Job the current thread is sending, for job events raised deeper down (bot phases)
+_local = threading.local()
+
+
+def publish(event_type: str, **data) -> Optional[Event]:
+    """Publish an event on the process's bus."""
+    return BUS.publish(event_type, **data)
+
+
+def job_event(state: str, entry_id: str, entry_type: str, group_name: str, profile: Optional[str], **data):
+    """Publish a job event (see JOB)."""
+    return BUS.publish(JOB, state=state, id=entry_id, type=entry_type, group_name=group_name, profile=profile, **data)
+
+
+@contextmanager
+def job_context(entry_id: str, entry_type: str, group_name: str, profile: Optional[str]):
+    """Attribute progress() events raised on this thread (by the bot) to the entry being sent."""
+    previous = getattr(_local, "job", None)
+    _local.job = (entry_id, entry_type, group_name, profile)
+    try:
+        yield
+    finally:
+        _local.job = previous
+
+
+def progress(phase: str, seconds: float):
+    """Publish a "progress" job event for a finished send phase (no-op outside a job_context)."""
+    job = getattr(_local, "job", None)
+    if job is not None:
+        job_event("progress", *job, phase=phase, seconds=round(seconds, 3))
@@ -0,0 +1,452 @@
+import os
+import re
+import json
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Record fields covered by the exact-match indexes, keyed by query parameter name
+INDEXED_FIELDS = ("group_name", "type", "batch_id", "status", "profile_name")
+
+
+def _index_key(field: str, value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value)
+    # Group names are matched case-insensitively, like WhatsApp search
+    return value.strip().lower() if field == "group_name" else value
+
+
+def _text_tokens(record: Dict) -> Set[str]:
+    parts = [record.get("message"), record.get("caption"), record.get("question")]
+    parts.extend(record.get("options") or [])
+    return {t for part in parts if part for t in _TOKEN_RE.findall(str(part).lower())}
+
+
+class FinishedScheduleIndex:
+    """
+    In-memory secondary indexes over the finished schedules history.
+
+    Holds exact-match postings for INDEXED_FIELDS, a sorted (completed_at, id)
+    list for date ranges and a word -> ids inverted index for text search, so
+    queries never have to read the history file to find matches.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def add(self, record_id: int, record: Dict):
+        keys = tuple(_index_key(field, record.get(field)) for field in INDEXED_FIELDS)
+        for field, key in zip(INDEXED_FIELDS, keys):
+            if key is not None:
+                self._postings[field].setdefault(key, set()).add(record_id)
+
+        completed_at = str(record.get("completed_at") or "")
+        bisect.insort(self._by_completed, (completed_at, record_id))
+
+        words = _text_tokens(record)
+        for word in words:
+            ids = self._words.get(word)
+            if ids is None:
+                self._words[word] = ids = set()
+                bisect.insort(self._vocabulary, word)
+            ids.add(record_id)
+
+        self._meta[record_id] = (keys, completed_at, words)
+
+    def remove(self, record_id: int):
+        meta = self._meta.pop(record_id, None)
+        if meta is None:
+            return
+        keys, completed_at, words = meta
+        for field, key in zip(INDEXED_FIELDS, keys):
+            if key is not None:
+                self._discard(self._postings[field], key, record_id)
+
+        pos = bisect.bisect_left(self._by_completed, (completed_at, record_id))
+        if pos < len(self._by_completed) and self._by_completed[pos] == (completed_at, record_id):
+            del self._by_completed[pos]
+
+        for word in words:
+            if self._discard(self._words, word, record_id):
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[int]], key: str, record_id: int) -> bool:
+        """Remove an id from a posting list; return True if the list became empty and was dropped."""
+        ids = postings.get(key)
+        if ids is None:
+            return False
+        ids.discard(record_id)
+        if not ids:
+            del postings[key]
+            return True
+        return False
+
+    def clear(self):
+        self._postings: Dict[str, Dict[str, Set[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self._by_completed: List[Tuple[str, int]] = []
+        self._words: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []  # sorted keys of _words, for prefix lookups
+        self._meta: Dict[int, Tuple] = {}
+
+    def match(self, all_ids: List[int], filters: Dict, since: Optional[str] = None,
+              until: Optional[str] = None, text: Optional[str] = None) -> List[int]:
+        """
+        Return the ids matching every given condition, ascending
+
+        Args:
+            all_ids (List[int]): All live ids, ascending (used when nothing narrows the search)
+            filters (Dict): Exact-match values keyed by INDEXED_FIELDS name (None values are ignored)
+            since (str): Lower bound on completed_at, e.g. "2025-11-04" or "2025-11-04 09:00" (optional)
+            until (str): Inclusive upper bound on completed_at; a date prefix covers the whole day (optional)
+            text (str): Words that must all appear (as word prefixes) in the message, caption, question or options (optional)
+        """
+        candidates: List[Set[int]] = []
+
+        for field, value in filters.items():
+            key = _index_key(field, value)
+            if key is None:
+                continue
+            candidates.append(self._postings[field].get(key, set()))
+
+        if since or until:
+            lo = bisect.bisect_left(self._by_completed, (since or "",))
+            hi = bisect.bisect_right(self._by_completed, (until + "\uffff",)) if until else len(self._by_completed)
+            candidates.append({record_id for _, record_id in self._by_completed[lo:hi]})
+
+        if text:
+            for word in _TOKEN_RE.findall(text.lower()):
+                lo = bisect.bisect_left(self._vocabulary, word)
+                hi = bisect.bisect_left(self._vocabulary, word + "\uffff")
+                ids: Set[int] = set()
+                for vocab_word in self._vocabulary[lo:hi]:
+                    ids |= self._words[vocab_word]
+                candidates.append(ids)
+
+        if not candidates:
+            return list(all_ids)
+
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            result &= ids
+            if not result:
+                break
+        return sorted(result)
+
+
+class FinishedScheduleStore:
+    """
+    Append-only history of completed schedules stored as JSON lines.
+
+    Every completed send is appended as one line ``{"record_id": 7, ...entry}``.
+    Deletes append a tombstone ``{"record_id": 7, "tombstone": true}`` instead of
+    rewriting the file, and a background compaction drops dead lines once they
+    make up a large part of the file. Record IDs are stable and increase
+    monotonically, so they double as pagination cursors.
+    """
+
+    def __init__(self, file_path: str = 'finishedSchedules.jsonl', legacy_path: Optional[str] = 'finishedSchedules.json',
+                 compact_min_dead: int = 200, compact_ratio: float = 0.5):
+        """
+        Open (or create) the history store
+
+        Args:
+            file_path (str): Path to the JSONL history file
+            legacy_path (str): Old whole-file JSON history imported on first use (optional)
+            compact_min_dead (int): Minimum number of dead lines before compaction is considered
+            compact_ratio (float): Fraction of dead lines that triggers a background compaction
+        """
+        self.file_path = file_path
+        self.legacy_path = legacy_path
+        self.compact_min_dead = compact_min_dead
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.RLock()
+        self._offsets: Dict[int, int] = {}  # record_id -> byte offset of the live line
+        self._ids: List[int] = []           # live record ids, ascending (append order)
+        self._next_id = 1
+        self._dead = 0
+        self._compacting = False
+        self._generation = 0  # bumped by clear() so an in-flight compaction knows to give up
+        self._index = FinishedScheduleIndex()
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        """Build the in-memory offset index from the JSONL file."""
+        if not os.path.exists(self.file_path):
+            self._migrate_legacy()
+
+        try:
+            with open(self.file_path, 'rb') as f:
+                offset = 0
+                for raw in f:
+                    line_offset = offset
+                    offset += len(raw)
+                    line = raw.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash; compaction will drop it
+                        logger.warning("Skipping unreadable line at offset %s in %s", line_offset, self.file_path)
+                        self._dead += 1
+                        continue
+
+                    if "next_id" in record and "record_id" not in record:
+                        self._next_id = max(self._next_id, int(record["next_id"]))
+                        continue
+
+                    record_id = int(record["record_id"])
+                    self._next_id = max(self._next_id, record_id + 1)
+                    if record.get("tombstone"):
+                        if self._offsets.pop(record_id, None) is not None:
+                            self._index.remove(record_id)
+                            self._dead += 1
+                        self._dead += 1
+                    else:
+                        self._offsets[record_id] = line_offset
+                        self._index.add(record_id, record)
+        except FileNotFoundError:
+            pass
+
+        self._ids = sorted(self._offsets)
+        logger.info("Loaded %s finished schedules from %s", len(self._ids), self.file_path)
+
+    def _migrate_legacy(self):
+        """Import the old finishedSchedules.json list, oldest first, keeping the legacy file untouched."""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.error("Could not read legacy finished schedules %s: %s", self.legacy_path, e)
+            return
+
+        legacy.sort(key=lambda x: x.get('completed_at', ''))
+        tmp_path = self.file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for record_id, entry in enumerate(legacy, 1):
+                f.write(self._encode({"record_id": record_id, **entry}))
+        os.replace(tmp_path, self.file_path)
+        logger.info("Migrated %s finished schedules from %s to %s", len(legacy), self.legacy_path, self.file_path)
+
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+
+    def _read_at(self, f, offset: int) -> Dict:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def append(self, entry: Dict) -> int:
+        """
+        Append a completed schedule to the history
+
+        Args:
+            entry (Dict): The completed schedule entry
+
+        Returns:
+            int: The stable record ID assigned to the entry
+        """
+        with self._lock:
+            record_id = self._next_id
+            self._next_id += 1
+            record = {"record_id": record_id, **entry}
+            with open(self.file_path, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(self._encode(record))
+            self._offsets[record_id] = offset
+            self._ids.append(record_id)
+            self._index.add(record_id, record)
+            return record_id
+
+    def get(self, record_id: int) -> Optional[Dict]:
+        """Return a single record by ID, or None if it does not exist."""
+        with self._lock:
+            offset = self._offsets.get(record_id)
+            if offset is None:
+                return None
+            with open(self.file_path, 'rb') as f:
+                return self._read_at(f, offset)
+
+    def get_many(self, record_ids: List[int]) -> List[Dict]:
+        """Return records for the given IDs in the given order, skipping unknown IDs."""
+        if not record_ids:
+            return []
+        with self._lock:
+            records = []
+            with open(self.file_path, 'rb') as f:
+                for record_id in record_ids:
+                    offset = self._offsets.get(record_id)
+                    if offset is not None:
+                        records.append(self._read_at(f, offset))
+            return records
+
+    def page(self, limit: int = 50, cursor: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Read one page of history, newest first
+
+        Args:
+            limit (int): Maximum number of records to return
+            cursor (int): Return records older than this record ID (optional)
+
+        Returns:
+            Tuple[List[Dict], Optional[int]]: The records and the cursor for the next page (None when exhausted)
+        """
+        items, next_cursor, _ = self.query(limit=limit, cursor=cursor)
+        return items, next_cursor
+
+    def query(self, filters: Optional[Dict] = None, since: Optional[str] = None, until: Optional[str] = None,
+              text: Optional[str] = None, limit: int = 50, cursor: Optional[int] = None) -> Tuple[List[Dict], Optional[int], int]:
+        """
+        Find records through the in-memory index, newest first
+
+        Args:
+            filters (Dict): Exact-match values keyed by field name, see INDEXED_FIELDS (optional)
+            since (str): Only records completed at or after this time (optional)
+            until (str): Only records completed at or before this time/date (optional)
+            text (str): Words to search for in message, caption, question and options (optional)
+            limit (int): Maximum number of records to return (0 to only count)
+            cursor (int): Return records older than this record ID (optional)
+
+        Returns:
+            Tuple[List[Dict], Optional[int], int]: The records, the cursor for the next page and the total number of matches
+        """
+        with self._lock:
+            if filters or since or until or text:
+                ids = self._index.match(self._ids, filters or {}, since=since, until=until, text=text)
+            else:
+                ids = self._ids
+            end = len(ids) if cursor is None else bisect.bisect_left(ids, cursor)
+            start = max(0, end - limit)
+            page_ids = ids[start:end][::-1]
+            next_cursor = page_ids[-1] if start > 0 and page_ids else None
+            return self.get_many(page_ids), next_cursor, len(ids)
+
+    def count(self) -> int:
+        """Return the number of live records."""
+        return len(self._ids)
+
+    def delete(self, record_id: int) -> bool:
+        """
+        Delete a record by appending a tombstone
+
+        Args:
+            record_id (int): ID of the record to delete
+
+        Returns:
+            bool: True if the record existed, False otherwise
+        """
+        with self._lock:
+            if self._offsets.pop(record_id, None) is None:
+                return False
+            with open(self.file_path, 'ab') as f:
+                f.write(self._encode({"record_id": record_id, "tombstone": True}))
+            del self._ids[bisect.bisect_left(self._ids, record_id)]
+            self._index.remove(record_id)
+            self._dead += 2
+        self._maybe_compact()
+        return True
+
+    def clear(self):
+        """Remove all records. Record IDs keep increasing so old IDs are never reused."""
+        with self._lock:
+            tmp_path = self.file_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(self._encode({"next_id": self._next_id}))
+            os.replace(tmp_path, self.file_path)
+            self._offsets = {}
+            self._ids = []
+            self._index.clear()
+            self._dead = 0
+            self._generation += 1
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _maybe_compact(self):
+        with self._lock:
+            total = len(self._ids) + self._dead
+            should_compact = (not self._compacting and self._dead >= self.compact_min_dead
+                              and self._dead > self.compact_ratio * total)
+            if should_compact:
+                self._compacting = True
+        if should_compact:
+            threading.Thread(target=self.compact, kwargs={"_claimed": True}, daemon=True).start()
+
+    def compact(self, _claimed: bool = False):
+        """
+        Rewrite the file without dead lines.
+
+        Live records are copied without holding the lock; lines appended while
+        copying are carried over verbatim before the files are swapped.
+        """
+        with self._lock:
+            if self._compacting and not _claimed:
+                return
+            self._compacting = True
+            live = [(record_id, self._offsets[record_id]) for record_id in self._ids]
+            dead_at_snapshot = self._dead
+            next_id = self._next_id
+            generation = self._generation
+            snapshot_end = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+
+        tmp_path = self.file_path + '.compact'
+        try:
+            new_offsets: Dict[int, int] = {}
+            with open(self.file_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                dst.write(self._encode({"next_id": next_id}))
+                for record_id, offset in live:
+                    src.seek(offset)
+                    new_offsets[record_id] = dst.tell()
+                    dst.write(src.readline())
+
+            with self._lock:
+                if generation != self._generation:
+                    os.remove(tmp_path)
+                    return
+                # Carry over lines appended while we were copying, then swap
+                with open(self.file_path, 'rb') as src, open(tmp_path, 'ab') as dst:
+                    src.seek(snapshot_end)
+                    shift = dst.tell() - snapshot_end
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.replace(tmp_path, self.file_path)
+
+                for record_id in self._ids:
+                    if record_id in new_offsets:
+                        self._offsets[record_id] = new_offsets[record_id]
+                    else:
+                        self._offsets[record_id] += shift
+                self._dead -= dead_at_snapshot
+            logger.info("Compacted %s: %d live records kept, %d dead lines dropped",
+                        self.file_path, len(live), dead_at_snapshot)
+        except Exception as e:
+            logger.error("Error compacting finished schedules: %s", e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        finally:
+            with self._lock:
+                self._compacting = False
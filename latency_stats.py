@@ -0,0 +1,300 @@
+import os
+import json
+import math
+import time
+import atexit
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# The send-time SLO: an occurrence counts as on time if send was pressed at most this long after its due time
+SLO_SECONDS = float(os.environ.get("LATENCY_SLO_SECONDS", "60"))
+# Share of occurrences that must be on time for the SLO to hold
+SLO_OBJECTIVE = float(os.environ.get("LATENCY_SLO_OBJECTIVE", "0.99"))
+
+# Where the time of one occurrence goes, in milliseconds:
+#   scheduler  due time -> job fired (timer granularity, queueing behind other sends, retry backoff;
+#              negative for precise entries, which fire early to stage)
+#   bot        job fired -> send pressed (browser start, WhatsApp load, search, compose)
+#   confirm    send pressed -> delivery seen (upload, verify wait)
+#   drift      due time -> send pressed (what the SLO is about)
+#   total      due time -> delivery seen
+STAGES = ("scheduler", "bot", "confirm", "drift", "total")
+
+# Finished statuses of occurrences that were never sent; each counts as an SLO miss
+NOT_SENT = ("failed", "missed", "unconfirmed")
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Profile label of entries without a profile (same as metrics.NO_PROFILE)
+NO_PROFILE = "default"
+
+# The state file is rewritten at most this often (and on flush/exit), not on every send
+SAVE_INTERVAL_SECONDS = 10.0
+
+# Ratio between neighbouring bucket bounds of a LatencyDigest; percentiles are exact to about +-2%
+_GROWTH = 1.04
+_LOG_GROWTH = math.log(_GROWTH)
+
+
+class LatencyDigest:
+    """
+    Streaming histogram of durations in milliseconds.
+
+    Values fall into log-spaced buckets (negative values into mirrored ones),
+    so adding a value is O(1), the state stays a few hundred integers no
+    matter how many values were added, and percentiles come out of the bucket
+    counts instead of a sorted list of every sample.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    @staticmethod
+    def _bucket(ms: float) -> int:
+        index = int(round(math.log1p(abs(ms)) / _LOG_GROWTH))
+        return index if ms >= 0 else -index - 1
+
+    @staticmethod
+    def _value(bucket: int) -> float:
+        if bucket >= 0:
+            return math.expm1(bucket * _LOG_GROWTH)
+        return -math.expm1((-bucket - 1) * _LOG_GROWTH)
+
+    def add(self, ms: float):
+        bucket = self._bucket(ms)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-100) in milliseconds, or None if nothing was added."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(max(self._value(bucket), self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        """Return count, mean, min, max and PERCENTILES, in milliseconds."""
+        if not self.count:
+            return {"count": 0}
+        data = {"count": self.count, "mean_ms": round(self.total / self.count)}
+        for q in PERCENTILES:
+            data[f"p{q}_ms"] = round(self.percentile(q))
+        data["min_ms"] = round(self.min)
+        data["max_ms"] = round(self.max)
+        return data
+
+    def to_dict(self) -> Dict:
+        return {"buckets": {str(k): v for k, v in self.buckets.items()}, "count": self.count,
+                "total": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyDigest":
+        digest = cls()
+        digest.buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        digest.count = data.get("count", 0)
+        digest.total = data.get("total", 0.0)
+        digest.min = data.get("min")
+        digest.max = data.get("max")
+        return digest
+
+
+class _Group:
+    """Latency digests and SLO counts of the occurrences sharing one profile, type or hour."""
+
+    __slots__ = ("stages", "sent", "on_time", "not_sent")
+
+    def __init__(self):
+        self.stages = {stage: LatencyDigest() for stage in STAGES}
+        self.sent = 0
+        self.on_time = 0
+        self.not_sent = 0
+
+    def report(self, objective: float) -> Dict:
+        occurrences = self.sent + self.not_sent
+        ratio = self.on_time / occurrences if occurrences else None
+        return {
+            "sent": self.sent,
+            "not_sent": self.not_sent,
+            "on_time": self.on_time,
+            "on_time_ratio": round(ratio, 4) if ratio is not None else None,
+            "slo_met": ratio >= objective if ratio is not None else None,
+            "stages": {stage: digest.summary() for stage, digest in self.stages.items()},
+        }
+
+    def to_dict(self) -> Dict:
+        return {"sent": self.sent, "on_time": self.on_time, "not_sent": self.not_sent,
+                "stages": {stage: digest.to_dict() for stage, digest in self.stages.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "_Group":
+        group = cls()
+        group.sent = data.get("sent", 0)
+        group.on_time = data.get("on_time", 0)
+        group.not_sent = data.get("not_sent", 0)
+        for stage, digest in data.get("stages", {}).items():
+            if stage in group.stages:
+                group.stages[stage] = LatencyDigest.from_dict(digest)
+        return group
+
+
+class LatencyStats:
+    """
+    Send-time accuracy of finished occurrences, by profile, type and hour of day.
+
+    Each finished record is folded into running digests as it is written
+    (see MessageScheduler.save_to_finished_schedules), so a report never
+    rescans the history. The state is small and kept in a JSON file next to
+    the history so it survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None, slo_seconds: float = SLO_SECONDS,
+                 objective: float = SLO_OBJECTIVE):
+        """
+        Args:
+            path (str): JSON file the state is kept in (None keeps it in memory only)
+            slo_seconds (float): On-time limit for the drift (send pressed after the due time)
+            objective (float): Share of occurrences that must be on time
+        """
+        self.path = path
+        self.slo_seconds = slo_seconds
+        self.objective = objective
+        self._lock = threading.Lock()
+        self._groups: Dict[str, Dict[str, _Group]] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load()
+        if path:
+            atexit.register(self.flush)
+
+    def _group(self, dimension: str, value: str) -> _Group:
+        groups = self._groups.setdefault(dimension, {})
+        group = groups.get(value)
+        if group is None:
+            group = groups[value] = _Group()
+        return group
+
+    @staticmethod
+    def _hour(record: Dict) -> Optional[str]:
+        stamp = record.get("due_at") or record.get("due_local") or ""
+        return stamp[11:13] if len(stamp) >= 13 and stamp[11:13].isdigit() else None
+
+    def record(self, record: Dict) -> bool:
+        """
+        Add a finished record
+
+        Records of sent occurrences count if they carry "latency_ms" (written by the
+        scheduler since send timings are recorded); failed, missed and unconfirmed
+        ones count as SLO misses. Anything else is ignored.
+
+        Args:
+            record (Dict): Finished schedule record
+
+        Returns:
+            bool: True if the record was counted
+        """
+        latency = record.get("latency_ms")
+        not_sent = record.get("status") in NOT_SENT
+        if not latency and not not_sent:
+            return False
+        drift = latency.get("drift") if latency else None
+        keys = [("all", "all"),
+                ("profile", record.get("profile_name") or NO_PROFILE),
+                ("type", record.get("type") or "message")]
+        hour = self._hour(record)
+        if hour is not None:
+            keys.append(("hour", hour))
+        with self._lock:
+            for dimension, value in keys:
+                group = self._group(dimension, value)
+                if not_sent:
+                    group.not_sent += 1
+                    continue
+                group.sent += 1
+                if drift is not None and drift <= self.slo_seconds * 1000:
+                    group.on_time += 1
+                for stage, ms in latency.items():
+                    if stage in group.stages and ms is not None:
+                        group.stages[stage].add(ms)
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= SAVE_INTERVAL_SECONDS:
+                self._save()
+        return True
+
+    def report(self) -> Dict:
+        """
+        Return the SLO and stage percentiles overall and by profile, type and hour of day
+
+        Returns:
+            Dict: {"slo": ..., "overall": ..., "by_profile": {...}, "by_type": {...}, "by_hour": {"09": ...}}
+        """
+        with self._lock:
+            overall = self._groups.get("all", {}).get("all", _Group()).report(self.objective)
+            by = {dimension: {value: group.report(self.objective) for value, group in sorted(groups.items())}
+                  for dimension, groups in self._groups.items() if dimension != "all"}
+        return {
+            "slo": {
+                "description": f"send pressed within {self.slo_seconds:g}s of the due time",
+                "threshold_seconds": self.slo_seconds,
+                "objective": self.objective,
+                "on_time_ratio": overall["on_time_ratio"],
+                "met": overall["slo_met"],
+            },
+            "overall": overall,
+            "by_profile": by.get("profile", {}),
+            "by_type": by.get("type", {}),
+            "by_hour": by.get("hour", {}),
+        }
+
+    def reset(self):
+        """Forget everything (the finished history was cleared)."""
+        with self._lock:
+            self._groups = {}
+            self._save()
+
+    def flush(self):
+        """Write changes not saved yet (called when the scheduler stops and at exit)."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._groups = {dimension: {value: _Group.from_dict(group) for value, group in groups.items()}
+                            for dimension, groups in data.get("groups", {}).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning("Could not read latency stats from %s, starting empty: %s", self.path, e)
+            self._groups = {}
+
+    def _save(self):
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if not self.path:
+            return
+        data = {"groups": {dimension: {value: group.to_dict() for value, group in groups.items()}
+                           for dimension, groups in self._groups.items()}}
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save latency stats to %s: %s", self.path, e)
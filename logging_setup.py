@@ -0,0 +1,179 @@
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import logging.handlers
+from datetime import datetime
+from typing import Optional
+
+# Opt-in: LOG_QUEUE=1 moves all log I/O (formatting, files, console, rotation) to a background thread
+LOG_QUEUE = os.environ.get("LOG_QUEUE") == "1"
+# One JSON object per line instead of plain text (queued mode only)
+LOG_JSON = os.environ.get("LOG_JSON") == "1"
+# Rotate when a file reaches this size or this age, whichever comes first (0 disables either)
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_HOURS = float(os.environ.get("LOG_ROTATE_HOURS", "24"))
+# Compressed rotated files kept per log file
+LOG_BACKUPS = int(os.environ.get("LOG_BACKUPS", "7"))
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object: time, level, logger, message, exception and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                data[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotates at a size limit or an age limit, whichever comes first.
+
+    Rotated files are gzipped to "<name>.<YYYYmmdd-HHMMSS>.gz"; only the newest
+    `backups` of them are kept. In queued mode this runs on the listener thread,
+    so neither rotation nor compression ever blocks the code that logs.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES, rotate_hours: float = LOG_ROTATE_HOURS,
+                 backups: int = LOG_BACKUPS):
+        """
+        Args:
+            filename (str): Log file path
+            max_bytes (int): Size limit (0 = no size limit)
+            rotate_hours (float): Age limit in hours (0 = no age limit)
+            backups (int): Compressed files to keep
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding='utf-8', delay=True)
+        self.rotate_seconds = rotate_hours * 3600
+        self.opened_at = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.rotate_seconds and time.time() - self.opened_at >= self.rotate_seconds \
+                and os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            target = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S')}.gz"
+            with open(self.baseFilename, 'rb') as src, gzip.open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(self.baseFilename)
+            for old in sorted(glob.glob(f"{glob.escape(self.baseFilename)}.*.gz"))[:-self.backupCount or None]:
+                os.remove(old)
+        self.opened_at = time.time()
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queues the record untouched; message formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # Tracebacks reference frames that may change once the caller moves on
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+def _formatter() -> logging.Formatter:
+    return JsonFormatter() if LOG_JSON else logging.Formatter(TEXT_FORMAT)
+
+
+def _file_handler(log_file: str) -> logging.Handler:
+    handler = CompressingRotatingFileHandler(log_file)
+    handler.setFormatter(_formatter())
+    return handler
+
+
+def setup_logging(log_file: str = "whatsapp_bot.log"):
+    """
+    Configure logging for the process: log_file plus the console
+
+    Without LOG_QUEUE=1 this is the classic synchronous setup (a FileHandler and
+    a stdout handler; nothing happens if logging is already configured). With
+    it, loggers only put records on an in-memory queue and a QueueListener
+    thread formats them (text or JSON) and writes them to rotating, compressed
+    files, so a send never waits on disk I/O. Calling it again adds log_file
+    to the running pipeline.
+
+    Args:
+        log_file (str): Log file path
+    """
+    global _listener
+    root = logging.getLogger()
+
+    if not LOG_QUEUE:
+        if root.handlers:
+            return
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        stream_handler = logging.StreamHandler(sys.stdout)
+        for handler in (file_handler, stream_handler):
+            handler.setLevel(logging.INFO)
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT, handlers=[file_handler, stream_handler])
+        return
+
+    path = os.path.abspath(log_file)
+    if _listener is not None:
+        if not any(getattr(h, "baseFilename", None) == path for h in _listener.handlers):
+            _listener.handlers = _listener.handlers + (_file_handler(log_file),)
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_formatter())
+    records: queue.Queue = queue.Queue(-1)  # unbounded: put() never blocks
+    _listener = logging.handlers.QueueListener(records, _file_handler(log_file), stream_handler,
+                                               respect_handler_level=True)
+    root.handlers = [_LazyQueueHandler(records)]
+    root.setLevel(logging.INFO)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def use_log_file(log_file: str):
+    """Send queued-mode file output to log_file instead (supervisor workers log to their own directory)."""
+    if _listener is None:
+        return
+    others = tuple(h for h in _listener.handlers if not isinstance(h, logging.FileHandler))
+    old = [h for h in _listener.handlers if isinstance(h, logging.FileHandler)]
+    _listener.handlers = (_file_handler(log_file),) + others
+    for handler in old:
+        handler.close()
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread (registered with atexit)."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
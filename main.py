@@ -9,16 +9,10 @@ import logging
 import sys
 from whatsapp_bot import WhatsAppBot
 from scheduler import MessageScheduler
+from logging_setup import setup_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('whatsapp_scheduler.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging (LOG_QUEUE=1: queued, rotated, see logging_setup)
+setup_logging('whatsapp_scheduler.log')
 logger = logging.getLogger(__name__)
 
 
@@ -30,7 +24,7 @@ def send_immediate_message(args):
         bot.start()
         bot.wait_for_whatsapp_load(timeout=args.timeout)
 
-        logger.info(f"Sending message to group: {args.group}")
+        logger.info("Sending message to group: %s", args.group)
         success = bot.send_message_to_group(args.group, args.message)
 
         if success:
@@ -40,7 +34,7 @@ def send_immediate_message(args):
             sys.exit(1)
 
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         sys.exit(1)
     finally:
         if not args.keep_open:
@@ -55,8 +49,8 @@ def send_immediate_image(args):
         bot.start()
         bot.wait_for_whatsapp_load(timeout=args.timeout)
 
-        logger.info(f"Sending image to group: {args.group}")
-        logger.info(f"Image path: {args.image}")
+        logger.info("Sending image to group: %s", args.group)
+        logger.info("Image path: %s", args.image)
 
         caption = args.caption if args.caption else None
         success = bot.send_image_to_group(args.group, args.image, caption)
@@ -68,7 +62,7 @@ def send_immediate_image(args):
             sys.exit(1)
 
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         sys.exit(1)
     finally:
         if not args.keep_open:
@@ -83,10 +77,10 @@ def send_immediate_poll(args):
         bot.start()
         bot.wait_for_whatsapp_load(timeout=args.timeout)
 
-        logger.info(f"Sending poll to group: {args.group}")
-        logger.info(f"Question: {args.question}")
-        logger.info(f"Options: {args.options}")
-        logger.info(f"Allow multiple answers: {args.multiple}")
+        logger.info("Sending poll to group: %s", args.group)
+        logger.info("Question: %s", args.question)
+        logger.info("Options: %s", args.options)
+        logger.info("Allow multiple answers: %s", args.multiple)
 
         success = bot.send_poll_to_group(args.group, args.question, args.options, args.multiple)
 
@@ -97,7 +91,7 @@ def send_immediate_poll(args):
             sys.exit(1)
 
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         sys.exit(1)
     finally:
         if not args.keep_open:
@@ -116,7 +110,7 @@ def schedule_messages(args):
 
         if args.file:
             # Load schedules from file
-            logger.info(f"Loading schedules from: {args.file}")
+            logger.info("Loading schedules from: %s", args.file)
             scheduler.load_schedules_from_file(args.file)
         else:
             # Add a single scheduled message
@@ -136,7 +130,7 @@ def schedule_messages(args):
     except KeyboardInterrupt:
         logger.info("Scheduler stopped by user")
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         sys.exit(1)
     finally:
         bot.close()
@@ -176,7 +170,7 @@ def interactive_mode():
                 group = input("Enter group name: ").strip()
                 message = input("Enter message: ").strip()
                 time_str = input("Enter time (HH:MM): ").strip()
-                repeat = input("Enter repeat (once/daily/hourly/monday/etc): ").strip() or "once"
+                repeat = input("Enter repeat (once/daily/hourly/monday/etc or cron:<expr>): ").strip() or "once"
                 scheduler.schedule_message(group, message, time_str, repeat)
 
             elif choice == "3":
@@ -200,7 +194,7 @@ def interactive_mode():
     except KeyboardInterrupt:
         logger.info("\nInteractive mode stopped by user")
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         sys.exit(1)
     finally:
         bot.close()
@@ -267,7 +261,7 @@ Examples:
     schedule_parser.add_argument('--group', help='Group name')
     schedule_parser.add_argument('--message', help='Message to send')
     schedule_parser.add_argument('--time', help='Time to send (HH:MM)')
-    schedule_parser.add_argument('--repeat', default='once', help='Repeat frequency (once/daily/hourly/monday/etc)')
+    schedule_parser.add_argument('--repeat', default='once', help='Repeat frequency (once/daily/hourly/monday/etc, or a cron expression like "cron:30 8,17 * * mon-fri")')
     schedule_parser.add_argument('--file', help='Load schedules from JSON file')
 
     # Interactive command
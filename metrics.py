@@ -0,0 +1,268 @@
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds (seconds) of the send phase histogram buckets; browser start and uploads reach minutes
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# Bot phases timed per send (label "phase" of whatsapp_send_phase_seconds)
+PHASES = ("browser_start", "whatsapp_load", "search", "compose", "send_click", "ack", "upload")
+
+# Label values used outside a send_context (e.g. the CLI bot)
+NO_PROFILE = "default"
+NO_TYPE = "none"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        """
+        Args:
+            name (str): Metric name
+            documentation (str): HELP text
+            labelnames (Tuple[str, ...]): Label names, in order
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def dump(self) -> List:
+        """Return [(labels, state)] as plain data (sent from worker processes to the supervisor)."""
+        with self._lock:
+            return [(key, self._copy(state)) for key, state in self._values.items()]
+
+    @staticmethod
+    def _copy(state):
+        return state
+
+    def render(self, extra: Iterable[List] = ()) -> List[str]:
+        merged = dict(self.dump())
+        for samples in extra:
+            for key, state in samples:
+                key = tuple(key)
+                merged[key] = self._merge(merged[key], state) if key in merged else self._copy(state)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key in sorted(merged):
+            lines.extend(self._render_sample(key, merged[key]))
+        return lines
+
+    def _merge(self, a, b):
+        return a + b
+
+    def _render_sample(self, key, state) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(state)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. sends by result."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Current value, either set directly or read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Read the (unlabelled) value from function whenever metrics are rendered."""
+        self._function = function
+
+    def dump(self) -> List:
+        if self._function is not None:
+            try:
+                return [((), float(self._function()))]
+            except Exception:
+                return []
+        return super().dump()
+
+    def render(self, extra: Iterable[List] = ()) -> List[str]:
+        # Gauges describe the process that owns them; values from other processes are not added up
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, plus their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = PHASE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (last is +Inf), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def _copy(state):
+        return [list(state[0]), state[1], state[2]]
+
+    def _merge(self, a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]]
+
+    def _render_sample(self, key, state) -> List[str]:
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def dump(self) -> Dict[str, List]:
+        """Return every counter and histogram as plain data, for merging into another process's render()."""
+        return {name: m.dump() for name, m in self._metrics.items() if not isinstance(m, Gauge)}
+
+    def render(self, extra: Iterable[Dict[str, List]] = ()) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Args:
+            extra (Iterable[Dict[str, List]]): dump() results of other processes (supervisor workers) to add in
+
+        Returns:
+            str: The exposition text
+        """
+        extra = list(extra)
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.extend(metric.render([d[name] for d in extra if name in d]))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+SEND_PHASE_SECONDS: Histogram = REGISTRY.register(Histogram(
+    "whatsapp_send_phase_seconds", "Duration of each bot phase of a send",
+    ("phase", "profile", "type")))
+SENDS_TOTAL: Counter = REGISTRY.register(Counter(
+    "whatsapp_sends_total", "Send attempts by result (success or failure)",
+    ("profile", "type", "result")))
+SEND_RETRIES_TOTAL: Counter = REGISTRY.register(Counter(
+    "whatsapp_send_retries_total", "Retries scheduled after a failed send, by failure class",
+    ("profile", "type", "failure")))
+QUEUE_DEPTH: Gauge = REGISTRY.register(Gauge(
+    "whatsapp_scheduler_queue_depth", "Pending schedule entries"))
+BROWSERS_OPEN: Gauge = REGISTRY.register(Gauge(
+    "whatsapp_browsers_open", "Chrome instances currently open"))
+
+# Labels of the send running on this thread
+_context = threading.local()
+
+
+@contextmanager
+def send_context(profile_name: Optional[str], entry_type: Optional[str]):
+    """Label the phases and counts recorded on this thread with the send's profile and type."""
+    previous = getattr(_context, "labels", None)
+    _context.labels = {"profile": profile_name or NO_PROFILE, "type": entry_type or NO_TYPE}
+    try:
+        yield
+    finally:
+        _context.labels = previous
+
+
+def current_labels() -> Dict[str, str]:
+    return getattr(_context, "labels", None) or {"profile": NO_PROFILE, "type": NO_TYPE}
+
+
+def observe_phase(phase: str, seconds: float):
+    """Record the duration of one send phase (see PHASES) under the current send's labels."""
+    SEND_PHASE_SECONDS.observe(seconds, phase=phase, **current_labels())
+
+
+@contextmanager
+def phase(name: str):
+    """Time the enclosed block as one send phase."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        observe_phase(name, time.monotonic() - started)
+
+
+def timed(name: str):
+    """Decorator timing every call of a bot method as one send phase."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count_send(result: str):
+    """Count a finished send attempt ("success" or "failure") under the current send's labels."""
+    SENDS_TOTAL.inc(result=result, **current_labels())
+
+
+def count_retry(failure: str):
+    SEND_RETRIES_TOTAL.inc(failure=failure, **current_labels())
@@ -0,0 +1,63 @@
+import random
+from typing import Dict
+
+# Failure classes reported through WhatsAppBot.last_error (plus the scheduler's own "driver_crash"/"unknown")
+GROUP_NOT_FOUND = "group_not_found"
+LOAD_TIMEOUT = "load_timeout"
+UPLOAD_STALL = "upload_stall"
+FILE_MISSING = "file_missing"
+INVALID_CONTENT = "invalid_content"
+DRIVER_CRASH = "driver_crash"
+UNKNOWN = "unknown"
+
+
+class RetryPolicy:
+    """How often and how quickly to retry one class of send failure."""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        """
+        Args:
+            max_attempts (int): Total attempts including the first one
+            base_delay (float): Delay in seconds before the first retry (doubles for each retry after that)
+            max_delay (float): Upper bound for the delay in seconds
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, attempts: int) -> bool:
+        """Return True if another attempt is allowed after `attempts` failed ones."""
+        return attempts < self.max_attempts
+
+    def delay(self, attempts: int, rng: random.Random = random) -> float:
+        """
+        Return the seconds to wait before the next attempt after `attempts` failed ones.
+
+        Exponential backoff with "equal jitter": half of the backoff is fixed and
+        half random, so retries of entries that failed together do not line up
+        again while still waiting at least half the backoff.
+        """
+        backoff = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        return backoff / 2 + rng.uniform(0, backoff / 2)
+
+
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    # The group name is usually wrong; one more try covers a slow search result list
+    GROUP_NOT_FOUND: RetryPolicy(max_attempts=2, base_delay=60, max_delay=60),
+    # WhatsApp Web did not load (network, QR code waiting to be scanned)
+    LOAD_TIMEOUT: RetryPolicy(max_attempts=4, base_delay=60, max_delay=600),
+    # Attach menu, file input or send button did not respond
+    UPLOAD_STALL: RetryPolicy(max_attempts=3, base_delay=30, max_delay=300),
+    # The image/video file is gone; retrying cannot help
+    FILE_MISSING: RetryPolicy(max_attempts=1, base_delay=0, max_delay=0),
+    # The content cannot be sent as it is (e.g. a poll with fewer than 2 or more than 12 options)
+    INVALID_CONTENT: RetryPolicy(max_attempts=1, base_delay=0, max_delay=0),
+    # Chrome died or the WebDriver session broke; the next attempt starts a new browser
+    DRIVER_CRASH: RetryPolicy(max_attempts=4, base_delay=15, max_delay=300),
+    UNKNOWN: RetryPolicy(max_attempts=3, base_delay=60, max_delay=600),
+}
+
+
+def policy_for(failure: str) -> RetryPolicy:
+    """Return the retry policy for a failure class (the "unknown" policy for anything unrecognised)."""
+    return RETRY_POLICIES.get(failure, RETRY_POLICIES[UNKNOWN])
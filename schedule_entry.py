@@ -0,0 +1,233 @@
+import sys
+import uuid
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from timezones import zone_for, localize, wall_clock, utc_iso, local_iso
+
+TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M")
+CLOCK_FORMATS = ("%H:%M:%S", "%H:%M")
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Type-specific fields written for each entry type
+PAYLOAD_FIELDS = {
+    "message": ("message",),
+    "image": ("image_path", "caption"),
+    "video": ("video_path", "caption"),
+    "poll": ("question", "options", "allow_multiple"),
+}
+
+# Fields shared by every entry type, in the order they are written
+COMMON_FIELDS = ("scheduled_time", "repeat", "created_at", "status", "profile_name", "batch_id")
+
+# Keys that are derived on output and never kept as extras
+_DERIVED_KEYS = ("time", "due_utc", "due_local")
+
+# Keys from_dict() maps to fields, per entry type; everything else goes to `extra`
+_KNOWN_KEYS = {
+    typ: frozenset(COMMON_FIELDS + payload + _DERIVED_KEYS
+                   + ("id", "type", "group_name", "completed_at", "precise", "attempts", "timezone"))
+    for typ, payload in PAYLOAD_FIELDS.items()
+}
+
+
+def parse_scheduled_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an absolute "YYYY-MM-DD HH:MM[:SS]" time; return None for time-only or empty values."""
+    if not value:
+        return None
+    if len(value) in (16, 19) and value[10] == " ":
+        # Fast path for the formats we write; strptime is slow enough to dominate loading large files
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_clock_time(value: Optional[str]) -> Optional[time]:
+    """Parse a time-only "HH:MM[:SS]" value; return None for anything else."""
+    if not value:
+        return None
+    for fmt in CLOCK_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def new_entry_id() -> str:
+    """Return a new stable entry ID."""
+    return uuid.uuid4().hex[:12]
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ScheduleEntry:
+    """
+    One scheduled send.
+
+    A compact, typed replacement for the plain dicts stored in schedules.json.
+    The absolute due time is parsed once on creation, repeated strings (group,
+    profile, repeat, type, status) are interned, and unknown keys are kept in
+    `extra` so from_dict()/to_dict() round-trip without losing anything.
+
+    scheduled_time is wall-clock time in the entry's timezone (its own, else
+    its profile's, else the server default); `due` is that time as an aware
+    datetime, so comparisons and timers work on the absolute (UTC) moment.
+    """
+
+    __slots__ = (
+        "id", "type", "group_name", "scheduled_time", "repeat", "created_at", "status",
+        "profile_name", "batch_id", "completed_at", "precise", "timezone", "tz",
+        "message", "image_path", "video_path", "caption", "question", "options", "allow_multiple",
+        "attempts", "due", "extra", "job", "retry_job", "occurrence", "occurrence_due",
+    )
+
+    def __init__(self, type: str, group_name: str, scheduled_time: str, repeat: str = "once",
+                 profile_name: Optional[str] = None, batch_id: Optional[str] = None,
+                 created_at: Optional[str] = None, status: str = "pending", completed_at: Optional[str] = None,
+                 message: Optional[str] = None, image_path: Optional[str] = None, video_path: Optional[str] = None,
+                 caption: Optional[str] = None, question: Optional[str] = None, options: Optional[List[str]] = None,
+                 allow_multiple: bool = False, extra: Optional[Dict] = None, id: Optional[str] = None,
+                 precise: bool = False, attempts: Optional[List[Dict]] = None, timezone: Optional[str] = None):
+        self.id = id or new_entry_id()
+        self.type = _intern(type if type in PAYLOAD_FIELDS else "message")
+        self.group_name = _intern(group_name)
+        self.scheduled_time = scheduled_time
+        self.repeat = _intern(repeat or "once")
+        self.created_at = created_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.status = _intern(status or "pending")
+        self.profile_name = _intern(profile_name)
+        self.batch_id = _intern(batch_id)
+        self.completed_at = completed_at
+        # Time-critical: stage the content ahead and press send exactly at the due second
+        self.precise = bool(precise)
+        # Failed send attempts: [{"at": "...", "error": failure class}, ...]
+        self.attempts = list(attempts) if attempts else []
+        self.message = message
+        self.image_path = image_path
+        self.video_path = video_path
+        self.caption = caption
+        self.question = question
+        self.options = options if options is not None else []
+        self.allow_multiple = bool(allow_multiple)
+        self.extra = extra or None
+        self.job = None
+        self.retry_job = None
+        # Fire time of the occurrence of a recurring entry that is being sent (send journal key)
+        self.occurrence = None
+        # Epoch time the occurrence being sent was due at, kept across its retries (send latency stats)
+        self.occurrence_due: Optional[float] = None
+        # IANA timezone the scheduled time is written in (None: profile or server default)
+        self.timezone = _intern(timezone)
+        self.tz = zone_for(self.timezone, self.profile_name)
+        self.due: Optional[datetime] = localize(parse_scheduled_time(scheduled_time), self.tz)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScheduleEntry":
+        """
+        Build an entry from a schedules.json / API dict
+
+        Args:
+            data (Dict): Entry dict; "time" is accepted as an alias of "scheduled_time"
+
+        Returns:
+            ScheduleEntry: The parsed entry
+        """
+        typ = data.get("type", "message")
+        if typ not in PAYLOAD_FIELDS:
+            typ = "message"
+        payload = PAYLOAD_FIELDS[typ]
+        known = _KNOWN_KEYS[typ]
+        extra = {k: v for k, v in data.items() if k not in known}
+
+        kwargs = {field: data.get(field) for field in payload}
+        if typ == "poll":
+            kwargs["options"] = data.get("options", [])
+            kwargs["allow_multiple"] = bool(data.get("allow_multiple", False))
+
+        return cls(
+            id=data.get("id"),
+            type=typ,
+            group_name=data.get("group_name"),
+            scheduled_time=data.get("time") or data.get("scheduled_time"),
+            repeat=data.get("repeat", "once"),
+            profile_name=data.get("profile_name"),
+            batch_id=data.get("batch_id"),
+            created_at=data.get("created_at"),
+            status=data.get("status", "pending"),
+            completed_at=data.get("completed_at"),
+            precise=data.get("precise", False),
+            attempts=data.get("attempts"),
+            timezone=data.get("timezone"),
+            extra=extra,
+            **kwargs
+        )
+
+    def to_dict(self) -> Dict:
+        """Return the entry in the schedules.json schema (with both "scheduled_time" and "time")."""
+        data = {"id": self.id, "type": self.type, "group_name": self.group_name}
+        for field in PAYLOAD_FIELDS[self.type]:
+            data[field] = getattr(self, field)
+        for field in COMMON_FIELDS:
+            data[field] = getattr(self, field)
+        if self.completed_at is not None:
+            data["completed_at"] = self.completed_at
+        if self.precise:
+            data["precise"] = True
+        if self.attempts:
+            data["attempts"] = list(self.attempts)
+        if self.timezone:
+            data["timezone"] = self.timezone
+        due = self.first_due() if self.repeat == "once" else self.due
+        if due is not None:
+            data["due_utc"] = utc_iso(due)
+            data["due_local"] = local_iso(due)
+        if self.extra:
+            data.update(self.extra)
+        data["time"] = self.scheduled_time
+        return data
+
+    def content_key(self) -> Tuple:
+        """Return the fields that decide what is sent, where and when (used to match entries without an ID)."""
+        payload = tuple(
+            tuple(value) if isinstance(value, list) else value
+            for value in (getattr(self, field) for field in PAYLOAD_FIELDS[self.type])
+        )
+        return (self.type, self.group_name, self.scheduled_time, self.repeat, self.profile_name, self.batch_id,
+                self.precise, self.timezone) + payload
+
+    def first_due(self) -> Optional[datetime]:
+        """
+        Return when a one-time entry was meant to fire.
+
+        For a time-only value ("HH:MM") this is the first occurrence of that time
+        in the entry's timezone at or after created_at (server local time).
+        """
+        if self.due is not None:
+            return self.due
+        created = parse_scheduled_time(self.created_at)
+        if created is None or not self.scheduled_time:
+            return None
+        created = wall_clock(created.astimezone(), self.tz) if self.tz else created
+        clock = parse_clock_time(self.scheduled_time)
+        if clock is None:
+            return None
+        candidate = datetime.combine(created.date(), clock)
+        return localize(candidate if candidate >= created else candidate + timedelta(days=1), self.tz)
+
+    def set_scheduled_time(self, scheduled_time: str):
+        """Change the scheduled time and re-parse the due datetime."""
+        self.scheduled_time = scheduled_time
+        self.due = localize(parse_scheduled_time(scheduled_time), self.tz)
+
+    def __repr__(self) -> str:
+        return f"ScheduleEntry({self.type!r}, {self.group_name!r}, {self.scheduled_time!r}, repeat={self.repeat!r})"
@@ -1,32 +1,129 @@
 import schedule
 import time
+import math
 import logging
 import json
+import os
+import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Tuple
 import threading
 from whatsapp_bot import WhatsAppBot
+from finished_store import FinishedScheduleStore
+from due_index import DueIndex
+from browser_planner import BrowserPlanner
+from retry_policy import policy_for, DRIVER_CRASH, UNKNOWN
+from send_journal import SendJournal, CONFIRMED, DISPATCHED
+from latency_stats import LatencyStats
+from cron import CronSpec, compile_cron, is_cron
+from clock import SystemClock
+import events
+import metrics
+import tracing
+from timezones import get_zone, next_fire_in_zone
+from selenium.common.exceptions import WebDriverException
+from schedule_entry import ScheduleEntry, WEEKDAYS, PAYLOAD_FIELDS, new_entry_id, parse_scheduled_time, parse_clock_time
+from logging_setup import setup_logging
 
 logger = logging.getLogger(__name__)
 
 
+class VersionConflictError(Exception):
+    """Raised when a change is made against an outdated version of the schedule list."""
+
+
+class EntryBusyError(Exception):
+    """Raised when changing or deleting an entry that is being sent right now."""
+
+
+CATCH_UP_POLICIES = ("immediate", "skip", "grace")
+
+REPEATS = ("once", "daily", "hourly") + WEEKDAYS
+
+# Time-only values as the `schedule` library accepts them for daily timers
+_CLOCK_TIME = re.compile(r"\d{2}:\d{2}(:\d{2})?")
+
+
 class MessageScheduler:
     """Scheduler for WhatsApp messages"""
 
-    def __init__(self, bot: WhatsAppBot):
+    # How each entry type is sent: the bot method and the entry fields passed after the group name
+    _SENDERS = {
+        "message": ("send_message_to_group", lambda e: (e.message,)),
+        "image": ("send_image_to_group", lambda e: (e.image_path, e.caption)),
+        "video": ("send_video_to_group", lambda e: (e.video_path, e.caption)),
+        "poll": ("send_poll_to_group", lambda e: (e.question, e.options, e.allow_multiple)),
+    }
+
+    # Types that can be staged in the composer ahead of time for precise entries (bot method, positional args)
+    _STAGERS = {
+        "message": ("stage_message", lambda e: (e.message,)),
+        "image": ("stage_image", lambda e: (e.image_path, e.caption)),
+        "video": ("stage_video", lambda e: (e.video_path, e.caption)),
+    }
+
+    def __init__(self, bot: WhatsAppBot, data_dir: str = ".", clock=None):
         """
         Initialize the scheduler
 
         Args:
             bot (WhatsAppBot): Instance of WhatsAppBot
+            data_dir (str): Directory for schedules.json, the finished history and the send journal
+            clock: Source of time (defaults to the system clock; simulation.py passes a VirtualClock)
         """
         self.bot = bot
-        self.scheduled_messages = []
+        self.clock = clock or SystemClock()
+        self.scheduled_messages: List[ScheduleEntry] = []
         self._thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
-        self.finished_schedules_file = 'finishedSchedules.json'
-
-    def schedule_message(self, group_name: str, message: str, scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None):
+        self.schedules_file = os.path.join(data_dir, 'schedules.json')
+        self.finished_schedules_file = os.path.join(data_dir, 'finishedSchedules.jsonl')
+        self.finished_store = FinishedScheduleStore(self.finished_schedules_file,
+                                                    legacy_path=os.path.join(data_dir, 'finishedSchedules.json'))
+        # Send-time accuracy of finished occurrences, updated as records are written (GET /stats/latency)
+        self.latency_stats = LatencyStats(os.path.join(data_dir, 'latencyStats.json'))
+        # When set, finished records are handed to this callback instead of the local history (supervised workers)
+        self.on_finished: Optional[Callable[[Dict], None]] = None
+        # Pending entries with an absolute date, sorted by due time
+        self._due_index = DueIndex()
+        # Write-ahead record of every send attempt, so a crash mid-send never leads to a blind re-send
+        self.journal = SendJournal(os.path.join(data_dir, 'sendJournal.jsonl'))
+        # Guards scheduled_messages against the API thread and the scheduler thread mutating it together
+        self._lock = threading.RLock()
+        # Entries whose job is executing right now; diff-apply leaves them alone
+        self._running = set()
+        # Entries by their stable id
+        self._by_id: Dict[str, ScheduleEntry] = {}
+        # Bumped on every change to the schedule list; exposed as the ETag of /schedules. Starts from the
+        # start time in ms so an ETag a browser kept from before a restart never matches the new list
+        self._version = int(time.time() * 1000)
+        # (version, JSON bytes) of the last snapshot_json(), reused until the version changes
+        self._snapshot_json: Optional[Tuple[int, bytes]] = None
+        # What start does with one-time entries whose time passed while the scheduler was not running:
+        # "immediate" sends them all, "skip" marks them missed, "grace" sends those late by at most N minutes
+        self.catch_up_policy = os.environ.get("CATCHUP_POLICY", "grace")
+        self.catch_up_grace_minutes = float(os.environ.get("CATCHUP_GRACE_MINUTES", "15"))
+        # Minimum spacing between catch-up sends so a backlog does not go out in one burst
+        self.catch_up_gap_seconds = float(os.environ.get("CATCHUP_GAP_SECONDS", "20"))
+        # How long before the due time a precise entry opens its chat and stages the content
+        self.precise_stage_seconds = float(os.environ.get("PRECISE_STAGE_SECONDS", "45"))
+        # Staging returns control to the loop; a press job fires this long before the due second and waits
+        # out the rest, which covers the loop's 1s tick and the timer's whole-second rounding
+        self.precise_press_seconds = 3
+        # The precise entry whose content is sitting in the composer, until it is sent or another send uses the browser
+        self._staged: Optional[ScheduleEntry] = None
+        # Learns browser startup time; decides when to pre-warm and whether to close between sends
+        self.browser_planner = BrowserPlanner()
+        self._prewarmed_for: Optional[ScheduleEntry] = None
+        # Only entries firing within this horizon get a live timer job; later ones stay indexed until
+        # the horizon reaches them, so loading many far-future entries creates no jobs
+        self.horizon_seconds = float(os.environ.get("SCHEDULE_HORIZON_HOURS", "24")) * 3600
+        self.horizon_refill_seconds = 60
+        self._armed_until = self.clock.time() + self.horizon_seconds
+        # While not None, due-index additions are collected here and sorted in once (bulk loads)
+        self._index_batch: Optional[List[Tuple]] = None
+
+    def schedule_message(self, group_name: str, message: str, scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None) -> ScheduleEntry:
         """
         Schedule a message to be sent
 
@@ -38,330 +135,643 @@ class MessageScheduler:
             profile_name (str): Chrome profile name to use (optional)
             batch_id (str): Batch ID for multi-group schedules (optional)
         """
-        entry = {
-            "group_name": group_name,
-            "message": message,
-            "scheduled_time": scheduled_time,
-            "repeat": repeat,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "type": "message",
-            "status": "pending",
-            "profile_name": profile_name,
-            "batch_id": batch_id
-        }
+        return self.add_entry(ScheduleEntry(
+            "message", group_name, scheduled_time, repeat,
+            profile_name=profile_name, batch_id=batch_id, message=message
+        ))
 
-        self.scheduled_messages.append(entry)
+    def schedule_image(self, group_name: str, image_path: str, caption: Optional[str], scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None) -> ScheduleEntry:
+        """Schedule an image to be sent."""
+        return self.add_entry(ScheduleEntry(
+            "image", group_name, scheduled_time, repeat,
+            profile_name=profile_name, batch_id=batch_id, image_path=image_path, caption=caption
+        ))
 
-        # Create the job
-        def job():
-            self._ensure_bot_ready(profile_name)
-            logger.info(f"Executing scheduled message to '{group_name}'")
-            success = self.bot.send_message_to_group(group_name, message)
-            if success:
-                logger.info(f"Scheduled message sent successfully to '{group_name}'")
-                try:
-                    entry["status"] = "done"
-                    entry["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                    # Save to finished schedules
-                    self.save_to_finished_schedules(entry)
-
-                    # persist current schedules
-                    self.save_schedules_to_file('schedules.json')
-                    if repeat == "once":
-                        try:
-                            self.scheduled_messages.remove(entry)
-                            self.save_schedules_to_file('schedules.json')
-                        except Exception:
-                            pass
-                except Exception as e:
-                    logger.warning(f"Could not mark schedule as done: {e}")
+    def schedule_video(self, group_name: str, video_path: str, caption: Optional[str], scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None) -> ScheduleEntry:
+        """Schedule a video to be sent."""
+        return self.add_entry(ScheduleEntry(
+            "video", group_name, scheduled_time, repeat,
+            profile_name=profile_name, batch_id=batch_id, video_path=video_path, caption=caption
+        ))
 
-                # Close browser only if no upcoming schedules in same batch
-                try:
-                    if self.bot and self.bot.driver:
-                        if entry.get("batch_id") and self._has_upcoming_schedules(within_minutes=10, batch_id=entry.get("batch_id")):
-                            logger.info(f"Keeping browser open - more schedules in batch {entry.get('batch_id')} coming up soon")
-                        else:
-                            logger.info("Closing browser after successful scheduled job...")
-                            self.bot.close()
-                except Exception as e:
-                    logger.warning(f"Error closing browser after scheduled job: {e}")
+    def schedule_poll(self, group_name: str, question: str, options: List[str], allow_multiple: bool, scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None) -> ScheduleEntry:
+        """Schedule a poll to be sent."""
+        return self.add_entry(ScheduleEntry(
+            "poll", group_name, scheduled_time, repeat,
+            profile_name=profile_name, batch_id=batch_id,
+            question=question, options=options, allow_multiple=allow_multiple
+        ))
+
+    def add_entry(self, entry: ScheduleEntry) -> ScheduleEntry:
+        """
+        Add an entry to the in-memory list, the due-time index and the timer
+
+        Args:
+            entry (ScheduleEntry): The entry to schedule
+
+        Returns:
+            ScheduleEntry: The same entry
+        """
+        with self._lock:
+            if entry.id in self._by_id:
+                entry.id = new_entry_id()
+            # Armed first, so an entry the timer rejects is never listed
+            self._schedule_entry(entry)
+            self.scheduled_messages.append(entry)
+            self._by_id[entry.id] = entry
+            self._index_entry(entry)
+            self.version += 1
+        logger.info("%s scheduled: %s at %s (%s)", entry.type.capitalize(), entry.group_name,
+                    entry.scheduled_time, entry.repeat)
+        return entry
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @version.setter
+    def version(self, value: int):
+        self._version = value
+        events.publish(events.SCHEDULES, version=value, count=len(self.scheduled_messages))
+
+    def _job_event(self, entry: ScheduleEntry, state: str, **data):
+        events.job_event(state, entry.id, entry.type, entry.group_name, entry.profile_name, **data)
+
+    def _run_entry(self, entry: ScheduleEntry):
+        """Send one due entry. Every entry type goes through this single job via the _SENDERS table."""
+        self._running.add(entry)
+        try:
+            with metrics.send_context(entry.profile_name, entry.type), \
+                    tracing.trace(entry.id, "job", type=entry.type, group=entry.group_name,
+                                  profile=entry.profile_name or metrics.NO_PROFILE, repeat=entry.repeat), \
+                    events.job_context(entry.id, entry.type, entry.group_name, entry.profile_name):
+                self._job_event(entry, "started", attempt=len(entry.attempts) + 1)
+                self._send_entry(entry)
+        finally:
+            self._running.discard(entry)
+
+    def _send_entry(self, entry: ScheduleEntry):
+        method_name, get_args = self._SENDERS[entry.type]
+        key = self._occurrence_key(entry)
+        tracing.annotate(occurrence=key)
+        if entry.occurrence_due is None:
+            entry.occurrence_due = self._occurrence_due_ts(entry)
+        fired_ts = self.clock.time()
+        if self.journal.state(key) == CONFIRMED:
+            logger.warning("%s to '%s' (%s) was already sent; not sending again",
+                           entry.type.capitalize(), entry.group_name, key)
+            return
+        self.journal.intent(key, entry.id, entry.group_name, entry.type)
+        failure = None
+        try:
+            if self.bot is not None:
+                self.bot.last_send_clicked_at = None
+                self.bot.last_confirmed_at = None
+                self.bot.last_error = None
+                self.bot.on_send_clicked = lambda: self.journal.dispatched(key)
+            if not self._ensure_bot_ready(entry.profile_name):
+                success = False
             else:
-                logger.error(f"Failed to send scheduled message to '{group_name}'")
-                logger.warning(f"Browser kept open for debugging. Please check WhatsApp Web.")
+                if self._staged is not None and self._staged is not entry:
+                    logger.info("Sending to '%s' clears the content staged for '%s'; it is staged again before its due time",
+                                entry.group_name, self._staged.group_name)
+                    self._staged = None
+                logger.info("Executing scheduled %s to '%s'", entry.type, entry.group_name)
+                if self._is_precise(entry):
+                    success = self._send_precise(entry)
+                else:
+                    success = getattr(self.bot, method_name)(entry.group_name, *get_args(entry))
+                self._record_send_error(entry)
+        except Exception as e:
+            logger.error("Error while sending scheduled %s to '%s': %s", entry.type, entry.group_name, e)
+            success = False
+            failure = DRIVER_CRASH if isinstance(e, WebDriverException) else None
+        finally:
+            if self.bot is not None:
+                self.bot.on_send_clicked = None
+
+        if not success and self.journal.state(key) == DISPATCHED:
+            # Send was pressed before the failure: only retry if the message is provably not in the chat
+            sent = self._verify_sent(entry)
+            if sent is None:
+                logger.error("Send to '%s' was pressed but could not be confirmed; not retrying to avoid a duplicate",
+                             entry.group_name)
+                self.journal.resolved(key, "unconfirmed")
+                self._give_up_unconfirmed(entry)
+                self._job_event(entry, "failed", failure="unconfirmed", will_retry=False)
+                return
+            if sent:
+                logger.info("Send to '%s' reported a failure but the message is in the chat", entry.group_name)
+                success = True
+        if not success:
+            logger.error("Failed to send scheduled %s to '%s'", entry.type, entry.group_name)
+            metrics.count_send("failure")
+            tracing.annotate(result="failure")
+            self.journal.failed(key)
+            self._handle_failure(entry, failure or self._classify_failure())
+            return
 
-        # Schedule using unified helper (supports absolute datetime or time-only)
-        self._schedule_by_repeat(job, repeat, scheduled_time)
+        logger.info("Scheduled %s sent successfully to '%s'", entry.type, entry.group_name)
+        metrics.count_send("success")
+        tracing.annotate(result="success")
 
-        logger.info(f"Message scheduled: {group_name} at {scheduled_time} ({repeat})")
+        # Decide BEFORE removing current entry whether restarting for the next send would cost more than staying open
+        should_close_browser = True
+        try:
+            if self.bot and self.bot.driver:
+                now_ts = self.clock.time()
+                found = self._due_index.next_due(after_ts=now_ts)
+                if found and self.browser_planner.keep_open(self._needed_at(*found), now_ts):
+                    following = found[1]
+                    if entry.batch_id and following.batch_id == entry.batch_id:
+                        logger.info("Keeping browser open - %s more schedules in batch '%s' coming up",
+                                    self.batch_remaining(entry.batch_id), entry.batch_id)
+                    else:
+                        logger.info("Keeping browser open - next schedule in %ds", found[0] - now_ts)
+                    should_close_browser = False
+        except Exception as e:
+            logger.warning("Error checking upcoming schedules: %s", e)
 
-    def schedule_image(self, group_name: str, image_path: str, caption: Optional[str], scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None):
-        """Schedule an image to be sent."""
-        entry = {
-            "type": "image",
-            "group_name": group_name,
-            "image_path": image_path,
-            "caption": caption,
-            "scheduled_time": scheduled_time,
-            "repeat": repeat,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "pending",
-            "profile_name": profile_name,
-            "batch_id": batch_id
-        }
-        self.scheduled_messages.append(entry)
+        timings = self._send_timings(entry, fired_ts)
+        self._mark_done(entry, timings)
+        self.journal.confirmed(key)
+        self._job_event(entry, "done", drift_ms=timings["latency_ms"].get("drift"))
 
-        def job():
-            self._ensure_bot_ready(profile_name)
-            logger.info(f"Executing scheduled image to '{group_name}'")
-            success = self.bot.send_image_to_group(group_name, image_path, caption)
-            if success:
-                logger.info(f"Scheduled image sent successfully to '{group_name}'")
-                try:
-                    entry["status"] = "done"
-                    entry["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                    # Save to finished schedules
-                    self.save_to_finished_schedules(entry)
-
-                    self.save_schedules_to_file('schedules.json')
-                    if repeat == "once":
-                        try:
-                            self.scheduled_messages.remove(entry)
-                            self.save_schedules_to_file('schedules.json')
-                        except Exception:
-                            pass
-                except Exception as e:
-                    logger.warning(f"Could not mark schedule as done: {e}")
+        # Close browser if no upcoming schedules
+        try:
+            if self.bot and self.bot.driver and should_close_browser:
+                logger.info("Closing browser after successful scheduled job...")
+                self.bot.close()
+        except Exception as e:
+            logger.warning("Error closing browser after scheduled job: %s", e)
+
+    def _is_precise(self, entry: ScheduleEntry) -> bool:
+        """Return True if the entry is sent by staging ahead and pressing send at the due time."""
+        return entry.precise and entry.type in self._STAGERS and entry.repeat == "once" and entry.due is not None
+
+    def _needed_at(self, due_ts: float, entry: ScheduleEntry) -> float:
+        """Return when the browser must be ready for an entry due at due_ts (earlier for precise entries)."""
+        return due_ts - self.precise_stage_seconds if self._is_precise(entry) else due_ts
+
+    def _stage(self, entry: ScheduleEntry) -> bool:
+        """Open the entry's chat and put its content into the composer; return True if it is staged."""
+        method_name, get_args = self._STAGERS[entry.type]
+        staged = getattr(self.bot, method_name)(*get_args(entry), group_name=entry.group_name)
+        if staged:
+            logger.info("Staged %s for '%s', sending in %.1fs", entry.type, entry.group_name,
+                        max(0.0, entry.due.timestamp() - self.clock.time()))
+        else:
+            logger.warning("Could not stage %s for '%s'; will send the normal way at the due time",
+                           entry.type, entry.group_name)
+        return bool(staged)
 
-                # Close browser only if no upcoming schedules
-                try:
-                    if self.bot and self.bot.driver:
-                        # Check for upcoming schedules in the same batch first (within 2 minutes for batch jobs)
-                        if batch_id and self._has_upcoming_schedules(within_minutes=2, batch_id=batch_id):
-                            logger.info(f"Keeping browser open - more schedules in batch '{batch_id}' coming up soon")
-                        elif self._has_upcoming_schedules(within_minutes=10):
-                            logger.info("Keeping browser open - more schedules coming up soon")
-                        else:
-                            logger.info("Closing browser after successful scheduled job...")
-                            self.bot.close()
-                except Exception as e:
-                    logger.warning(f"Error closing browser after scheduled job: {e}")
-            else:
-                logger.error(f"Failed to send scheduled image to '{group_name}'")
-                logger.warning(f"Browser kept open for debugging. Please check WhatsApp Web.")
+    def _stage_precise(self, entry: ScheduleEntry):
+        """
+        Stage a precise entry ahead of its due time, then hand the loop back
 
-        self._schedule_by_repeat(job, repeat, scheduled_time)
-        logger.info(f"Image scheduled: {group_name} at {scheduled_time} ({repeat})")
+        The press is a separate job shortly before the due second, so entries
+        due while this one waits are sent on time instead of behind it.
+        """
+        self._running.add(entry)
+        try:
+            with tracing.trace(entry.id, "stage", type=entry.type, group=entry.group_name,
+                               profile=entry.profile_name or metrics.NO_PROFILE):
+                staged = self._ensure_bot_ready(entry.profile_name) and self._stage(entry)
+        except Exception as e:
+            logger.warning("Error while staging %s for '%s': %s", entry.type, entry.group_name, e)
+            staged = False
+        finally:
+            self._running.discard(entry)
+        self._staged = entry if staged else None
+        with self._lock:
+            # Not armed if the entry was deleted or replaced while it was staging
+            if self._by_id.get(entry.id) is entry and entry.job is None:
+                press_at = datetime.fromtimestamp(entry.due.timestamp() - self.precise_press_seconds)
+                entry.job = self._arm_at(press_at, self._run_once, entry)
+
+    @tracing.traced("scheduler.send_precise")
+    def _send_precise(self, entry: ScheduleEntry) -> bool:
+        """Wait for the due second and press send on the staged content (staging it first if it was not, or was lost)."""
+        staged = self._staged is entry or self._stage(entry)
+        self._staged = None
+        self.clock.sleep_until(entry.due.timestamp())
+        if staged:
+            return self.bot.press_send()
+        method_name, get_args = self._SENDERS[entry.type]
+        return getattr(self.bot, method_name)(entry.group_name, *get_args(entry))
+
+    def _record_send_error(self, entry: ScheduleEntry):
+        """Store how far from its due time the send was pressed, in milliseconds, as "send_error_ms"."""
+        clicked = getattr(self.bot, 'last_send_clicked_at', None)
+        if clicked is None or entry.due is None or entry.repeat != "once":
+            return
+        error_ms = round((clicked - entry.due.timestamp()) * 1000)
+        entry.extra = dict(entry.extra or {}, send_error_ms=error_ms)
+        logger.info("Send to '%s' pressed %+d ms from its due time", entry.group_name, error_ms)
+
+    def _occurrence_due_ts(self, entry: ScheduleEntry) -> Optional[float]:
+        """Return when the occurrence of an entry that is firing now was due (None if it has no fixed time)."""
+        if entry.repeat == "once":
+            due = entry.first_due()
+            return due.timestamp() if due else None
+        if entry.job is not None and entry.job.next_run is not None:
+            # Hourly entries run on schedule's own timer, whose next_run is this run until the job returns
+            return entry.job.next_run.timestamp()
+        return self._due_index.due(entry)
+
+    def _send_timings(self, entry: ScheduleEntry, fired_ts: float) -> Dict:
+        """
+        Return the timestamps of a sent occurrence and the time spent in each stage, for its finished record
 
-    def schedule_video(self, group_name: str, video_path: str, caption: Optional[str], scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None):
-        """Schedule a video to be sent."""
-        entry = {
-            "type": "video",
-            "group_name": group_name,
-            "video_path": video_path,
-            "caption": caption,
-            "scheduled_time": scheduled_time,
-            "repeat": repeat,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "pending",
-            "profile_name": profile_name,
-            "batch_id": batch_id
+        Returns:
+            Dict: due_at, fired_at, send_clicked_at, confirmed_at and latency_ms (see latency_stats.STAGES)
+        """
+        due_ts = entry.occurrence_due
+        clicked = getattr(self.bot, 'last_send_clicked_at', None)
+        confirmed = getattr(self.bot, 'last_confirmed_at', None)
+        stamp = lambda ts: datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] if ts is not None else None
+        ms = lambda start, end: round((end - start) * 1000) if start is not None and end is not None else None
+        return {
+            "due_at": stamp(due_ts),
+            "fired_at": stamp(fired_ts),
+            "send_clicked_at": stamp(clicked),
+            "confirmed_at": stamp(confirmed),
+            "latency_ms": {
+                "scheduler": ms(due_ts, fired_ts),
+                "bot": ms(fired_ts, clicked),
+                "confirm": ms(clicked, confirmed),
+                "drift": ms(due_ts, clicked),
+                "total": ms(due_ts, confirmed),
+            },
         }
-        self.scheduled_messages.append(entry)
 
-        def job():
-            self._ensure_bot_ready(profile_name)
-            logger.info(f"Executing scheduled video to '{group_name}'")
-            success = self.bot.send_video_to_group(group_name, video_path, caption)
-            if success:
-                logger.info(f"Scheduled video sent successfully to '{group_name}'")
-                try:
-                    entry["status"] = "done"
-                    entry["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                    # Save to finished schedules
-                    self.save_to_finished_schedules(entry)
-
-                    self.save_schedules_to_file('schedules.json')
-                    if repeat == "once":
-                        try:
-                            self.scheduled_messages.remove(entry)
-                            self.save_schedules_to_file('schedules.json')
-                        except Exception:
-                            pass
-                except Exception as e:
-                    logger.warning(f"Could not mark schedule as done: {e}")
+    def _occurrence_key(self, entry: ScheduleEntry) -> str:
+        """Return the idempotency key of the occurrence of an entry that is being sent (stable across retries)."""
+        if entry.repeat == "once":
+            due = entry.first_due()
+            stamp = due.strftime("%Y-%m-%d %H:%M:%S") if due else entry.created_at
+        else:
+            if entry.occurrence is None:
+                entry.occurrence = self.clock.now().strftime("%Y-%m-%d %H:%M")
+            stamp = entry.occurrence
+        return f"{entry.id}@{stamp}"
+
+    @staticmethod
+    def _expected_text(entry: ScheduleEntry) -> Optional[str]:
+        """Return text that identifies the entry's message in the chat (None if it has none)."""
+        if entry.type == "message":
+            return entry.message
+        if entry.type == "poll":
+            return entry.question
+        return entry.caption
+
+    @tracing.traced("scheduler.verify_sent")
+    def _verify_sent(self, entry: ScheduleEntry) -> Optional[bool]:
+        """
+        Check whether the last outgoing message in the entry's chat is this entry
 
-                # Close browser only if no upcoming schedules
-                try:
-                    if self.bot and self.bot.driver:
-                        # Check for upcoming schedules in the same batch first (within 2 minutes for batch jobs)
-                        if batch_id and self._has_upcoming_schedules(within_minutes=2, batch_id=batch_id):
-                            logger.info(f"Keeping browser open - more schedules in batch '{batch_id}' coming up soon")
-                        elif self._has_upcoming_schedules(within_minutes=10):
-                            logger.info("Keeping browser open - more schedules coming up soon")
-                        else:
-                            logger.info("Closing browser after successful scheduled job...")
-                            self.bot.close()
-                except Exception as e:
-                    logger.warning(f"Error closing browser after scheduled job: {e}")
+        Returns:
+            Optional[bool]: True if found, False if the chat shows something else, None if it cannot be told
+        """
+        expected = self._expected_text(entry)
+        if not expected or self.bot is None:
+            return None
+        try:
+            if not self._ensure_bot_ready(entry.profile_name):
+                return None
+            text = self.bot.last_outgoing_text(entry.group_name)
+        except Exception as e:
+            logger.warning("Could not check the last message in '%s': %s", entry.group_name, e)
+            return None
+        if text is None:
+            return None
+        normalize = lambda value: " ".join(value.split())
+        return normalize(expected)[:60] in normalize(text)
+
+    def _give_up_unconfirmed(self, entry: ScheduleEntry):
+        """Stop sending an occurrence whose send was pressed but cannot be confirmed."""
+        with self._lock:
+            if entry.repeat == "once":
+                self._retire(entry, "unconfirmed")
             else:
-                logger.error(f"Failed to send scheduled video to '{group_name}'")
-                logger.warning(f"Browser kept open for debugging. Please check WhatsApp Web.")
-
-        self._schedule_by_repeat(job, repeat, scheduled_time)
-        logger.info(f"Video scheduled: {group_name} at {scheduled_time} ({repeat})")
+                entry.attempts = []
+                entry.occurrence = None
+                entry.occurrence_due = None
+            self.version += 1
+            self.save_schedules_to_file(self.schedules_file)
 
-    def schedule_poll(self, group_name: str, question: str, options: List[str], allow_multiple: bool, scheduled_time: str, repeat: str = "once", profile_name: str = None, batch_id: str = None):
-        """Schedule a poll to be sent."""
-        entry = {
-            "type": "poll",
-            "group_name": group_name,
-            "question": question,
-            "options": options,
-            "allow_multiple": allow_multiple,
-            "scheduled_time": scheduled_time,
-            "repeat": repeat,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "pending",
-            "profile_name": profile_name,
-            "batch_id": batch_id
-        }
-        self.scheduled_messages.append(entry)
+    def reconcile(self) -> Dict:
+        """
+        Settle sends left unfinished in the send journal by a crash or restart
 
-        def job():
-            self._ensure_bot_ready(profile_name)
-            logger.info(f"Executing scheduled poll to '{group_name}'")
-            success = self.bot.send_poll_to_group(group_name, question, options, allow_multiple)
-            if success:
-                logger.info(f"Scheduled poll sent successfully to '{group_name}'")
-
-                # Check for upcoming schedules BEFORE removing current entry
-                should_close_browser = True
-                try:
-                    if self.bot and self.bot.driver:
-                        # Check for upcoming schedules in the same batch first (within 2 minutes for batch jobs)
-                        if batch_id and self._has_upcoming_schedules(within_minutes=2, batch_id=batch_id):
-                            logger.info(f"Keeping browser open - more schedules in batch '{batch_id}' coming up soon")
-                            should_close_browser = False
-                        elif self._has_upcoming_schedules(within_minutes=10):
-                            logger.info("Keeping browser open - more schedules coming up soon")
-                            should_close_browser = False
-                except Exception as e:
-                    logger.warning(f"Error checking upcoming schedules: {e}")
+        An occurrence that never got to pressing send is simply left pending. One
+        whose send was pressed is checked against the chat's last outgoing message:
+        if it is there the entry is marked done, if the chat shows something else
+        it is left pending, and if it cannot be told it is not sent again.
 
-                # Now mark as done and remove
-                try:
-                    entry["status"] = "done"
-                    entry["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                    # Save to finished schedules
-                    self.save_to_finished_schedules(entry)
-
-                    self.save_schedules_to_file('schedules.json')
-                    if repeat == "once":
-                        try:
-                            self.scheduled_messages.remove(entry)
-                            self.save_schedules_to_file('schedules.json')
-                        except Exception:
-                            pass
-                except Exception as e:
-                    logger.warning(f"Could not mark schedule as done: {e}")
-
-                # Close browser if no upcoming schedules
-                try:
-                    if self.bot and self.bot.driver and should_close_browser:
-                        logger.info("Closing browser after successful scheduled job...")
-                        self.bot.close()
-                except Exception as e:
-                    logger.warning(f"Error closing browser after scheduled job: {e}")
+        Returns:
+            Dict: How many open occurrences were confirmed, re-queued or left unconfirmed
+        """
+        summary = {"confirmed": 0, "requeued": 0, "unconfirmed": 0}
+        for record in self.journal.open_records():
+            key = record["key"]
+            entry = self._by_id.get(record.get("entry_id"))
+            # A repeating entry stays "done" after its first success, so only a finished one-time entry is gone
+            if entry is None or (entry.repeat == "once" and entry.status == "done"):
+                self.journal.resolved(key, "entry_gone")
+                continue
+            if record["state"] != DISPATCHED:
+                self.journal.resolved(key, "not_sent")
+                summary["requeued"] += 1
+                continue
+            sent = self._verify_sent(entry)
+            if sent:
+                logger.info("Reconciled: %s to '%s' was sent before the restart", entry.type, entry.group_name)
+                entry.extra = dict(entry.extra or {}, reconciled=True)
+                self._mark_done(entry)
+                self.journal.confirmed(key)
+                summary["confirmed"] += 1
+            elif sent is False:
+                logger.info("Reconciled: %s to '%s' is not in the chat; it will be sent", entry.type, entry.group_name)
+                self.journal.resolved(key, "not_sent")
+                summary["requeued"] += 1
             else:
-                logger.error(f"Failed to send scheduled poll to '{group_name}'")
-                logger.warning(f"Browser kept open for debugging. Please check WhatsApp Web.")
-
-        self._schedule_by_repeat(job, repeat, scheduled_time)
-        logger.info(f"Poll scheduled: {group_name} at {scheduled_time} ({repeat})")
-
-    def _schedule_by_repeat(self, job: Callable[[], None], repeat: str, scheduled_time: str):
-        # Support absolute datetime strings like "2025-10-29 15:30" (or with seconds)
-        absolute_dt: Optional[datetime] = None
-        time_only: Optional[str] = None
-        if scheduled_time:
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                try:
-                    absolute_dt = datetime.strptime(scheduled_time, fmt)
-                    break
-                except ValueError:
-                    continue
-            if absolute_dt is None:
-                # treat as time-only
-                time_only = scheduled_time
+                logger.warning("Reconciled: cannot tell whether %s to '%s' was sent; not re-sending",
+                               entry.type, entry.group_name)
+                self.journal.resolved(key, "unconfirmed")
+                self._give_up_unconfirmed(entry)
+                summary["unconfirmed"] += 1
+        if any(summary.values()):
+            logger.info("Send journal reconciled: %s", summary)
+        return summary
+
+    def _run_once(self, entry: ScheduleEntry):
+        """Run a one-time entry and remove its timer job afterwards (a precise one is staged first, see _stage_precise)."""
+        entry.job = None
+        if self._is_precise(entry) and self._staged is not entry \
+                and entry.due.timestamp() - self.clock.time() > self.precise_press_seconds:
+            self._stage_precise(entry)
+        else:
+            self._run_entry(entry)
+        return schedule.CancelJob
+
+    def _run_retry(self, entry: ScheduleEntry):
+        """Run a retry of a failed send; the timer job is one-shot."""
+        entry.retry_job = None
+        self._run_entry(entry)
+        return schedule.CancelJob
+
+    def _classify_failure(self) -> str:
+        """Return the failure class of the last failed send (see retry_policy)."""
+        if self.bot is None:
+            return UNKNOWN
+        if getattr(self.bot, 'last_error', None):
+            return self.bot.last_error
+        try:
+            if self.bot.driver is not None:
+                _ = self.bot.driver.current_url  # raises if Chrome is gone
+        except Exception:
+            return DRIVER_CRASH
+        return UNKNOWN
+
+    def _handle_failure(self, entry: ScheduleEntry, failure: str):
+        """Record a failed attempt on the entry and re-arm it with backoff, or give up per its retry policy."""
+        policy = policy_for(failure)
+        with self._lock:
+            entry.attempts.append({"at": self.clock.now().strftime("%Y-%m-%d %H:%M:%S"), "error": failure})
+            attempts = len(entry.attempts)
+            if policy.should_retry(attempts):
+                delay = policy.delay(attempts)
+                retry_at = self.clock.now() + timedelta(seconds=delay)
+                entry.retry_job = self._arm_at(retry_at, self._run_retry, entry)
+                # Index at the retry time so pre-warm and keep-open see it
+                self._index_add(entry, retry_at.timestamp())
+                metrics.count_retry(failure)
+                logger.warning("Send to '%s' failed (%s), attempt %d/%d; retrying in %ds",
+                               entry.group_name, failure, attempts, policy.max_attempts, delay)
+                self._job_event(entry, "failed", failure=failure, attempt=attempts, will_retry=True)
+                self._job_event(entry, "queued", reason="retry", at=retry_at.strftime("%Y-%m-%d %H:%M:%S"))
+            elif entry.repeat == "once":
+                logger.error("Send to '%s' failed (%s) after %d attempt(s); giving up", entry.group_name, failure, attempts)
+                self._job_event(entry, "failed", failure=failure, attempt=attempts, will_retry=False)
+                self._retire(entry, "failed")
+            else:
+                logger.error("Send to '%s' failed (%s) after %d attempt(s); waiting for the next %s run",
+                             entry.group_name, failure, attempts, entry.repeat)
+                self._job_event(entry, "failed", failure=failure, attempt=attempts, will_retry=False)
+                entry.attempts = []
+                entry.occurrence = None
+                entry.occurrence_due = None
+            self.version += 1
+            self.save_schedules_to_file(self.schedules_file)
+        if failure != DRIVER_CRASH:
+            logger.warning("Browser kept open for debugging. Please check WhatsApp Web.")
+
+    def _retire(self, entry: ScheduleEntry, status: str):
+        """Record an entry that will not be sent in the finished history with the given status and drop it (caller persists)."""
+        entry.status = status
+        entry.completed_at = self.clock.now().strftime("%Y-%m-%d %H:%M:%S")
+        # Reconciliation can retire an entry whose timer is still armed (e.g. due in the current minute)
+        self._cancel_entry(entry)
+        self.save_to_finished_schedules(entry.to_dict())
+        self._forget(entry)
+
+    @tracing.traced("scheduler.mark_done")
+    def _mark_done(self, entry: ScheduleEntry, timings: Optional[Dict] = None):
+        """Record a successful send: history (with the send timings, if measured), status, and removal of one-time entries."""
+        try:
+            entry.status = "done"
+            entry.completed_at = self.clock.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            # Save to finished schedules
+            record = entry.to_dict()
+            if timings:
+                record.update(timings)
+            self.save_to_finished_schedules(record)
+
+            with self._lock:
+                if entry.repeat == "once":
+                    self._cancel_entry(entry)
+                    self._forget(entry)
+                else:
+                    # The index slot is kept: after a retry it already holds the next occurrence, which
+                    # may be past the horizon and so have no timer job yet
+                    entry.attempts = []
+                    entry.occurrence = None
+                    entry.occurrence_due = None
+                self.version += 1
+                # persist current schedules
+                self.save_schedules_to_file(self.schedules_file)
+        except Exception as e:
+            logger.warning("Could not mark schedule as done: %s", e)
+
+    def _schedule_entry(self, entry: ScheduleEntry):
+        """Create the timer job for an entry according to its repeat rule."""
+        repeat = entry.repeat
+        if repeat not in ("once", "daily", "hourly") and repeat not in WEEKDAYS and not is_cron(repeat):
+            logger.warning("Unknown repeat type: %s. Defaulting to 'once'", repeat)
+            repeat = "once"
 
         if repeat == "once":
-            if absolute_dt is not None:
-                # Normalize both times to ignore seconds for comparison
-                absolute_dt_normalized = absolute_dt.replace(second=0, microsecond=0)
-                now_normalized = datetime.now().replace(second=0, microsecond=0)
-                delta = (absolute_dt_normalized - now_normalized)
-                delay_seconds = int(delta.total_seconds())
-
-                # Allow schedules in the current minute (delay_seconds == 0) to run immediately
-                if delay_seconds < 0:
-                    logger.warning(f"Scheduled time {absolute_dt} is in the past; skipping job")
-                    return
-
-                job_ref = None
-                def wrapper():
-                    nonlocal job_ref
-                    job()
-                    try:
-                        schedule.cancel_job(job_ref)  # type: ignore
-                    except Exception:
-                        pass
-
-                # If delay is 0 (current minute), run immediately
-                if delay_seconds == 0:
-                    logger.info(f"Schedule for {absolute_dt} is in current minute ({datetime.now()}), running immediately")
-                    # Schedule to run in the next second to ensure bot is ready
-                    job_ref = schedule.every(1).seconds.do(wrapper).tag(f"once-{len(self.scheduled_messages)}")
-                else:
-                    job_ref = schedule.every(delay_seconds).seconds.do(wrapper).tag(f"once-{len(self.scheduled_messages)}")
-            else:
-                job_ref = None
-                def wrapper():
-                    nonlocal job_ref
-                    job()
-                    try:
-                        schedule.cancel_job(job_ref)  # type: ignore
-                    except Exception:
-                        pass
-                job_ref = schedule.every().day.at(time_only or scheduled_time).do(wrapper).tag(f"once-{len(self.scheduled_messages)}")
-        elif repeat == "daily":
-            schedule.every().day.at((absolute_dt.strftime("%H:%M:%S") if absolute_dt else (time_only or scheduled_time))).do(job)
+            if entry.status == "done":
+                return
+            due = entry.first_due()
+            # Compare whole minutes so a schedule for the current minute still runs
+            now_ts = self.clock.time()
+            if due is not None and due.timestamp() // 60 < now_ts // 60:
+                logger.warning("Scheduled time %s is in the past; left for the catch-up pass on scheduler start", due)
+                return
+            if entry.due is None and entry.tz is None:
+                entry.job = schedule.every().day.at(entry.scheduled_time).do(self._run_once, entry)
+                return
+            if due is None:
+                logger.warning("Invalid time '%s' for '%s'; not scheduled", entry.scheduled_time, entry.group_name)
+                return
+            if due.timestamp() <= now_ts:
+                logger.info("Schedule for %s is in current minute, running immediately", due)
+            # Time-only entries in a timezone are not indexed, so they are always armed
+            if entry.due is None or due.timestamp() <= self._armed_until:
+                self._arm_indexed(entry, due.timestamp())
         elif repeat == "hourly":
-            schedule.every().hour.do(job)
-        elif repeat in ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]:
-            getattr(schedule.every(), repeat).at((absolute_dt.strftime("%H:%M:%S") if absolute_dt else (time_only or scheduled_time))).do(job)
+            entry.job = schedule.every().hour.do(self._run_entry, entry)
         else:
-            logger.warning(f"Unknown repeat type: {repeat}. Defaulting to 'once'")
-            if absolute_dt is not None:
-                # Normalize both times to ignore seconds for comparison
-                absolute_dt_normalized = absolute_dt.replace(second=0, microsecond=0)
-                now_normalized = datetime.now().replace(second=0, microsecond=0)
-                delta = (absolute_dt_normalized - now_normalized)
-                delay_seconds = int(delta.total_seconds())
-                if delay_seconds < 0:
-                    logger.warning(f"Scheduled time {absolute_dt} is in the past; skipping job")
-                elif delay_seconds == 0:
-                    # Run in next second if in current minute
-                    logger.info(f"Schedule for {absolute_dt} is in current minute ({datetime.now()}), scheduling for immediate execution")
-                    schedule.every(1).seconds.do(job).tag(f"once-{len(self.scheduled_messages)}")
-                else:
-                    schedule.every(delay_seconds).seconds.do(job).tag(f"once-{len(self.scheduled_messages)}")
-            else:
-                schedule.every().day.at(time_only or scheduled_time).do(job).tag(f"once-{len(self.scheduled_messages)}")
+            # daily, weekday names and cron expressions: armed one occurrence at a time from the compiled rule
+            try:
+                self._arm_next_cron(entry, self.clock.now())
+            except ValueError as e:
+                logger.error("Invalid repeat '%s' for '%s': %s", repeat, entry.group_name, e)
+
+    def _cron_for(self, entry: ScheduleEntry) -> CronSpec:
+        """Return the compiled rule of a daily, weekday or cron entry (raises ValueError if it is invalid)."""
+        if is_cron(entry.repeat):
+            return compile_cron(entry.repeat)
+        at_time = entry.due.strftime("%H:%M:%S") if entry.due else (entry.scheduled_time or "")
+        parts = at_time.split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Invalid time '{at_time}'")
+        hour, minute = int(parts[0]), int(parts[1])
+        second = int(parts[2]) if len(parts) == 3 else 0
+        weekday = "*" if entry.repeat == "daily" else entry.repeat[:3]
+        return compile_cron(f"{minute} {hour} * * {weekday}", second)
+
+    def _arm_next_cron(self, entry: ScheduleEntry, after: datetime):
+        """Arm a rule-based entry for its first occurrence after `after` (on its zone's wall clock) and index that time."""
+        next_fire = next_fire_in_zone(self._cron_for(entry), entry.tz, after.timestamp())
+        if next_fire is None:
+            logger.warning("Repeat '%s' for '%s' never fires; not scheduled", entry.repeat, entry.group_name)
+            return
+        if next_fire.timestamp() <= self._armed_until:
+            self._arm_indexed(entry, next_fire.timestamp())
+        self._index_add(entry, next_fire.timestamp())
+
+    def _run_cron(self, entry: ScheduleEntry):
+        """Run one occurrence of a rule-based entry, then arm the next one."""
+        entry.job = None
+        self._run_entry(entry)
+        with self._lock:
+            # Not re-armed if the entry was deleted or replaced while it was sending
+            if self._by_id.get(entry.id) is entry and entry.job is None:
+                self._arm_next_cron(entry, self.clock.now())
+        return schedule.CancelJob
+
+    def _check_repeat(self, entry: ScheduleEntry):
+        """Raise ValueError if the entry's timezone is unknown or its repeat rule cannot be compiled."""
+        if entry.timezone:
+            get_zone(entry.timezone)
+        if entry.repeat == "daily" or entry.repeat in WEEKDAYS or is_cron(entry.repeat):
+            self._cron_for(entry)
+
+    def _checked(self, data: Dict) -> ScheduleEntry:
+        """
+        Build an entry from an API or schedules.json dict, checking that it can be scheduled
+
+        Args:
+            data (Dict): Entry dict
+
+        Returns:
+            ScheduleEntry: The parsed entry
+
+        Raises:
+            ValueError: The type, group name, time, repeat rule or timezone is missing or invalid
+        """
+        if not isinstance(data, dict):
+            raise ValueError("A schedule entry must be an object")
+        typ = data.get("type", "message")
+        if typ not in PAYLOAD_FIELDS:
+            raise ValueError(f"Unknown type: {typ!r}")
+        group_name = data.get("group_name")
+        if not isinstance(group_name, str) or not group_name.strip():
+            raise ValueError("group_name is required")
+        scheduled_time = data.get("time") or data.get("scheduled_time")
+        if not isinstance(scheduled_time, str) or (parse_scheduled_time(scheduled_time) is None and not (
+                _CLOCK_TIME.fullmatch(scheduled_time) and parse_clock_time(scheduled_time))):
+            raise ValueError(f"Invalid time {scheduled_time!r}; use HH:MM or YYYY-MM-DD HH:MM")
+        repeat = data.get("repeat") or "once"
+        if not isinstance(repeat, str) or (repeat not in REPEATS and not is_cron(repeat)):
+            raise ValueError(f"Unknown repeat: {repeat!r}")
+        if not isinstance(data.get("timezone") or "", str):
+            raise ValueError(f"Invalid timezone: {data['timezone']!r}")
+        try:
+            entry = ScheduleEntry.from_dict(data)
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"Malformed entry: {e}") from None
+        self._check_repeat(entry)
+        return entry
+
+    def _arm_at(self, when: datetime, func: Callable, *args) -> schedule.Job:
+        """
+        Run func(*args) once at the given time (or in a second if it has passed).
+
+        func should return schedule.CancelJob so the timer does not repeat.
+        """
+        delay_seconds = max(1, math.ceil(when.timestamp() - self.clock.time()))
+        return schedule.every(delay_seconds).seconds.do(func, *args)
+
+    def _arm_indexed(self, entry: ScheduleEntry, due_ts: float):
+        """Create the timer job of a one-time or rule-based entry for its indexed fire time."""
+        if entry.repeat == "once":
+            entry.job = self._arm_at(datetime.fromtimestamp(self._needed_at(due_ts, entry)), self._run_once, entry)
+        else:
+            entry.job = self._arm_at(datetime.fromtimestamp(due_ts), self._run_cron, entry)
+
+    def _refill_horizon(self):
+        """Arm the indexed entries the sliding horizon has reached since the last refill."""
+        armed_until = self.clock.time() + self.horizon_seconds
+        if armed_until - self._armed_until < self.horizon_refill_seconds:
+            return
+        with self._lock:
+            armed = 0
+            for due_ts, entry in self._due_index.between(self._armed_until, armed_until):
+                if entry.job is None and entry.retry_job is None and entry not in self._running:
+                    self._arm_indexed(entry, due_ts)
+                    armed += 1
+            self._armed_until = armed_until
+        if armed:
+            logger.info("Armed %s schedules entering the %gh horizon", armed, self.horizon_seconds / 3600)
+
+    def _cancel_entry(self, entry: ScheduleEntry):
+        """Remove an entry's timer and retry jobs and due-time index slot (the entry stays wherever it is listed)."""
+        if entry.job is not None:
+            schedule.cancel_job(entry.job)
+            entry.job = None
+        if entry.retry_job is not None:
+            schedule.cancel_job(entry.retry_job)
+            entry.retry_job = None
+        self._due_index.discard(entry)
+        if self._staged is entry:
+            self._staged = None
+
+    def _index_entry(self, entry: ScheduleEntry):
+        """Add a pending one-time entry with an absolute date to the due-time index (rule-based entries index their next fire)."""
+        if entry.repeat == "once" and entry.status != "done" and entry.due is not None:
+            self._index_add(entry, entry.due.timestamp())
+
+    def _index_add(self, entry: ScheduleEntry, due_ts: float):
+        """Index an entry at a fire time (collected and sorted in at the end during a bulk load)."""
+        if self._index_batch is not None:
+            self._index_batch.append((entry, due_ts, entry.batch_id, None))
+        else:
+            self._due_index.add(entry, due_ts, entry.batch_id)
 
     def add_immediate_message(self, group_name: str, message: str, delay_seconds: int = 0):
         """
@@ -373,12 +783,12 @@ class MessageScheduler:
             delay_seconds (int): Delay before sending (in seconds)
         """
         def job():
-            logger.info(f"Sending immediate message to '{group_name}'")
+            logger.info("Sending immediate message to '%s'", group_name)
             self.bot.send_message_to_group(group_name, message)
 
         if delay_seconds > 0:
             schedule.every(delay_seconds).seconds.do(job).tag("immediate")
-            logger.info(f"Immediate message scheduled with {delay_seconds}s delay to '{group_name}'")
+            logger.info("Immediate message scheduled with %ss delay to '%s'", delay_seconds, group_name)
         else:
             job()
 
@@ -394,60 +804,18 @@ class MessageScheduler:
                 schedules = json.load(f)
 
             if replace:
-                # Clear in-memory list and pending jobs
-                self.clear_all()
-
-            for schedule_data in schedules:
-                typ = schedule_data.get("type", "message")
-                profile_name = schedule_data.get("profile_name")
-                batch_id = schedule_data.get("batch_id")
-                if typ == "image":
-                    self.schedule_image(
-                        group_name=schedule_data.get("group_name"),
-                        image_path=schedule_data.get("image_path"),
-                        caption=schedule_data.get("caption"),
-                        scheduled_time=schedule_data.get("time") or schedule_data.get("scheduled_time"),
-                        repeat=schedule_data.get("repeat", "once"),
-                        profile_name=profile_name,
-                        batch_id=batch_id
-                    )
-                elif typ == "video":
-                    self.schedule_video(
-                        group_name=schedule_data.get("group_name"),
-                        video_path=schedule_data.get("video_path"),
-                        caption=schedule_data.get("caption"),
-                        scheduled_time=schedule_data.get("time") or schedule_data.get("scheduled_time"),
-                        repeat=schedule_data.get("repeat", "once"),
-                        profile_name=profile_name,
-                        batch_id=batch_id
-                    )
-                elif typ == "poll":
-                    self.schedule_poll(
-                        group_name=schedule_data.get("group_name"),
-                        question=schedule_data.get("question"),
-                        options=schedule_data.get("options", []),
-                        allow_multiple=bool(schedule_data.get("allow_multiple", False)),
-                        scheduled_time=schedule_data.get("time") or schedule_data.get("scheduled_time"),
-                        repeat=schedule_data.get("repeat", "once"),
-                        profile_name=profile_name,
-                        batch_id=batch_id
-                    )
-                else:
-                    self.schedule_message(
-                        group_name=schedule_data.get("group_name"),
-                        message=schedule_data.get("message"),
-                        scheduled_time=schedule_data.get("time") or schedule_data.get("scheduled_time"),
-                        repeat=schedule_data.get("repeat", "once"),
-                        profile_name=profile_name,
-                        batch_id=batch_id
-                    )
+                # Diff against the in-memory list so unchanged jobs keep running
+                self.reset_with_entries(schedules, skip_invalid=True)
+            else:
+                for _, entry in self._parse_entries(schedules, skip_invalid=True):
+                    self.add_entry(entry)
 
-            logger.info(f"Loaded {len(schedules)} scheduled messages from {file_path}")
+            logger.info("Loaded %s scheduled messages from %s", len(schedules), file_path)
 
         except FileNotFoundError:
-            logger.warning(f"Schedule file not found: {file_path}")
+            logger.warning("Schedule file not found: %s", file_path)
         except json.JSONDecodeError as e:
-            logger.error(f"Error parsing JSON from {file_path}: {str(e)}")
+            logger.error("Error parsing JSON from %s: %s", file_path, e)
 
     def save_schedules_to_file(self, file_path: str):
         """
@@ -457,103 +825,97 @@ class MessageScheduler:
             file_path (str): Path to save the JSON file
         """
         try:
-            # Ensure a stable schema
-            normalized: List[Dict] = []
-            for entry in self.scheduled_messages:
-                e = dict(entry)
-                # unify time key
-                if 'scheduled_time' in e and 'time' not in e:
-                    e['time'] = e['scheduled_time']
-                normalized.append(e)
+            # to_dict() writes a stable schema with both "scheduled_time" and "time"
+            with self._lock:
+                normalized: List[Dict] = [entry.to_dict() for entry in self.scheduled_messages]
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(normalized, f, indent=2, ensure_ascii=False)
 
-            logger.info(f"Saved {len(self.scheduled_messages)} scheduled messages to {file_path}")
+            logger.info("Saved %s scheduled messages to %s", len(self.scheduled_messages), file_path)
 
         except Exception as e:
-            logger.error(f"Error saving schedules to {file_path}: {str(e)}")
+            logger.error("Error saving schedules to %s: %s", file_path, e)
 
-    def save_to_finished_schedules(self, entry: Dict):
+    def save_to_finished_schedules(self, entry: Dict) -> Optional[int]:
         """
-        Save a completed schedule to the finished schedules file
+        Append a completed schedule to the finished schedules history
 
         Args:
             entry (Dict): The completed schedule entry
+
+        Returns:
+            Optional[int]: The record ID of the stored entry, or None on failure
         """
         try:
-            # Load existing finished schedules
-            finished_schedules = []
-            try:
-                with open(self.finished_schedules_file, 'r', encoding='utf-8') as f:
-                    finished_schedules = json.load(f)
-            except FileNotFoundError:
-                pass  # File doesn't exist yet, that's fine
-
-            # Add the new finished schedule
             finished_entry = dict(entry)
             # Ensure it has the time key
             if 'scheduled_time' in finished_entry and 'time' not in finished_entry:
                 finished_entry['time'] = finished_entry['scheduled_time']
 
-            finished_schedules.append(finished_entry)
+            if self.on_finished is not None:
+                self.on_finished(finished_entry)
+                return None
 
-            # Save back to file
-            with open(self.finished_schedules_file, 'w', encoding='utf-8') as f:
-                json.dump(finished_schedules, f, indent=2, ensure_ascii=False)
-
-            logger.info(f"Saved finished schedule to {self.finished_schedules_file}")
+            record_id = self.finished_store.append(finished_entry)
+            logger.info("Saved finished schedule #%s to %s", record_id, self.finished_schedules_file)
+            self.latency_stats.record(finished_entry)
+            return record_id
 
         except Exception as e:
-            logger.error(f"Error saving to finished schedules: {str(e)}")
+            logger.error("Error saving to finished schedules: %s", e)
+            return None
 
-    def get_finished_schedules(self) -> List[Dict]:
+    def get_finished_schedules(self, limit: int = 50, cursor: Optional[int] = None, filters: Optional[Dict] = None,
+                               since: Optional[str] = None, until: Optional[str] = None, text: Optional[str] = None) -> Dict:
         """
-        Get all finished schedules, ordered by latest first
+        Get one page of finished schedules, newest first
+
+        Args:
+            limit (int): Maximum number of schedules to return
+            cursor (int): Only return schedules older than this record ID (optional)
+            filters (Dict): Exact matches on group_name, type, batch_id, status or profile_name (optional)
+            since (str): Only schedules completed at or after this time, e.g. "2025-11-04" (optional)
+            until (str): Only schedules completed at or before this time or date (optional)
+            text (str): Words to search for in the message, caption, poll question or options (optional)
 
         Returns:
-            List[Dict]: List of finished schedules (newest first)
+            Dict: {"items": [...], "next_cursor": int or None, "total": int}
         """
         try:
-            with open(self.finished_schedules_file, 'r', encoding='utf-8') as f:
-                schedules = json.load(f)
-                # Sort by completed_at timestamp, newest first
-                schedules.sort(key=lambda x: x.get('completed_at', ''), reverse=True)
-                return schedules
-        except FileNotFoundError:
-            return []
+            items, next_cursor, total = self.finished_store.query(
+                filters=filters, since=since, until=until, text=text, limit=limit, cursor=cursor
+            )
+            return {"items": items, "next_cursor": next_cursor, "total": total}
         except Exception as e:
-            logger.error(f"Error reading finished schedules: {str(e)}")
-            return []
+            logger.error("Error reading finished schedules: %s", e)
+            return {"items": [], "next_cursor": None, "total": 0}
+
+    def count_finished_schedules(self, filters: Optional[Dict] = None, since: Optional[str] = None,
+                                 until: Optional[str] = None, text: Optional[str] = None) -> int:
+        """Count finished schedules matching the same filters as get_finished_schedules."""
+        _, _, total = self.finished_store.query(filters=filters, since=since, until=until, text=text, limit=0)
+        return total
 
-    def delete_finished_schedule(self, index: int) -> bool:
+    def delete_finished_schedule(self, record_id: int) -> bool:
         """
-        Delete a finished schedule by index
+        Delete a finished schedule by record ID
 
         Args:
-            index (int): Index of the schedule to delete
+            record_id (int): Stable record ID of the schedule to delete
 
         Returns:
             bool: True if deleted successfully, False otherwise
         """
         try:
-            finished_schedules = self.get_finished_schedules()
-
-            if index < 0 or index >= len(finished_schedules):
-                logger.error(f"Invalid index {index} for finished schedules")
+            if not self.finished_store.delete(record_id):
+                logger.error("Finished schedule #%s not found", record_id)
                 return False
 
-            # Remove the schedule at the specified index
-            deleted_schedule = finished_schedules.pop(index)
-
-            # Save back to file
-            with open(self.finished_schedules_file, 'w', encoding='utf-8') as f:
-                json.dump(finished_schedules, f, indent=2, ensure_ascii=False)
-
-            logger.info(f"Deleted finished schedule at index {index}: {deleted_schedule.get('group_name', 'Unknown')}")
+            logger.info("Deleted finished schedule #%s", record_id)
             return True
 
         except Exception as e:
-            logger.error(f"Error deleting finished schedule: {str(e)}")
+            logger.error("Error deleting finished schedule: %s", e)
             return False
 
     def clear_all_finished_schedules(self) -> bool:
@@ -564,14 +926,14 @@ class MessageScheduler:
             bool: True if cleared successfully, False otherwise
         """
         try:
-            with open(self.finished_schedules_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, indent=2, ensure_ascii=False)
+            self.finished_store.clear()
+            self.latency_stats.reset()
 
             logger.info("Cleared all finished schedules")
             return True
 
         except Exception as e:
-            logger.error(f"Error clearing finished schedules: {str(e)}")
+            logger.error("Error clearing finished schedules: %s", e)
             return False
 
     def clear_all(self):
@@ -580,50 +942,396 @@ class MessageScheduler:
             schedule.clear()
         except Exception:
             pass
-        self.scheduled_messages = []
-
-    def reset_with_entries(self, entries: List[Dict]):
-        """Replace all scheduled entries with the provided list and reschedule."""
-        self.clear_all()
-        for data in entries:
-            typ = data.get("type", "message")
-            batch_id = data.get("batch_id")
-            if typ == "image":
-                self.schedule_image(
-                    group_name=data.get("group_name"),
-                    image_path=data.get("image_path"),
-                    caption=data.get("caption"),
-                    scheduled_time=data.get("time") or data.get("scheduled_time"),
-                    repeat=data.get("repeat", "once"),
-                    batch_id=batch_id
-                )
-            elif typ == "video":
-                self.schedule_video(
-                    group_name=data.get("group_name"),
-                    video_path=data.get("video_path"),
-                    caption=data.get("caption"),
-                    scheduled_time=data.get("time") or data.get("scheduled_time"),
-                    repeat=data.get("repeat", "once"),
-                    batch_id=batch_id
-                )
-            elif typ == "poll":
-                self.schedule_poll(
-                    group_name=data.get("group_name"),
-                    question=data.get("question"),
-                    options=data.get("options", []),
-                    allow_multiple=bool(data.get("allow_multiple", False)),
-                    scheduled_time=data.get("time") or data.get("scheduled_time"),
-                    repeat=data.get("repeat", "once"),
-                    batch_id=batch_id
-                )
+        with self._lock:
+            self.scheduled_messages = []
+            self._by_id = {}
+            self._due_index.clear()
+            self.version += 1
+
+    def reset_with_entries(self, entries: List[Dict], skip_invalid: bool = False) -> Dict[str, int]:
+        """
+        Make the scheduled entries match the provided list, touching only what changed.
+
+        Incoming entries are matched to existing ones by "id", or by content when
+        they have no known id. Unchanged entries keep their timer job, changed
+        ones are rescheduled, missing ones are cancelled and unmatched ones are
+        created. Entries that are executing right now are never cancelled or
+        replaced. Every entry is validated before anything is changed.
+
+        Args:
+            entries (List[Dict]): The complete desired list of entries
+            skip_invalid (bool): Log and leave out entries that cannot be scheduled instead of raising
+
+        Returns:
+            Dict[str, int]: Counts of created, updated, deleted and unchanged entries
+
+        Raises:
+            ValueError: An entry cannot be scheduled (the message names its index); nothing was changed
+        """
+        parsed = self._parse_entries(entries, skip_invalid)
+        counts = {"created": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        with self._lock:
+            self._index_batch = []
+            try:
+                self._apply_entries(parsed, counts)
+            finally:
+                batch, self._index_batch = self._index_batch, None
+                self._due_index.add_many(batch)
+
+        logger.info("Applied schedule list: %d created, %d updated, %d deleted, %d unchanged",
+                    counts["created"], counts["updated"], counts["deleted"], counts["unchanged"])
+        return counts
+
+    def _parse_entries(self, entries: List[Dict], skip_invalid: bool = False) -> List[Tuple[Dict, ScheduleEntry]]:
+        """Return (dict, entry) for every incoming entry, raising ValueError at the first invalid one unless skipping."""
+        parsed = []
+        for index, data in enumerate(entries):
+            try:
+                parsed.append((data, self._checked(data)))
+            except ValueError as e:
+                if not skip_invalid:
+                    raise ValueError(f"Entry {index}: {e}") from None
+                logger.error("Skipping schedule entry %d: %s", index, e)
+        return parsed
+
+    def _apply_entries(self, entries: List[Tuple[Dict, ScheduleEntry]], counts: Dict[str, int]):
+        """Diff the in-memory list against validated (dict, entry) pairs and apply the changes (caller holds the lock)."""
+        by_id = {entry.id: entry for entry in self.scheduled_messages}
+        by_content: Dict[tuple, List[ScheduleEntry]] = {}
+        for entry in self.scheduled_messages:
+            by_content.setdefault(entry.content_key(), []).append(entry)
+
+        matched = set()
+        result: List[ScheduleEntry] = []
+        for data, incoming in entries:
+            existing = by_id.get(data.get("id"))
+            if (existing is None or existing in matched) and by_content:
+                candidates = [e for e in by_content.get(incoming.content_key(), []) if e not in matched]
+                existing = candidates[0] if candidates else None
+                if data.get("id") in by_id and existing is None:
+                    # Duplicate id (e.g. a copied entry) - give the new one its own id
+                    incoming.id = new_entry_id()
+
+            if existing is None:
+                result.append(incoming)
+                self._index_entry(incoming)
+                self._schedule_entry(incoming)
+                counts["created"] += 1
+                continue
+
+            matched.add(existing)
+            if existing in self._running:
+                result.append(existing)
+                counts["unchanged"] += 1
+            elif existing.content_key() == incoming.content_key():
+                self._update_metadata(existing, incoming)
+                result.append(existing)
+                counts["unchanged"] += 1
             else:
-                self.schedule_message(
-                    group_name=data.get("group_name"),
-                    message=data.get("message"),
-                    scheduled_time=data.get("time") or data.get("scheduled_time"),
-                    repeat=data.get("repeat", "once"),
-                    batch_id=batch_id
-                )
+                self._cancel_entry(existing)
+                incoming.id = existing.id
+                result.append(incoming)
+                self._index_entry(incoming)
+                self._schedule_entry(incoming)
+                counts["updated"] += 1
+
+        for entry in self.scheduled_messages:
+            if entry in matched:
+                continue
+            if entry in self._running:
+                # Mid-execution: keep it, it removes itself when done
+                result.append(entry)
+                continue
+            self._cancel_entry(entry)
+            counts["deleted"] += 1
+
+        self.scheduled_messages = result
+        self._by_id = {entry.id: entry for entry in result}
+        self.version += 1
+
+    def _update_metadata(self, existing: ScheduleEntry, incoming: ScheduleEntry):
+        """Copy fields that do not affect the timer (status, timestamps, extras) onto an existing entry."""
+        status_changed = existing.status != incoming.status
+        existing.status = incoming.status
+        existing.completed_at = incoming.completed_at
+        existing.created_at = incoming.created_at
+        existing.extra = incoming.extra
+        if status_changed:
+            self._due_index.discard(existing)
+            self._index_entry(existing)
+
+    def snapshot(self) -> Tuple[int, List[Dict]]:
+        """Return the current version and all entries as dicts, taken together under the lock."""
+        with self._lock:
+            return self.version, [entry.to_dict() for entry in self.scheduled_messages]
+
+    def snapshot_json(self) -> Tuple[int, bytes]:
+        """
+        Return the current version and all entries as a serialized JSON array
+
+        The bytes are built once per version and reused until the list changes,
+        so polling dashboards cost no serialization while nothing happens.
+
+        Returns:
+            Tuple[int, bytes]: The version and the UTF-8 JSON body
+        """
+        cached = self._snapshot_json
+        if cached is not None and cached[0] == self.version:
+            return cached
+        version, entries = self.snapshot()
+        # Same encoding as FastAPI's JSONResponse
+        body = json.dumps(entries, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        self._snapshot_json = (version, body)
+        return version, body
+
+    def get_entry(self, entry_id: str) -> Optional[ScheduleEntry]:
+        """Return the scheduled entry with the given id, or None."""
+        return self._by_id.get(entry_id)
+
+    def _check_version(self, expected_version: Optional[int]):
+        if expected_version is not None and expected_version != self.version:
+            raise VersionConflictError(f"Schedule list is at version {self.version}, not {expected_version}")
+
+    def _check_not_running(self, entry: ScheduleEntry):
+        if entry in self._running:
+            raise EntryBusyError(f"Schedule {entry.id} is being sent right now")
+
+    def create_entry(self, data: Dict, expected_version: Optional[int] = None) -> ScheduleEntry:
+        """
+        Add one entry from an API dict and persist the list
+
+        Args:
+            data (Dict): Entry dict; any "id" in it is ignored and a new one is assigned
+            expected_version (int): Reject the change if the list is no longer at this version (optional)
+
+        Returns:
+            ScheduleEntry: The created entry
+
+        Raises:
+            ValueError: The entry cannot be scheduled (see _checked); nothing was changed
+        """
+        entry = self._new_entry(data)
+        with self._lock:
+            self._check_version(expected_version)
+            self.add_entry(entry)
+            self.save_schedules_to_file(self.schedules_file)
+        return entry
+
+    def update_entry(self, entry_id: str, changes: Dict, expected_version: Optional[int] = None) -> Optional[ScheduleEntry]:
+        """
+        Change fields of one entry; its timer job is only recreated if what/where/when changed
+
+        Args:
+            entry_id (str): ID of the entry to change
+            changes (Dict): Fields to change
+            expected_version (int): Reject the change if the list is no longer at this version (optional)
+
+        Returns:
+            Optional[ScheduleEntry]: The updated entry, or None if no entry has this id
+        """
+        with self._lock:
+            self._check_version(expected_version)
+            entry = self._by_id.get(entry_id)
+            if entry is None:
+                return None
+            self._check_not_running(entry)
+            self._update(entry, changes)
+            self.version += 1
+            self.save_schedules_to_file(self.schedules_file)
+        logger.info("Schedule %s updated", entry_id)
+        return entry
+
+    def delete_entry(self, entry_id: str, expected_version: Optional[int] = None) -> bool:
+        """
+        Cancel and remove one entry
+
+        Args:
+            entry_id (str): ID of the entry to remove
+            expected_version (int): Reject the change if the list is no longer at this version (optional)
+
+        Returns:
+            bool: True if removed, False if no entry has this id
+        """
+        with self._lock:
+            self._check_version(expected_version)
+            entry = self._by_id.get(entry_id)
+            if entry is None:
+                return False
+            self._check_not_running(entry)
+            self._delete(entry)
+            self.version += 1
+            self.save_schedules_to_file(self.schedules_file)
+        logger.info("Schedule %s deleted", entry_id)
+        return True
+
+    def apply_operations(self, operations: List[Dict], expected_version: Optional[int] = None) -> List[Dict]:
+        """
+        Apply a list of create/update/delete operations as one change
+
+        Every operation is checked before any is applied, so either all of them
+        are applied or none is.
+
+        Args:
+            operations (List[Dict]): Items like {"op": "create", "entry": {...}},
+                {"op": "update", "id": ..., "entry": {...changes}} or {"op": "delete", "id": ...}
+            expected_version (int): Reject the change if the list is no longer at this version (optional)
+
+        Returns:
+            List[Dict]: One {"op", "id"} result per operation
+
+        Raises:
+            ValueError: An operation is malformed
+            KeyError: An update or delete refers to an unknown id
+        """
+        with self._lock:
+            self._check_version(expected_version)
+            for op in operations:
+                kind = op.get("op")
+                if kind not in ("create", "update", "delete"):
+                    raise ValueError(f"Unknown operation: {kind}")
+                if kind == "create":
+                    if not isinstance(op.get("entry"), dict):
+                        raise ValueError("create needs an 'entry' object")
+                    self._new_entry(op["entry"])
+                    continue
+                entry = self._by_id.get(op.get("id"))
+                if entry is None:
+                    raise KeyError(op.get("id"))
+                self._check_not_running(entry)
+                if kind == "update":
+                    if not isinstance(op.get("entry"), dict):
+                        raise ValueError("update needs an 'entry' object with the fields to change")
+                    self._merged(entry, op["entry"])
+
+            results = []
+            for op in operations:
+                kind = op["op"]
+                if kind == "create":
+                    entry = self.add_entry(self._new_entry(op["entry"]))
+                    results.append({"op": kind, "id": entry.id})
+                    continue
+                # An earlier operation in this list may have deleted the entry already
+                entry = self._by_id.get(op["id"])
+                if entry is not None and kind == "update":
+                    self._update(entry, op["entry"])
+                elif entry is not None:
+                    self._delete(entry)
+                results.append({"op": kind, "id": op["id"]})
+            self.version += 1
+            self.save_schedules_to_file(self.schedules_file)
+        logger.info("Applied %s schedule operations", len(operations))
+        return results
+
+    def _new_entry(self, data: Dict) -> ScheduleEntry:
+        """Return a checked new entry from an API dict (any "id" in it is ignored; raises ValueError)."""
+        if not isinstance(data, dict):
+            raise ValueError("A schedule entry must be an object")
+        data = dict(data)
+        data.pop("id", None)
+        return self._checked(data)
+
+    def _merged(self, entry: ScheduleEntry, changes: Dict) -> ScheduleEntry:
+        """Return a checked new entry with the entry's fields overridden by changes (same id; raises ValueError)."""
+        if not isinstance(changes, dict):
+            raise ValueError("Changes must be an object")
+        data = entry.to_dict()
+        data.pop("time")
+        data.update(changes)
+        data["id"] = entry.id
+        return self._checked(data)
+
+    def _update(self, entry: ScheduleEntry, changes: Dict) -> ScheduleEntry:
+        incoming = self._merged(entry, changes)
+        if incoming.content_key() == entry.content_key():
+            self._update_metadata(entry, incoming)
+            return entry
+        # Change the entry in place so it keeps its list position and id
+        self._cancel_entry(entry)
+        for field in ScheduleEntry.__slots__:
+            if field not in ("job", "retry_job", "occurrence", "occurrence_due"):
+                setattr(entry, field, getattr(incoming, field))
+        self._index_entry(entry)
+        self._schedule_entry(entry)
+        return entry
+
+    def _delete(self, entry: ScheduleEntry):
+        self._cancel_entry(entry)
+        self._forget(entry)
+
+    def _forget(self, entry: ScheduleEntry):
+        """Drop an entry from the in-memory list and id map."""
+        try:
+            self.scheduled_messages.remove(entry)
+        except ValueError:
+            pass
+        if self._by_id.get(entry.id) is entry:
+            del self._by_id[entry.id]
+
+    def catch_up(self, policy: Optional[str] = None) -> Dict:
+        """
+        Handle one-time entries whose time passed while the scheduler was not running
+
+        Overdue entries are handled in due order. Depending on the policy they are
+        sent (spaced by catch_up_gap_seconds) or recorded in the finished history
+        with status "missed". Either way the lateness is recorded as "late_by_seconds".
+
+        Args:
+            policy (str): "immediate", "skip" or "grace" (defaults to catch_up_policy)
+
+        Returns:
+            Dict: The policy used and how many entries were queued or marked missed
+        """
+        policy = policy or self.catch_up_policy
+        if policy not in CATCH_UP_POLICIES:
+            logger.warning("Unknown catch-up policy: %s. Defaulting to 'grace'", policy)
+            policy = "grace"
+
+        now = self.clock.now()
+        now_ts = now.timestamp()
+        queued, missed = 0, 0
+        with self._lock:
+            overdue = []
+            for entry in self.scheduled_messages:
+                if entry.repeat != "once" or entry.status == "done" or entry in self._running:
+                    continue
+                due = entry.first_due()
+                if due is not None and due.timestamp() // 60 < now_ts // 60:
+                    overdue.append((due, entry))
+            # By timestamp: dues of entries with a timezone are aware, the others naive
+            overdue.sort(key=lambda item: item[0].timestamp())
+
+            for due, entry in overdue:
+                late_by = now_ts - due.timestamp()
+                self._cancel_entry(entry)
+                if policy == "immediate" or (policy == "grace" and late_by <= self.catch_up_grace_minutes * 60):
+                    fire_at = now + timedelta(seconds=queued * self.catch_up_gap_seconds)
+                    entry.job = self._arm_at(fire_at, self._run_catch_up, entry, due)
+                    # Index at the actual fire time so the browser stays open between catch-up sends
+                    self._index_add(entry, fire_at.timestamp())
+                    self._job_event(entry, "queued", reason="catch_up", at=fire_at.strftime("%Y-%m-%d %H:%M:%S"))
+                    queued += 1
+                else:
+                    self._mark_missed(entry, late_by)
+                    missed += 1
+
+            if missed:
+                self.version += 1
+                self.save_schedules_to_file(self.schedules_file)
+
+        if overdue:
+            logger.info("Catch-up (%s): %s overdue schedules queued, %s marked missed", policy, queued, missed)
+        return {"policy": policy, "queued": queued, "missed": missed}
+
+    def _run_catch_up(self, entry: ScheduleEntry, due: datetime):
+        """Send an overdue one-time entry, recording how late it went out."""
+        entry.extra = dict(entry.extra or {}, late_by_seconds=round(self.clock.time() - due.timestamp(), 1))
+        return self._run_once(entry)
+
+    def _mark_missed(self, entry: ScheduleEntry, late_by: float):
+        """Record an overdue entry as missed in the finished history and drop it (caller persists)."""
+        entry.extra = dict(entry.extra or {}, late_by_seconds=round(late_by, 1))
+        logger.warning("Missed %s to '%s' due %s (%d min late)", entry.type, entry.group_name, entry.first_due(), late_by // 60)
+        self._retire(entry, "missed")
 
     def list_scheduled_messages(self):
         """List all scheduled messages"""
@@ -631,58 +1339,80 @@ class MessageScheduler:
             logger.info("No scheduled messages")
             return
 
-        logger.info(f"\n{'='*60}")
-        logger.info(f"{'SCHEDULED MESSAGES':^60}")
-        logger.info(f"{'='*60}")
+        logger.info("\n%s", "=" * 60)
+        logger.info("%s", "SCHEDULED MESSAGES".center(60))
+        logger.info("=" * 60)
 
         for i, msg in enumerate(self.scheduled_messages, 1):
-            logger.info(f"\nMessage #{i}:")
-            logger.info(f"  Group: {msg['group_name']}")
-            logger.info(f"  Time: {msg['scheduled_time']}")
-            logger.info(f"  Repeat: {msg['repeat']}")
-            logger.info(f"  Message: {msg['message'][:50]}...")
-            logger.info(f"  Created: {msg['created_at']}")
+            summary = msg.message or msg.caption or msg.question or msg.image_path or msg.video_path or ""
+            logger.info("\nMessage #%s:", i)
+            logger.info("  Group: %s", msg.group_name)
+            logger.info("  Type: %s", msg.type)
+            logger.info("  Time: %s", msg.scheduled_time)
+            logger.info("  Repeat: %s", msg.repeat)
+            logger.info("  Message: %s...", summary[:50])
+            logger.info("  Created: %s", msg.created_at)
 
-        logger.info(f"\n{'='*60}\n")
+        logger.info("\n%s\n", "=" * 60)
 
     def run(self):
         """Run the scheduler loop"""
         logger.info("Starting message scheduler...")
         logger.info("Press Ctrl+C to stop")
+        self.reconcile()
+        self.catch_up()
 
         try:
             while True:
+                self._refill_horizon()
+                self._maybe_prewarm()
                 schedule.run_pending()
                 time.sleep(1)
         except KeyboardInterrupt:
             logger.info("Scheduler stopped by user")
 
-    def start_background(self):
-        """Start scheduler loop in a background thread."""
+    def start_background(self, catch_up_policy: Optional[str] = None) -> Optional[Dict]:
+        """
+        Start scheduler loop in a background thread.
+
+        Args:
+            catch_up_policy (str): Override catch_up_policy for the overdue entries found at start (optional)
+
+        Returns:
+            Optional[Dict]: The send-journal reconciliation and catch-up summaries, or None if the loop was already running
+        """
         if self._thread and self._thread.is_alive():
-            return
+            return None
         self._stop_event.clear()
+        # Settle sends interrupted by a crash first, so catch-up never re-sends one that went out
+        summary = {"reconcile": self.reconcile(), "catch_up": self.catch_up(catch_up_policy)}
 
         def loop():
             logger.info("Scheduler background thread started")
             while not self._stop_event.is_set():
                 try:
+                    self._refill_horizon()
+                    self._maybe_prewarm()
                     schedule.run_pending()
                 except Exception as e:
-                    logger.error(f"Error running scheduled job: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.error("Error running scheduled job: %s", e, exc_info=True)
                 time.sleep(1)
             logger.info("Scheduler background thread stopped")
 
         self._thread = threading.Thread(target=loop, daemon=True)
         self._thread.start()
+        events.publish(events.SCHEDULER, running=True)
+        return summary
 
     def stop_background(self):
         """Stop the background scheduler thread."""
+        was_running = self.is_running()
         self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=5)
+        self.latency_stats.flush()
+        if was_running:
+            events.publish(events.SCHEDULER, running=False)
 
     def is_running(self) -> bool:
         """Return True if the scheduler background thread is running."""
@@ -699,48 +1429,56 @@ class MessageScheduler:
         Returns:
             bool: True if there are upcoming schedules
         """
-        now = datetime.now()
-        cutoff = now + timedelta(minutes=within_minutes)
+        now_ts = self.clock.time()
+        return self._due_index.any_between(now_ts, now_ts + within_minutes * 60, batch_id=batch_id)
 
-        for entry in self.scheduled_messages:
-            # Skip if already done
-            if entry.get("status") == "done":
-                continue
+    def next_due_entry(self, batch_id: str = None) -> Optional[ScheduleEntry]:
+        """
+        Return the next pending entry with an absolute date that is not yet due.
 
-            # If batch_id is provided, only check schedules with matching batch_id
-            if batch_id and entry.get("batch_id") != batch_id:
-                continue
+        Args:
+            batch_id (str): If provided, only consider schedules with this batch_id
+        """
+        found = self.next_due(batch_id)
+        return found[1] if found else None
 
-            # Parse the scheduled time
-            scheduled_time_str = entry.get("scheduled_time") or entry.get("time")
-            if not scheduled_time_str:
-                continue
+    def next_due(self, batch_id: str = None) -> Optional[Tuple[float, ScheduleEntry]]:
+        """Return (epoch fire time, entry) of the next indexed send that is not yet due, or None."""
+        return self._due_index.next_due(after_ts=self.clock.time(), batch_id=batch_id)
 
-            try:
-                # Try parsing with different formats
-                scheduled_time = None
-                for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                    try:
-                        scheduled_time = datetime.strptime(scheduled_time_str, fmt)
-                        break
-                    except ValueError:
-                        continue
-
-                if scheduled_time and now <= scheduled_time <= cutoff:
-                    logger.info(f"Found upcoming schedule for {entry.get('group_name')} at {scheduled_time} (batch: {entry.get('batch_id', 'none')})")
-                    return True
-            except Exception as e:
-                logger.warning(f"Error parsing schedule time {scheduled_time_str}: {e}")
-                continue
+    def batch_remaining(self, batch_id: str) -> int:
+        """Return how many pending entries of a batch are still to come."""
+        return self._due_index.count(batch_id=batch_id, after_ts=self.clock.time())
 
-        return False
+    def _maybe_prewarm(self):
+        """Start and load the browser ahead of the next due entry, once its lead time is reached."""
+        if self.bot is None or getattr(self.bot, 'driver', None) is not None:
+            return
+        now_ts = self.clock.time()
+        found = self._due_index.next_due(after_ts=now_ts)
+        if not found:
+            return
+        entry = found[1]
+        if not self.browser_planner.should_prewarm(self._needed_at(found[0], entry), now_ts):
+            return
+        if self._prewarmed_for is entry:
+            # Already tried for this entry (e.g. the start failed); let the job itself retry
+            return
+        self._prewarmed_for = entry
+        logger.info("Pre-warming browser %ds before %s to '%s' (lead time %ds)", found[0] - now_ts, entry.type,
+                    entry.group_name, self.browser_planner.lead_time())
+        self._ensure_bot_ready(entry.profile_name)
 
-    def _ensure_bot_ready(self, profile_name: str = None):
+    @tracing.traced("scheduler.ensure_bot_ready")
+    def _ensure_bot_ready(self, profile_name: str = None) -> bool:
         """
         Start WhatsApp bot lazily if needed before executing a job.
 
         Args:
             profile_name (str): Chrome profile name to use (optional)
+
+        Returns:
+            bool: True if WhatsApp Web is ready; otherwise bot.last_error says why
         """
         try:
             if self.bot is None:
@@ -756,8 +1494,10 @@ class MessageScheduler:
                     logger.info("Browser is already running and alive")
                 except Exception as e:
                     needs_start = True
-                    logger.info(f"Browser was closed or crashed, will restart: {e}")
+                    logger.info("Browser was closed or crashed, will restart: %s", e)
             if needs_start:
+                # A new browser has an empty composer
+                self._staged = None
                 # Get the profile path from chrome_profiles module
                 profile_path = None
                 if profile_name:
@@ -767,26 +1507,33 @@ class MessageScheduler:
                         for profile in profiles:
                             if profile.get('name') == profile_name:
                                 profile_path = profile.get('path')
-                                logger.info(f"Using Chrome profile '{profile_name}' at: {profile_path}")
+                                logger.info("Using Chrome profile '%s' at: %s", profile_name, profile_path)
                                 break
                         if not profile_path:
-                            logger.warning(f"Chrome profile '{profile_name}' not found, using default")
+                            logger.warning("Chrome profile '%s' not found, using default", profile_name)
                     except ImportError:
                         logger.info("chrome_profiles module not available, using default profile")
 
                 logger.info("Starting WhatsApp bot for scheduled job...")
+                started = self.clock.monotonic()
                 self.bot.start(profile_path=profile_path)
                 logger.info("Waiting for WhatsApp Web to load...")
-                self.bot.wait_for_whatsapp_load(timeout=180)
-                logger.info("WhatsApp Web loaded successfully!")
+                if not self.bot.wait_for_whatsapp_load(timeout=180):
+                    logger.error("WhatsApp Web did not finish loading")
+                    return False
+                self.browser_planner.record_startup(self.clock.monotonic() - started)
+                logger.info("WhatsApp Web loaded successfully in %.1fs!", self.clock.monotonic() - started)
+            return True
         except Exception as e:
-            logger.error(f"Failed to prepare WhatsApp bot: {e}")
-            import traceback
-            traceback.print_exc()
-            raise  # Re-raise the exception so the job knows it failed
+            logger.error("Failed to prepare WhatsApp bot: %s", e, exc_info=True)
+            if self.bot is not None:
+                self.bot.last_error = DRIVER_CRASH
+            return False
 
 
 if __name__ == "__main__":
+    setup_logging('whatsapp_bot.log')
+
     # Test the scheduler
     bot = WhatsAppBot()
 
@@ -810,6 +1557,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Program stopped by user")
     except Exception as e:
-        logger.error(f"Error occurred: {str(e)}")
+        logger.error("Error occurred: %s", e)
     finally:
         bot.close()
@@ -0,0 +1,95 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# States of one send occurrence, in the order they are written
+INTENT = "intent"            # about to open the chat and send
+DISPATCHED = "dispatched"    # the send key/button was pressed
+CONFIRMED = "confirmed"      # the send completed and the entry was marked done
+# Closing states for occurrences that did not complete
+FAILED = "failed"            # the attempt failed before anything was pressed
+RESOLVED = "resolved"        # an open occurrence was settled by reconciliation
+
+_CLOSED = (CONFIRMED, FAILED, RESOLVED)
+
+
+class SendJournal:
+    """
+    Write-ahead journal of send attempts, keyed by an idempotency key per entry occurrence.
+
+    Every attempt writes "intent" before touching the chat and "dispatched"
+    right before the send key is pressed, each flushed to disk. After a crash,
+    an occurrence left in "dispatched" may already be in the group, so it must
+    be checked before it is sent again. Closed occurrences are dropped when
+    the journal is reopened, so the file only grows within one run.
+    """
+
+    def __init__(self, file_path: str = 'sendJournal.jsonl'):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    self._latest.setdefault(record["key"], {}).update(record)
+        except FileNotFoundError:
+            pass
+
+        # Rewrite with only the still-open occurrences
+        self._latest = {key: rec for key, rec in self._latest.items() if rec.get("state") not in _CLOSED}
+        tmp_path = self.file_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self._latest.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+        if self._latest:
+            logger.warning("Send journal has %s unfinished send(s) from a previous run", len(self._latest))
+
+    def _write(self, key: str, state: str, durable: bool, **fields):
+        record = {"key": key, "state": state, "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], **fields}
+        with self._lock:
+            self._latest.setdefault(key, {}).update(record)
+            with open(self.file_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def state(self, key: str) -> Optional[str]:
+        """Return the latest state of an occurrence, or None if it was never attempted in this run."""
+        record = self._latest.get(key)
+        return record.get("state") if record else None
+
+    def intent(self, key: str, entry_id: str, group_name: str, entry_type: str):
+        self._write(key, INTENT, True, entry_id=entry_id, group_name=group_name, type=entry_type)
+
+    def dispatched(self, key: str):
+        self._write(key, DISPATCHED, True)
+
+    def confirmed(self, key: str):
+        self._write(key, CONFIRMED, False)
+
+    def failed(self, key: str):
+        self._write(key, FAILED, False)
+
+    def resolved(self, key: str, outcome: str):
+        self._write(key, RESOLVED, False, outcome=outcome)
+
+    def open_records(self) -> List[Dict]:
+        """Return the latest record of every occurrence that is neither confirmed nor closed."""
+        with self._lock:
+            return [dict(rec) for rec in self._latest.values() if rec.get("state") not in _CLOSED]
@@ -1,16 +1,24 @@
 import logging
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Body, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from concurrent.futures import ThreadPoolExecutor
 import os
 import json
 import shutil
 from pathlib import Path
+from datetime import datetime
 
 from whatsapp_bot import WhatsAppBot
-from scheduler import MessageScheduler
+from scheduler import MessageScheduler, VersionConflictError, EntryBusyError
+from supervisor import Supervisor
+from logging_setup import setup_logging
+from timezones import UTC, utc_iso, local_iso
+import events
+import metrics
+import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +31,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Single bot instance and scheduler
 bot: Optional[WhatsAppBot] = None
 scheduler: Optional[MessageScheduler] = None
+# Set in supervisor mode (SUPERVISOR_MODE=1): sends run in one worker process per Chrome profile
+supervisor: Optional[Supervisor] = None
 executor = ThreadPoolExecutor(max_workers=4)
 
 # Create uploads directory if it doesn't exist
@@ -46,9 +57,21 @@ class GroupNameBody(BaseModel):
     name: str
 
 
+class ScheduleOperation(BaseModel):
+    op: str
+    id: Optional[str] = None
+    entry: Optional[dict] = None
+
+
+class BulkOperationsBody(BaseModel):
+    operations: List[ScheduleOperation]
+
+
 @app.on_event("startup")
 def startup_event():
-    global bot, scheduler
+    global bot, scheduler, supervisor
+    # UTF-8 file and console logging for emoji and RTL text (LOG_QUEUE=1: queued, rotated, see logging_setup)
+    setup_logging('whatsapp_bot.log')
     logger.info("API server startup: initializing components without launching WhatsApp")
     # Create bot instance but do NOT start Chrome yet
     bot = WhatsAppBot(headless=False)
@@ -59,13 +82,19 @@ def startup_event():
     try:
         scheduler.load_schedules_from_file(schedules_path)
     except Exception as e:
-        logger.warning(f"Could not load schedules: {e}")
+        logger.warning("Could not load schedules: %s", e)
+    if os.environ.get("SUPERVISOR_MODE") == "1":
+        # This process only keeps the schedule list; workers do the sending
+        supervisor = Supervisor(scheduler)
+        logger.info("Supervisor mode: one scheduler worker process per Chrome profile")
     logger.info("API server startup complete (WhatsApp not launched; scheduler not running)")
 
 
 @app.on_event("shutdown")
 def shutdown_event():
     global bot, scheduler
+    if supervisor:
+        supervisor.stop()
     if scheduler:
         scheduler.stop_background()
     if bot:
@@ -75,20 +104,138 @@ def shutdown_event():
 """Immediate send endpoints removed; scheduling-only API."""
 
 
-"""Per-type schedule endpoints removed; use /schedules/load with entries list."""
+"""Per-type schedule endpoints removed; use /schedules and /schedules/{id} with entry dicts."""
+
+
+def _schedules_etag() -> str:
+    return f'"{scheduler.version}"'
+
+
+def _expected_version(if_match: Optional[str]) -> Optional[int]:
+    """Turn an If-Match header into the schedule list version it expects (None = no check)."""
+    if not if_match or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid If-Match header: {if_match}")
+
+
+def _etag_matches(if_none_match: Optional[str], version: int) -> bool:
+    """Return True if an If-None-Match header lists the given schedule list version (or is "*")."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') == str(version):
+            return True
+    return False
+
+
+def _version_conflict(e: VersionConflictError) -> HTTPException:
+    return HTTPException(status_code=412, detail=f"{e}. Reload the schedules and try again.")
 
 
 @app.get("/schedules")
-def list_schedules():
+def list_schedules(if_none_match: Optional[str] = Header(None)):
+    """
+    All schedules, served from an in-memory snapshot that is serialized once per list version
+
+    The ETag is the list version. Send it back as If-None-Match to get an empty
+    304 Not Modified while nothing has changed.
+    """
+    if not scheduler:
+        raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    version, body = scheduler.snapshot_json()
+    # no-cache: browsers may keep the body but must revalidate it with the ETag each time
+    headers = {"ETag": f'"{version}"', "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, version):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.post("/schedules", status_code=201)
+def create_schedule(response: Response, entry: dict = Body(...), if_match: Optional[str] = Header(None)):
+    if not scheduler:
+        raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    try:
+        created = scheduler.create_entry(entry, _expected_version(if_match))
+    except VersionConflictError as e:
+        raise _version_conflict(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = _schedules_etag()
+    return created.to_dict()
+
+
+@app.post("/schedules/bulk")
+def bulk_schedules(body: BulkOperationsBody, response: Response, if_match: Optional[str] = Header(None)):
     if not scheduler:
         raise HTTPException(status_code=500, detail="Scheduler not initialized")
-    # Prefer returning the persisted JSON as-is if available
     try:
-        with open('schedules.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        # Fallback to in-memory normalized entries
-        return scheduler.scheduled_messages
+        results = scheduler.apply_operations([op.dict() for op in body.operations], _expected_version(if_match))
+    except VersionConflictError as e:
+        raise _version_conflict(e)
+    except EntryBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Schedule not found: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = _schedules_etag()
+    return {"results": results, "version": scheduler.version}
+
+
+@app.get("/schedules/{entry_id}")
+def get_schedule(entry_id: str, response: Response):
+    if not scheduler:
+        raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    entry = scheduler.get_entry(entry_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    response.headers["ETag"] = _schedules_etag()
+    return entry.to_dict()
+
+
+@app.patch("/schedules/{entry_id}")
+def update_schedule(entry_id: str, response: Response, changes: dict = Body(...), if_match: Optional[str] = Header(None)):
+    if not scheduler:
+        raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    try:
+        entry = scheduler.update_entry(entry_id, changes, _expected_version(if_match))
+    except VersionConflictError as e:
+        raise _version_conflict(e)
+    except EntryBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    response.headers["ETag"] = _schedules_etag()
+    return entry.to_dict()
+
+
+@app.delete("/schedules/{entry_id}")
+def delete_schedule(entry_id: str, response: Response, if_match: Optional[str] = Header(None)):
+    if not scheduler:
+        raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    try:
+        deleted = scheduler.delete_entry(entry_id, _expected_version(if_match))
+    except VersionConflictError as e:
+        raise _version_conflict(e)
+    except EntryBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    response.headers["ETag"] = _schedules_etag()
+    return {"status": "deleted", "id": entry_id}
 
 
 @app.post("/schedules/save")
@@ -100,18 +247,19 @@ def save_schedules():
 
 
 @app.post("/schedules/load")
-def load_schedules(body: Optional[LoadSchedulesBody] = None):
+def load_schedules(response: Response, body: Optional[LoadSchedulesBody] = None):
     if not scheduler:
         raise HTTPException(status_code=500, detail="Scheduler not initialized")
     # If entries provided, replace in-memory and persist; otherwise load from file
     if body and body.entries is not None:
-        scheduler.reset_with_entries(body.entries)
         try:
-            with open('schedules.json', 'w', encoding='utf-8') as f:
-                json.dump(body.entries, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed saving schedules.json: {e}")
-        return {"status": "loaded", "source": "body", "count": len(body.entries)}
+            changes = scheduler.reset_with_entries(body.entries)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Persist the normalized entries so every entry keeps its stable id
+        scheduler.save_schedules_to_file('schedules.json')
+        response.headers["ETag"] = _schedules_etag()
+        return {"status": "loaded", "source": "body", "count": len(scheduler.scheduled_messages), **changes}
     else:
         scheduler.load_schedules_from_file('schedules.json', replace=True)
         return {"status": "loaded", "source": "file"}
@@ -121,30 +269,131 @@ def load_schedules(body: Optional[LoadSchedulesBody] = None):
 def scheduler_status():
     if not scheduler:
         raise HTTPException(status_code=500, detail="Scheduler not initialized")
-    return {"running": scheduler.is_running(), "count": len(scheduler.scheduled_messages)}
+    found = scheduler.next_due()
+    next_due = None
+    if found:
+        due_ts, next_entry = found
+        next_due = {
+            "group_name": next_entry.group_name,
+            "type": next_entry.type,
+            "scheduled_time": next_entry.scheduled_time,
+            "timezone": next_entry.timezone,
+            "due_utc": utc_iso(datetime.fromtimestamp(due_ts, UTC)),
+            "due_local": local_iso(datetime.fromtimestamp(due_ts, next_entry.tz)),
+        }
+    if supervisor:
+        return {
+            "running": supervisor.is_running(),
+            "count": len(scheduler.scheduled_messages),
+            "next_due": next_due,
+            **supervisor.status(),
+        }
+    return {
+        "running": scheduler.is_running(),
+        "count": len(scheduler.scheduled_messages),
+        "next_due": next_due,
+        "browser": scheduler.browser_planner.stats(),
+    }
 
 
 @app.post("/scheduler/start")
-def scheduler_start():
+def scheduler_start(catch_up: Optional[str] = Query(None, regex="^(immediate|skip|grace)$")):
     if not scheduler:
         raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    if supervisor:
+        if supervisor.is_running():
+            return {"running": True, "message": "Scheduler already running"}
+        return {"running": True, **supervisor.start(catch_up_policy=catch_up)}
     if scheduler.is_running():
         return {"running": True, "message": "Scheduler already running"}
     # Do NOT launch WhatsApp here; jobs will start the bot lazily when due
-    scheduler.start_background()
-    return {"running": True}
+    summary = scheduler.start_background(catch_up_policy=catch_up)
+    return {"running": True, **(summary or {})}
 
 
 @app.post("/scheduler/stop")
 def scheduler_stop():
     if not scheduler:
         raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    if supervisor:
+        if not supervisor.is_running():
+            return {"running": False, "message": "Scheduler already stopped"}
+        supervisor.stop()
+        return {"running": False}
     if not scheduler.is_running():
         return {"running": False, "message": "Scheduler already stopped"}
     scheduler.stop_background()
     return {"running": False}
 
 
+def _browsers_open() -> int:
+    if supervisor:
+        return supervisor.status()["browsers_open"]
+    return 1 if bot and bot.driver else 0
+
+
+metrics.QUEUE_DEPTH.set_function(lambda: len(scheduler.scheduled_messages) if scheduler else 0)
+metrics.BROWSERS_OPEN.set_function(_browsers_open)
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint: send phase timings, send/retry counters, queue depth and open browsers."""
+    # In supervisor mode the sends happen in the workers; add up what they last reported
+    extra = supervisor.worker_metrics() if supervisor else []
+    return Response(metrics.REGISTRY.render(extra), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/jobs/{entry_id}/trace")
+def get_job_trace(entry_id: str, format: str = Query("json", regex="^(json|otlp)$")):
+    """
+    Traces of a schedule's send attempts (one per occurrence or retry), oldest first
+
+    Set TRACING=1 to record them. format=otlp returns the OpenTelemetry OTLP/JSON shape.
+    """
+    worker_files = tracing.worker_trace_files(supervisor.data_root) if supervisor else []
+    traces = tracing.find_traces(entry_id, worker_files)
+    if not traces:
+        detail = "No traces for this schedule" if tracing.TRACING_ENABLED else "Tracing is disabled (set TRACING=1)"
+        raise HTTPException(status_code=404, detail=detail)
+    if format == "otlp":
+        return tracing.to_otlp(traces)
+    return {"id": entry_id, "traces": traces}
+
+
+@app.get("/stats/latency")
+def get_latency_stats():
+    """
+    Send-time accuracy: how far after their due time sends went out
+
+    Percentiles of each stage (scheduler, bot, confirm) and of the overall drift,
+    overall and by profile, type and hour of day, plus whether the "sent within
+    LATENCY_SLO_SECONDS" SLO holds. Kept up to date as sends finish; in supervisor
+    mode the workers' sends are included.
+    """
+    if not scheduler:
+        raise HTTPException(status_code=500, detail="Scheduler not initialized")
+    return scheduler.latency_stats.report()
+
+
+@app.get("/events")
+async def get_events(last_event_id: Optional[str] = Header(None),
+                     last_id: Optional[str] = Query(None, alias="lastEventId")):
+    """
+    Server-sent event stream of scheduler, schedule-list, job and browser state changes
+
+    A reconnecting EventSource sends Last-Event-ID and gets the events it missed
+    (also accepted as ?lastEventId= for the first connect). If they are no longer
+    buffered it gets a "reset" event and should refetch everything. An idle stream
+    gets a heartbeat comment every EVENTS_HEARTBEAT_SECONDS.
+    """
+    return StreamingResponse(
+        events.BUS.stream(last_event_id or last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
@@ -171,7 +420,7 @@ async def upload_file(file: UploadFile = File(...)):
 
         # Return the absolute path
         absolute_path = str(file_path.absolute())
-        logger.info(f"File uploaded successfully: {absolute_path}")
+        logger.info("File uploaded successfully: %s", absolute_path)
 
         return {
             "status": "success",
@@ -179,43 +428,70 @@ async def upload_file(file: UploadFile = File(...)):
             "path": absolute_path
         }
     except Exception as e:
-        logger.error(f"File upload failed: {str(e)}")
+        logger.error("File upload failed: %s", e)
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
 
 @app.get("/finished-schedules")
-def get_finished_schedules():
+def get_finished_schedules(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = None,
+    group: Optional[str] = None,
+    type: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    status: Optional[str] = None,
+    profile_name: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    q: Optional[str] = None,
+    count_only: bool = False,
+):
     """
-    Get all completed schedules from finishedSchedules.json
+    Get completed schedules, newest first, one page at a time.
+    Pass the returned next_cursor back as cursor to fetch the next page.
+
+    Filters: group (case-insensitive), type, batch_id, status, profile_name,
+    since/until on completed_at ("2025-11-04" or "2025-11-04 09:00"; a date-only
+    until covers the whole day) and q (words in the message, caption or poll).
+    With count_only=true only {"count": n} is returned.
     """
     if not scheduler:
         raise HTTPException(status_code=500, detail="Scheduler not initialized")
 
+    filters = {
+        "group_name": group,
+        "type": type,
+        "batch_id": batch_id,
+        "status": status,
+        "profile_name": profile_name,
+    }
     try:
-        finished = scheduler.get_finished_schedules()
-        return finished
+        if count_only:
+            return {"count": scheduler.count_finished_schedules(filters=filters, since=since, until=until, text=q)}
+        return scheduler.get_finished_schedules(
+            limit=limit, cursor=cursor, filters=filters, since=since, until=until, text=q
+        )
     except Exception as e:
-        logger.error(f"Error getting finished schedules: {str(e)}")
+        logger.error("Error getting finished schedules: %s", e)
         raise HTTPException(status_code=500, detail=f"Error getting finished schedules: {str(e)}")
 
 
-@app.delete("/finished-schedules/{index}")
-def delete_finished_schedule(index: int):
+@app.delete("/finished-schedules/{record_id}")
+def delete_finished_schedule(record_id: int):
     """
-    Delete a finished schedule by index
+    Delete a finished schedule by its record ID
     """
     if not scheduler:
         raise HTTPException(status_code=500, detail="Scheduler not initialized")
 
     try:
-        success = scheduler.delete_finished_schedule(index)
-        if success:
-            return {"status": "deleted", "index": index}
-        else:
-            raise HTTPException(status_code=404, detail="Schedule not found or invalid index")
+        success = scheduler.delete_finished_schedule(record_id)
     except Exception as e:
-        logger.error(f"Error deleting finished schedule: {str(e)}")
+        logger.error("Error deleting finished schedule: %s", e)
         raise HTTPException(status_code=500, detail=f"Error deleting finished schedule: {str(e)}")
+    if not success:
+        raise HTTPException(status_code=404, detail="Finished schedule not found")
+    return {"status": "deleted", "record_id": record_id}
 
 
 @app.delete("/finished-schedules")
@@ -233,7 +509,7 @@ def clear_all_finished_schedules():
         else:
             raise HTTPException(status_code=500, detail="Failed to clear schedules")
     except Exception as e:
-        logger.error(f"Error clearing finished schedules: {str(e)}")
+        logger.error("Error clearing finished schedules: %s", e)
         raise HTTPException(status_code=500, detail=f"Error clearing finished schedules: {str(e)}")
 
 
@@ -284,7 +560,7 @@ def whatsapp_login():
         }
 
     except Exception as e:
-        logger.error(f"Error opening WhatsApp Web: {str(e)}")
+        logger.error("Error opening WhatsApp Web: %s", e)
         raise HTTPException(status_code=500, detail=f"Error opening WhatsApp Web: {str(e)}")
 
 
@@ -300,7 +576,7 @@ def get_group_names():
                 return data.get("groups", [])
         return []
     except Exception as e:
-        logger.error(f"Error getting group names: {str(e)}")
+        logger.error("Error getting group names: %s", e)
         raise HTTPException(status_code=500, detail=f"Error getting group names: {str(e)}")
 
 
@@ -329,7 +605,7 @@ def add_group_name(body: GroupNameBody):
 
         return {"status": "added", "groups": groups}
     except Exception as e:
-        logger.error(f"Error adding group name: {str(e)}")
+        logger.error("Error adding group name: %s", e)
         raise HTTPException(status_code=500, detail=f"Error adding group name: {str(e)}")
 
 
@@ -360,7 +636,7 @@ def delete_group_name(name: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting group name: {str(e)}")
+        logger.error("Error deleting group name: %s", e)
         raise HTTPException(status_code=500, detail=f"Error deleting group name: {str(e)}")
 
 
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Replay schedules against MessageScheduler on a virtual clock with a fake bot.
+
+A week of schedules runs in seconds: the clock jumps straight to the next
+timer, and every bot operation takes simulated time. Operation latencies and
+failure rates are configurable. The report covers throughput, how late sends
+went out, how long the browser was open, and retries.
+
+    python simulation.py --synthetic 2000 --days 7
+    python simulation.py --file schedules.json --latency start=20 --fail search=0.05
+"""
+
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import schedule
+
+from clock import VirtualClock
+from scheduler import MessageScheduler
+from schedule_entry import ScheduleEntry
+from retry_policy import GROUP_NOT_FOUND, LOAD_TIMEOUT, UPLOAD_STALL
+from logging_setup import TEXT_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Simulated seconds per bot operation (each run varies by +/-20%)
+DEFAULT_LATENCIES = {
+    "start": 8.0,      # Chrome launch
+    "load": 12.0,      # WhatsApp Web load after start
+    "search": 2.5,     # find and open the group chat
+    "message": 1.0,    # paste the text
+    "image": 6.0,      # attach and upload
+    "video": 20.0,
+    "poll": 8.0,
+    "ack": 1.0,        # wait after pressing send
+    "close": 1.0,
+}
+
+# Operations that can fail: start (driver crash), load, search (group not found), upload (image/video)
+FAILURE_OPERATIONS = ("start", "load", "search", "upload")
+
+
+class _FakeDriver:
+    current_url = "https://web.whatsapp.com/"
+
+
+class FakeBot:
+    """Stand-in for WhatsAppBot that spends simulated time instead of driving Chrome."""
+
+    def __init__(self, clock: VirtualClock, latencies: Optional[Dict[str, float]] = None,
+                 failure_rates: Optional[Dict[str, float]] = None, seed: int = 0):
+        """
+        Args:
+            clock (VirtualClock): Clock advanced by every operation
+            latencies (Dict[str, float]): Overrides for DEFAULT_LATENCIES
+            failure_rates (Dict[str, float]): Failure probability per operation in FAILURE_OPERATIONS
+            seed (int): Random seed, so a run can be repeated exactly
+        """
+        self.clock = clock
+        self.latencies = dict(DEFAULT_LATENCIES, **(latencies or {}))
+        self.failure_rates = dict(failure_rates or {})
+        self.rng = random.Random(seed)
+        self.driver = None
+        self.last_send_clicked_at = None
+        self.last_confirmed_at = None
+        self.last_error = None
+        self.on_send_clicked = None
+        self._staged = None
+        self._last_text: Dict[str, Optional[str]] = {}
+        self.starts = 0
+        self.open_seconds = 0.0
+        self._opened_at: Optional[float] = None
+
+    def _take(self, operation: str):
+        self.clock.sleep(self.latencies.get(operation, 0.0) * self.rng.uniform(0.8, 1.2))
+
+    def _fails(self, operation: str) -> bool:
+        return self.rng.random() < self.failure_rates.get(operation, 0.0)
+
+    def start(self, profile_path: str = None):
+        self._take("start")
+        if self._fails("start"):
+            raise RuntimeError("Simulated Chrome crash on start")
+        self.driver = _FakeDriver()
+        self._opened_at = self.clock.time()
+        self.starts += 1
+
+    def wait_for_whatsapp_load(self, timeout=60):
+        self._take("load")
+        if self._fails("load"):
+            self.last_error = LOAD_TIMEOUT
+            return False
+        return True
+
+    def close(self):
+        if self.driver is None:
+            return
+        self._take("close")
+        self.open_seconds += self.clock.time() - self._opened_at
+        self.driver = None
+        self._opened_at = None
+
+    def _open_chat(self, kind: str) -> bool:
+        self._take("search")
+        if self._fails("search"):
+            self.last_error = GROUP_NOT_FOUND
+            return False
+        self._take(kind)
+        if kind in ("image", "video") and self._fails("upload"):
+            self.last_error = UPLOAD_STALL
+            return False
+        return True
+
+    def _click(self, group_name: str, text: Optional[str]):
+        if self.on_send_clicked:
+            self.on_send_clicked()
+        self.last_send_clicked_at = self.clock.time()
+        self._last_text[group_name] = text
+        self._take("ack")
+        self.last_confirmed_at = self.clock.time()
+
+    def _send(self, kind: str, group_name: str, text: Optional[str]) -> bool:
+        if not self._open_chat(kind):
+            return False
+        self._click(group_name, text)
+        return True
+
+    def send_message_to_group(self, group_name, message):
+        return self._send("message", group_name, message)
+
+    def send_image_to_group(self, group_name, image_path, caption=None):
+        return self._send("image", group_name, caption)
+
+    def send_video_to_group(self, group_name, video_path, caption=None):
+        return self._send("video", group_name, caption)
+
+    def send_poll_to_group(self, group_name, question, options, allow_multiple_answers=False):
+        return self._send("poll", group_name, question)
+
+    def _stage(self, kind: str, group_name: str, text: Optional[str]) -> bool:
+        if not self._open_chat(kind):
+            return False
+        self._staged = (group_name, text)
+        return True
+
+    def stage_message(self, message, group_name=None):
+        return self._stage("message", group_name, message)
+
+    def stage_image(self, image_path, caption=None, group_name=None):
+        return self._stage("image", group_name, caption)
+
+    def stage_video(self, video_path, caption=None, group_name=None):
+        return self._stage("video", group_name, caption)
+
+    def press_send(self):
+        if self._staged is None:
+            return False
+        group_name, text = self._staged
+        self._staged = None
+        self._click(group_name, text)
+        return True
+
+    def last_outgoing_text(self, group_name):
+        return self._last_text.get(group_name)
+
+
+class _RecordingScheduler(MessageScheduler):
+    """MessageScheduler that remembers intended fire times and counts retries for the report."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.intended: Dict[ScheduleEntry, float] = {}
+        self.lateness: List[float] = []
+        self.sends = 0
+        self.failed_attempts = 0
+        self.retries = 0
+        self.gave_up = 0
+
+    def _arm_indexed(self, entry: ScheduleEntry, due_ts: float):
+        self.intended[entry] = due_ts
+        super()._arm_indexed(entry, due_ts)
+
+    def _run_entry(self, entry: ScheduleEntry):
+        super()._run_entry(entry)
+        clicked = self.bot.last_send_clicked_at
+        if clicked is None:
+            return
+        self.sends += 1
+        due_ts = self.intended.get(entry)
+        if due_ts is not None:
+            self.lateness.append(clicked - due_ts)
+
+    def _handle_failure(self, entry: ScheduleEntry, failure: str):
+        super()._handle_failure(entry, failure)
+        self.failed_attempts += 1
+        if entry.retry_job is not None:
+            self.retries += 1
+        else:
+            self.gave_up += 1
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Simulation:
+    """Runs a list of schedule entries through MessageScheduler on a virtual clock."""
+
+    def __init__(self, entries: List[Dict], start: Optional[datetime] = None, days: float = 7,
+                 latencies: Optional[Dict[str, float]] = None, failure_rates: Optional[Dict[str, float]] = None,
+                 seed: int = 0):
+        """
+        Args:
+            entries (List[Dict]): Entries in the schedules.json format
+            start (datetime): Simulated start time (defaults to now)
+            days (float): How many simulated days to run
+            latencies (Dict[str, float]): Bot operation latencies in seconds (see DEFAULT_LATENCIES)
+            failure_rates (Dict[str, float]): Failure probability per operation (see FAILURE_OPERATIONS)
+            seed (int): Random seed for latencies, failures and retry jitter
+        """
+        self.entries = entries
+        self.start = start or datetime.now()
+        self.days = days
+        self.latencies = latencies
+        self.failure_rates = failure_rates
+        self.seed = seed
+
+    def run(self) -> Dict:
+        """Run the simulation and return the report."""
+        clock = VirtualClock(self.start.timestamp())
+        bot = FakeBot(clock, self.latencies, self.failure_rates, seed=self.seed)
+        end_ts = clock.time() + self.days * 86400
+        random.seed(self.seed)  # retry jitter
+        wall_started = time.perf_counter()
+
+        schedule.clear()
+        with tempfile.TemporaryDirectory() as data_dir, clock.patch_schedule():
+            scheduler = _RecordingScheduler(bot, data_dir=data_dir, clock=clock)
+            scheduler.reset_with_entries(self.entries)
+            scheduler.catch_up()
+            loops = 0
+            while clock.time() < end_ts:
+                scheduler._refill_horizon()
+                scheduler._maybe_prewarm()
+                schedule.run_pending()
+                clock.advance_to(min(self._next_wake(scheduler, clock), end_ts))
+                loops += 1
+            bot.close()
+            pending = len(scheduler.scheduled_messages)
+        schedule.clear()
+
+        lateness = sorted(scheduler.lateness)
+        simulated_hours = self.days * 24
+        return {
+            "simulated_days": self.days,
+            "wall_seconds": round(time.perf_counter() - wall_started, 2),
+            "loop_iterations": loops,
+            "entries": len(self.entries),
+            "still_pending": pending,
+            "sends": scheduler.sends,
+            "throughput_per_hour": round(scheduler.sends / simulated_hours, 2) if simulated_hours else None,
+            "failed_attempts": scheduler.failed_attempts,
+            "retries": scheduler.retries,
+            "gave_up": scheduler.gave_up,
+            "lateness_seconds": {
+                "count": len(lateness),
+                "mean": round(sum(lateness) / len(lateness), 2) if lateness else None,
+                "p50": _round(_percentile(lateness, 0.5)),
+                "p90": _round(_percentile(lateness, 0.9)),
+                "p99": _round(_percentile(lateness, 0.99)),
+                "max": _round(lateness[-1] if lateness else None),
+                "within_60s": round(sum(1 for v in lateness if v <= 60) / len(lateness), 4) if lateness else None,
+            },
+            "browser": {
+                "starts": bot.starts,
+                "open_hours": round(bot.open_seconds / 3600, 2),
+                "open_fraction": round(bot.open_seconds / (self.days * 86400), 4) if self.days else None,
+            },
+        }
+
+    @staticmethod
+    def _next_wake(scheduler: MessageScheduler, clock: VirtualClock) -> float:
+        """Return the next time anything can happen: a timer, a pre-warm or a horizon refill."""
+        now = clock.time()
+        wake = scheduler._armed_until - scheduler.horizon_seconds + scheduler.horizon_refill_seconds
+        next_run = schedule.next_run()
+        if next_run is not None:
+            wake = min(wake, next_run.timestamp())
+        found = scheduler.next_due()
+        if found is not None and scheduler.bot.driver is None:
+            wake = min(wake, scheduler._needed_at(found[0], found[1]) - scheduler.browser_planner.lead_time())
+        return max(wake, now + 1)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def synthetic_entries(count: int, start: datetime, days: float, groups: int = 20, seed: int = 0) -> List[Dict]:
+    """
+    Generate a mixed workload: one-time sends spread over the period plus some daily and cron repeats
+
+    Args:
+        count (int): Number of one-time entries
+        start (datetime): Start of the period
+        days (float): Length of the period in days
+        groups (int): Number of distinct groups
+        seed (int): Random seed
+
+    Returns:
+        List[Dict]: Entries in the schedules.json format
+    """
+    rng = random.Random(seed)
+    types = ["message"] * 7 + ["image"] * 2 + ["poll"]
+    entries = []
+    for i in range(count):
+        due = start + timedelta(seconds=rng.uniform(60, days * 86400))
+        typ = rng.choice(types)
+        entry = {"type": typ, "group_name": f"Group {rng.randrange(groups)}",
+                 "time": due.strftime("%Y-%m-%d %H:%M"), "repeat": "once",
+                 "created_at": start.strftime("%Y-%m-%d %H:%M:%S")}
+        if typ == "message":
+            entry["message"] = f"Message {i}"
+        elif typ == "image":
+            entry.update(image_path=f"/tmp/image{i}.jpg", caption=f"Caption {i}")
+        else:
+            entry.update(question=f"Question {i}?", options=["Yes", "No"])
+        entries.append(entry)
+    for i in range(max(1, count // 50)):
+        entries.append({"type": "message", "group_name": f"Group {i % groups}", "message": f"Daily {i}",
+                        "time": f"{rng.randrange(7, 22):02d}:{rng.randrange(60):02d}", "repeat": "daily"})
+    entries.append({"type": "message", "group_name": "Group 0", "message": "Standup",
+                    "time": "09:00", "repeat": "cron:0 9 * * mon-fri"})
+    return entries
+
+
+def _parse_pairs(values: List[str], name: str) -> Dict[str, float]:
+    pairs = {}
+    for value in values or []:
+        key, _, number = value.partition("=")
+        try:
+            pairs[key.strip()] = float(number)
+        except ValueError:
+            raise SystemExit(f"Invalid --{name} '{value}' (use op=number)")
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the scheduler on a virtual clock with a fake bot")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="Schedules JSON file to replay")
+    source.add_argument("--synthetic", type=int, metavar="N", help="Generate N one-time entries (plus some repeats)")
+    parser.add_argument("--days", type=float, default=7, help="Simulated days (default: 7)")
+    parser.add_argument("--start", help='Simulated start time "YYYY-MM-DD HH:MM" (default: now)')
+    parser.add_argument("--latency", action="append", metavar="OP=SECONDS",
+                        help=f"Override an operation latency ({', '.join(DEFAULT_LATENCIES)})")
+    parser.add_argument("--fail", action="append", metavar="OP=RATE",
+                        help=f"Failure probability of an operation ({', '.join(FAILURE_OPERATIONS)})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--verbose", action="store_true", help="Show scheduler logs")
+    args = parser.parse_args()
+
+    # Logs go to stderr so stdout stays a clean JSON report
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, format=TEXT_FORMAT)
+
+    start = datetime.strptime(args.start, "%Y-%m-%d %H:%M") if args.start else datetime.now()
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    else:
+        entries = synthetic_entries(args.synthetic, start, args.days, seed=args.seed)
+
+    report = Simulation(entries, start=start, days=args.days, latencies=_parse_pairs(args.latency, "latency"),
+                        failure_rates=_parse_pairs(args.fail, "fail"), seed=args.seed).run()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import os
+import re
+import logging
+import threading
+import multiprocessing
+from typing import Dict, List, Optional
+
+import events
+import metrics
+import tracing
+import logging_setup
+from scheduler import MessageScheduler
+
+logger = logging.getLogger(__name__)
+
+# Shard of entries without a Chrome profile
+DEFAULT_SHARD = "default"
+
+# How often a worker reports its status to the supervisor (seconds)
+STATUS_INTERVAL = 2.0
+
+# Event types a worker passes up to the supervisor's event bus; the rest (its own
+# scheduler loop and copy of the list) are covered by the supervisor's own events
+FORWARDED_EVENTS = (events.JOB, events.BROWSER)
+
+
+def shard_for(entry: Dict) -> str:
+    """Return the worker shard of an entry dict: its Chrome profile, or the default shard."""
+    return entry.get("profile_name") or DEFAULT_SHARD
+
+
+def _shard_dir(data_root: str, shard: str) -> str:
+    return os.path.join(data_root, re.sub(r"[^\w.-]+", "_", shard))
+
+
+def _worker_main(shard: str, data_dir: str, conn, headless: bool):
+    """
+    Entry point of a worker process: one WhatsAppBot and MessageScheduler for one shard
+
+    Commands received over conn:
+        ("load", entries)       replace the shard's entries (diff-applied, unchanged jobs keep running)
+        ("start", policy)       start the scheduler loop with the given catch-up policy
+        ("stop", None)          stop the loop, close the browser and exit
+
+    Events sent back:
+        ("finished", record)    a finished/failed/missed record for the supervisor's history
+        ("status", {...})       periodic status
+        ("event", (type, data)) a job or browser event for the supervisor's GET /events stream
+    """
+    from whatsapp_bot import WhatsAppBot
+
+    os.makedirs(data_dir, exist_ok=True)
+    tracing.configure(os.path.join(data_dir, os.path.basename(tracing.TRACE_FILE)))
+    log_file = os.path.join(data_dir, "whatsapp_bot.log")
+    # A spawned worker starts unconfigured; a forked one inherits the parent's setup and is redirected
+    logging_setup.setup_logging(log_file)
+    logging_setup.use_log_file(log_file)
+    send_lock = threading.Lock()
+
+    def send(kind: str, payload):
+        with send_lock:
+            conn.send((kind, payload))
+
+    def forward_event(event_type: str, data: Dict):
+        if event_type in FORWARDED_EVENTS:
+            send("event", (event_type, data))
+
+    events.BUS.forward = forward_event
+    bot = WhatsAppBot(headless=headless)
+    scheduler = MessageScheduler(bot, data_dir=data_dir)
+    scheduler.on_finished = lambda record: send("finished", record)
+    logger.info("Worker '%s' started (pid %s)", shard, os.getpid())
+
+    try:
+        while True:
+            if conn.poll(STATUS_INTERVAL):
+                kind, payload = conn.recv()
+                if kind == "load":
+                    scheduler.reset_with_entries(payload)
+                    scheduler.save_schedules_to_file(scheduler.schedules_file)
+                elif kind == "start":
+                    scheduler.start_background(catch_up_policy=payload)
+                elif kind == "stop":
+                    break
+            found = scheduler.next_due()
+            send("status", {
+                "pid": os.getpid(),
+                "running": scheduler.is_running(),
+                "count": len(scheduler.scheduled_messages),
+                "next_due_ts": found[0] if found else None,
+                "browser_open": bot.driver is not None,
+                "browser": scheduler.browser_planner.stats(),
+                "metrics": metrics.REGISTRY.dump(),
+            })
+    except (EOFError, KeyboardInterrupt):
+        pass  # supervisor went away
+    finally:
+        scheduler.stop_background()
+        bot.close()
+        logger.info("Worker '%s' stopped", shard)
+
+
+class _Worker:
+    """Supervisor-side handle of one worker process."""
+
+    def __init__(self, shard: str, process, conn):
+        self.shard = shard
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.status: Dict = {}
+        self.reader: Optional[threading.Thread] = None
+
+    def send(self, kind: str, payload=None):
+        with self.send_lock:
+            self.conn.send((kind, payload))
+
+
+class Supervisor:
+    """
+    Runs one scheduler + browser worker process per Chrome profile.
+
+    The API process keeps the schedule list (CRUD, versions, schedules.json
+    and the finished history) in its own MessageScheduler, used only as a
+    store. Each worker gets its profile's entries over a pipe and sends its
+    finished records back, so only the API process writes shared files.
+    Whenever the list version changes, the affected shards are re-sent;
+    workers diff-apply them, so unchanged timers keep running. Each worker
+    keeps its own send journal under data_root/<profile>/.
+    """
+
+    def __init__(self, store: MessageScheduler, data_root: str = "workers", headless: bool = False):
+        """
+        Args:
+            store (MessageScheduler): Scheduler holding the schedule list (its own loop is not started)
+            data_root (str): Directory for the per-worker data directories
+            headless (bool): Run the workers' browsers headless
+        """
+        self.store = store
+        self.data_root = data_root
+        self.headless = headless
+        self.workers: Dict[str, _Worker] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._synced_version: Optional[int] = None
+        self._shard_entries: Dict[str, List[Dict]] = {}
+        self._catch_up_policy: Optional[str] = None
+        self._ctx = multiprocessing.get_context("spawn")
+
+    def is_running(self) -> bool:
+        return bool(self._watcher and self._watcher.is_alive() and not self._stop_event.is_set())
+
+    def start(self, catch_up_policy: Optional[str] = None) -> Dict:
+        """Start a worker per shard and the thread that keeps them in sync with the store."""
+        if self.is_running():
+            return self.status()
+        self._stop_event.clear()
+        self._catch_up_policy = catch_up_policy
+        self.sync()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+        events.publish(events.SCHEDULER, running=True)
+        return self.status()
+
+    def stop(self):
+        """Stop all workers (their browsers are closed) and the sync thread."""
+        was_running = self.is_running()
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+        with self._lock:
+            workers, self.workers = list(self.workers.values()), {}
+            self._shard_entries = {}
+            self._synced_version = None
+        for worker in workers:
+            try:
+                worker.send("stop")
+            except (OSError, EOFError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout=15)
+            if worker.process.is_alive():
+                logger.warning("Worker '%s' did not stop in time; terminating", worker.shard)
+                worker.process.terminate()
+        if was_running:
+            events.publish(events.SCHEDULER, running=False)
+
+    def sync(self):
+        """Send every shard whose entries changed to its worker, starting workers for new shards."""
+        version, entries = self.store.snapshot()
+        shards: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            shards.setdefault(shard_for(entry), []).append(entry)
+        with self._lock:
+            for shard in set(shards) | set(self._shard_entries):
+                shard_entries = shards.get(shard, [])
+                worker = self.workers.get(shard)
+                spawned = False
+                if worker is None or not worker.process.is_alive():
+                    if not shard_entries:
+                        continue
+                    if worker is not None:
+                        logger.warning("Worker '%s' exited (code %s); restarting", shard, worker.process.exitcode)
+                    worker, spawned = self._spawn(shard), True
+                elif self._shard_entries.get(shard) == shard_entries:
+                    continue
+                try:
+                    worker.send("load", shard_entries)
+                    if spawned:
+                        # Started after its entries arrive, so catch-up sees them
+                        worker.send("start", self._catch_up_policy)
+                    self._shard_entries[shard] = shard_entries
+                except (OSError, EOFError) as e:
+                    logger.error("Could not update worker '%s': %s", shard, e)
+            self._synced_version = version
+
+    def _spawn(self, shard: str) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(shard, _shard_dir(self.data_root, shard), child_conn, self.headless),
+            name=f"scheduler-{shard}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(shard, process, parent_conn)
+        worker.reader = threading.Thread(target=self._read, args=(worker,), daemon=True)
+        worker.reader.start()
+        self.workers[shard] = worker
+        self._shard_entries.pop(shard, None)
+        logger.info("Started worker '%s' (pid %s)", shard, process.pid)
+        return worker
+
+    def _read(self, worker: _Worker):
+        """Handle events from one worker until its pipe closes."""
+        while True:
+            try:
+                kind, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                return
+            if kind == "status":
+                worker.status = payload
+            elif kind == "finished":
+                self._record_finished(payload)
+            elif kind == "event":
+                event_type, data = payload
+                events.publish(event_type, worker=worker.shard, **data)
+
+    def _record_finished(self, record: Dict):
+        """Store a worker's finished record and drop finished one-time entries from the list."""
+        self.store.save_to_finished_schedules(record)
+        if record.get("repeat", "once") == "once" and record.get("id"):
+            self.store.delete_entry(record["id"])
+
+    def _watch(self):
+        while not self._stop_event.wait(0.5):
+            try:
+                if self.store.version != self._synced_version or any(
+                        not w.process.is_alive() for w in list(self.workers.values())):
+                    self.sync()
+            except Exception as e:
+                logger.error("Error syncing workers: %s", e)
+
+    def worker_metrics(self) -> List[Dict]:
+        """Return the metrics each worker last reported (metrics.Registry.dump() format)."""
+        with self._lock:
+            workers = list(self.workers.values())
+        return [w.status["metrics"] for w in workers if "metrics" in w.status]
+
+    def status(self) -> Dict:
+        """Return the per-worker status last reported by each worker."""
+        with self._lock:
+            workers = list(self.workers.values())
+        return {
+            "workers": {
+                w.shard: {"alive": w.process.is_alive(), "pid": w.process.pid,
+                          **{k: v for k, v in w.status.items() if k != "metrics"}}
+                for w in workers
+            },
+            "browsers_open": sum(1 for w in workers if w.status.get("browser_open")),
+        }
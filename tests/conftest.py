@@ -0,0 +1,54 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+import schedule
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import VirtualClock  # noqa: E402
+from scheduler import MessageScheduler  # noqa: E402
+from simulation import FakeBot, Simulation  # noqa: E402
+
+# Simulated start time of every test (server local time)
+START = datetime(2030, 3, 20, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    """Run each test in its own directory, so files written to relative paths (logs, schedules.json) stay out of the repo."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def clock():
+    """A VirtualClock at START that the `schedule` library reads too."""
+    clock = VirtualClock(START.timestamp())
+    schedule.clear()
+    with clock.patch_schedule():
+        yield clock
+    schedule.clear()
+
+
+@pytest.fixture
+def bot(clock):
+    return FakeBot(clock, seed=0)
+
+
+@pytest.fixture
+def make_scheduler(clock, bot, tmp_path):
+    """Build a MessageScheduler on the virtual clock with the fake bot, keeping its files in tmp_path."""
+    def make(data_dir=None):
+        return MessageScheduler(bot, data_dir=str(data_dir or tmp_path), clock=clock)
+    return make
+
+
+def run_for(scheduler: MessageScheduler, clock: VirtualClock, seconds: float):
+    """Run the scheduler loop for `seconds` of simulated time, jumping from timer to timer."""
+    end_ts = clock.time() + seconds
+    while clock.time() < end_ts:
+        scheduler._refill_horizon()
+        scheduler._maybe_prewarm()
+        schedule.run_pending()
+        clock.advance_to(min(Simulation._next_wake(scheduler, clock), end_ts))
@@ -0,0 +1,51 @@
+from conftest import run_for
+
+
+def _message(group_name, time, **fields):
+    return dict({"type": "message", "group_name": group_name, "message": f"to {group_name}", "time": time}, **fields)
+
+
+# Overdue at START: one due in a named timezone (aware due), two in server local time (naive due)
+MIXED_OVERDUE = [
+    _message("Berlin", "2030-03-20 00:30", timezone="Europe/Berlin"),
+    _message("Local late", "2030-03-20 11:30"),
+    _message("Local early", "2030-03-19 09:00"),
+]
+
+
+def test_catch_up_skip_with_aware_and_naive_dues(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries(MIXED_OVERDUE)
+
+    assert scheduler.catch_up("skip") == {"policy": "skip", "queued": 0, "missed": 3}
+    assert scheduler.scheduled_messages == []
+    records, _ = scheduler.finished_store.page()
+    statuses = [record["status"] for record in records]
+    assert statuses == ["missed"] * 3
+
+
+def test_catch_up_sends_aware_and_naive_dues_in_due_order(make_scheduler, bot, clock):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries(MIXED_OVERDUE)
+    expected = [entry.group_name for entry in
+                sorted(scheduler.scheduled_messages, key=lambda entry: entry.first_due().timestamp())]
+    sent = []
+    send = bot.send_message_to_group
+    bot.send_message_to_group = lambda group_name, message: sent.append(group_name) or send(group_name, message)
+
+    assert scheduler.catch_up("immediate")["queued"] == 3
+    run_for(scheduler, clock, 600)
+
+    assert sent == expected
+    assert scheduler.scheduled_messages == []
+
+
+def test_start_background_with_aware_and_naive_dues(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries(MIXED_OVERDUE)
+    try:
+        summary = scheduler.start_background(catch_up_policy="skip")
+    finally:
+        scheduler.stop_background()
+    assert summary["catch_up"]["missed"] == 3
+
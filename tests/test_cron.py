@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+
+from cron import compile_cron, is_cron
+
+
+def _fires(expression, after, count=3):
+    spec = compile_cron(expression)
+    moment = datetime.fromisoformat(after)
+    fires = []
+    for _ in range(count):
+        moment = spec.next_fire(moment)
+        fires.append(moment.strftime("%a %Y-%m-%d %H:%M"))
+    return fires
+
+
+def test_lists_ranges_steps_and_names():
+    assert _fires("*/20 9-10 * * *", "2030-03-20 10:30") == [
+        "Wed 2030-03-20 10:40", "Thu 2030-03-21 09:00", "Thu 2030-03-21 09:20"]
+    assert _fires("0 8,17 * * mon-fri", "2030-03-22 17:00") == [
+        "Mon 2030-03-25 08:00", "Mon 2030-03-25 17:00", "Tue 2030-03-26 08:00"]
+    assert _fires("15 12 1 jan,jul *", "2030-03-20 12:00", 2) == ["Mon 2030-07-01 12:15", "Wed 2031-01-01 12:15"]
+    # 7 is Sunday too, and "9/4" means every 4th hour from 9
+    assert _fires("0 9/4 * * 7", "2030-03-20 12:00") == [
+        "Sun 2030-03-24 09:00", "Sun 2030-03-24 13:00", "Sun 2030-03-24 17:00"]
+
+
+def test_day_fields_nth_weekday_and_either_day_match():
+    assert _fires("0 9 * * mon#1", "2030-03-20 12:00", 2) == ["Mon 2030-04-01 09:00", "Mon 2030-05-06 09:00"]
+    # Day 1 of the month or any Friday
+    assert _fires("0 9 1 * fri", "2030-03-28 12:00") == [
+        "Fri 2030-03-29 09:00", "Mon 2030-04-01 09:00", "Fri 2030-04-05 09:00"]
+    assert _fires("0 0 29 2 *", "2030-03-20 12:00", 1) == ["Sun 2032-02-29 00:00"]
+    assert compile_cron("0 0 30 2 *").next_fire(datetime(2030, 3, 20)) is None
+
+
+def test_next_fire_is_strictly_after_and_keeps_the_second():
+    spec = compile_cron("30 9 * * *", second=15)
+
+    assert spec.next_fire(datetime(2030, 3, 20, 9, 30, 14)) == datetime(2030, 3, 20, 9, 30, 15)
+    assert spec.next_fire(datetime(2030, 3, 20, 9, 30, 15)) == datetime(2030, 3, 21, 9, 30, 15)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *", "61 * * * *", "0 24 * * *", "0 0 0 * *", "0 0 * 13 *", "*/0 * * * *",
+    "0 9-5 * * *", "0 9 * * mon#6", "0 9 * * funday",
+])
+def test_invalid_expressions_raise_value_error(expression):
+    with pytest.raises(ValueError):
+        compile_cron(expression)
+
+
+def test_compiled_specs_are_cached_and_cron_repeats_are_recognised():
+    assert compile_cron("cron:0 9 * * *") is compile_cron("cron:0 9 * * *")
+    assert compile_cron("cron:0 9 * * *").next_fire(datetime(2030, 3, 20)) == datetime(2030, 3, 20, 9, 0)
+    assert is_cron("cron:0 9 * * *") and is_cron("0 9 * * 1-5")
+    assert not any(is_cron(repeat) for repeat in (None, "", "daily", "monday"))
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import timezones
+from conftest import run_for
+from cron import compile_cron
+from timezones import UTC, get_zone, localize, next_fire_in_zone, zone_for
+
+BERLIN = get_zone("Europe/Berlin")
+
+
+def _next(expression, after):
+    return next_fire_in_zone(compile_cron(expression), BERLIN, datetime.fromisoformat(after).timestamp())
+
+
+def test_daily_rule_keeps_wall_time_across_spring_forward():
+    fire = _next("0 9 * * *", "2030-03-30T09:00:00+01:00")
+    assert fire.isoformat() == "2030-03-31T09:00:00+02:00"
+    # The DST day is 23 hours long
+    assert fire.timestamp() - datetime.fromisoformat("2030-03-30T09:00:00+01:00").timestamp() == 23 * 3600
+
+
+def test_daily_rule_keeps_wall_time_across_fall_back():
+    fire = _next("0 9 * * *", "2030-10-26T09:00:00+02:00")
+    assert fire.isoformat() == "2030-10-27T09:00:00+01:00"
+    assert fire.timestamp() - datetime.fromisoformat("2030-10-26T09:00:00+02:00").timestamp() == 25 * 3600
+
+
+def test_wall_time_skipped_by_spring_forward_fires_after_the_jump():
+    fire = _next("30 2 * * *", "2030-03-30T12:00:00+01:00")
+    assert fire.astimezone(UTC).isoformat() == "2030-03-31T01:30:00+00:00"
+    assert _next("30 2 * * *", fire.isoformat()).isoformat() == "2030-04-01T02:30:00+02:00"
+
+
+def test_wall_time_repeated_by_fall_back_fires_once():
+    first = _next("30 2 * * *", "2030-10-26T12:00:00+02:00")
+    assert first.isoformat() == "2030-10-27T02:30:00+02:00"
+    # Not again at 02:30 CET an hour later
+    assert _next("30 2 * * *", first.isoformat()).isoformat() == "2030-10-28T02:30:00+01:00"
+
+
+def test_daily_entry_in_timezone_sends_at_wall_time_across_dst(make_scheduler, bot, clock):
+    scheduler = make_scheduler()
+    clicks = []
+    click = bot._click
+    bot._click = lambda group_name, text: (click(group_name, text), clicks.append(bot.last_send_clicked_at))
+    scheduler.reset_with_entries([{"type": "message", "group_name": "Berlin", "message": "Guten Morgen",
+                                   "time": "09:00", "repeat": "daily", "timezone": "Europe/Berlin"}])
+
+    run_for(scheduler, clock, timedelta(days=14).total_seconds())
+
+    walls = [datetime.fromtimestamp(ts, UTC).astimezone(BERLIN) for ts in clicks]
+    days = [wall.date().isoformat() for wall in walls]
+    # One send per day, through the switch on 2030-03-31
+    assert len(days) == len(set(days)) >= 13 and "2030-03-31" in days
+    # Each send goes out within a minute after 09:00 Berlin time, before and after the switch to CEST
+    assert all(wall.hour == 9 and wall.minute == 0 for wall in walls)
+    assert {wall.utcoffset() for wall in walls} == {timedelta(hours=1), timedelta(hours=2)}
+
+
+def test_zone_names_and_profile_mapping_are_parsed():
+    assert get_zone("utc") is UTC and get_zone("Europe/Berlin") is BERLIN
+    with pytest.raises(ValueError, match="Unknown timezone 'Mars/Olympus'"):
+        get_zone("Mars/Olympus")
+    assert timezones._parse_profile_timezones(" Cairo=Africa/Cairo, NYC = America/New_York,broken") == {
+        "Cairo": "Africa/Cairo", "NYC": "America/New_York"}
+
+
+def test_entry_zone_wins_over_profile_zone_over_default(monkeypatch):
+    monkeypatch.setattr(timezones, "PROFILE_TIMEZONES", {"Cairo": "Africa/Cairo", "Lost": "Mars/Olympus"})
+    monkeypatch.setattr(timezones, "DEFAULT_TIMEZONE", "UTC")
+
+    assert zone_for("Europe/Berlin", "Cairo") is BERLIN
+    assert zone_for(None, "Cairo") is get_zone("Africa/Cairo")
+    assert zone_for(None, "Other") is UTC
+    # An unknown zone falls back to server local time instead of failing the send
+    assert zone_for(None, "Lost") is None
+
+
+def test_wall_times_in_dst_transitions_are_localized():
+    assert localize(datetime(2030, 3, 31, 2, 30), BERLIN).isoformat() == "2030-03-31T03:30:00+02:00"
+    assert localize(datetime(2030, 10, 27, 2, 30), BERLIN).isoformat() == "2030-10-27T02:30:00+02:00"
+    assert localize(datetime(2030, 3, 31, 2, 30), None) == datetime(2030, 3, 31, 2, 30)
+
+
+def test_once_entry_is_due_at_the_wall_time_of_its_zone(make_scheduler):
+    scheduler = make_scheduler()
+
+    entry = scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi",
+                                    "time": "2030-03-21 09:00", "timezone": "America/New_York"})
+
+    assert entry.to_dict()["due_utc"] == "2030-03-21T13:00:00Z"
+    with pytest.raises(ValueError, match="Unknown timezone"):
+        scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi",
+                                "time": "2030-03-21 09:00", "timezone": "Mars/Olympus"})
+    assert scheduler.scheduled_messages == [entry]
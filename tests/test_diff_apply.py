@@ -0,0 +1,87 @@
+import json
+
+import pytest
+import schedule
+
+
+def _message(group_name, time, message="hello", **fields):
+    return dict({"type": "message", "group_name": group_name, "message": message, "time": time}, **fields)
+
+
+def _due_order(scheduler):
+    """Group names of the indexed entries in due order."""
+    indexed = [entry for entry in scheduler.scheduled_messages if scheduler._due_index.due(entry) is not None]
+    return [entry.group_name for entry in sorted(indexed, key=scheduler._due_index.due)]
+
+
+def test_reset_with_entries_only_touches_what_changed(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries([_message("Keep", "2030-03-21 09:00"),
+                                  _message("Change", "2030-03-21 10:00"),
+                                  _message("Drop", "2030-03-21 11:00")])
+    keep, change, drop = scheduler.scheduled_messages
+    keep_job, drop_job = keep.job, drop.job
+
+    counts = scheduler.reset_with_entries([keep.to_dict(),
+                                           dict(change.to_dict(), time="2030-03-21 12:30"),
+                                           _message("New", "2030-03-21 12:00")])
+
+    assert counts == {"created": 1, "updated": 1, "deleted": 1, "unchanged": 1}
+    by_group = {entry.group_name: entry for entry in scheduler.scheduled_messages}
+    assert set(by_group) == {"Keep", "Change", "New"}
+    # Unchanged entries keep their timer; a changed one keeps its id and is re-armed at the new time
+    assert by_group["Keep"] is keep and keep.job is keep_job
+    assert by_group["Change"].id == change.id
+    assert drop_job not in schedule.get_jobs()
+    assert _due_order(scheduler) == ["Keep", "New", "Change"]
+
+
+def test_reset_with_same_entries_is_a_no_op(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries([_message(f"Group {i}", f"2030-03-21 {9 + i:02d}:00") for i in range(5)])
+    jobs = [entry.job for entry in scheduler.scheduled_messages]
+
+    counts = scheduler.reset_with_entries([entry.to_dict() for entry in scheduler.scheduled_messages])
+
+    assert counts == {"created": 0, "updated": 0, "deleted": 0, "unchanged": 5}
+    assert [entry.job for entry in scheduler.scheduled_messages] == jobs
+
+
+def test_entries_without_ids_match_by_content(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries([_message("A", "2030-03-21 09:00")])
+    original = scheduler.scheduled_messages[0]
+
+    counts = scheduler.reset_with_entries([_message("A", "2030-03-21 09:00")])
+
+    assert counts["unchanged"] == 1 and scheduler.scheduled_messages[0] is original
+
+
+def test_malformed_entry_rejects_the_whole_list_before_changing_anything(make_scheduler):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries([_message("A", "2030-03-21 09:00"), _message("B", "2030-03-21 10:00")])
+    a, b = scheduler.scheduled_messages
+    jobs, version = [a.job, b.job], scheduler.version
+
+    with pytest.raises(ValueError, match="Entry 2"):
+        scheduler.reset_with_entries([dict(a.to_dict(), time="2030-03-21 09:30"),
+                                      dict(b.to_dict(), time="2030-03-21 10:30"),
+                                      _message("Broken", "25:99")])
+
+    # Nothing was cancelled half-way: both entries keep their job and due time
+    assert scheduler.scheduled_messages == [a, b] and [a.job, b.job] == jobs
+    assert all(job in schedule.get_jobs() for job in jobs)
+    assert _due_order(scheduler) == ["A", "B"] and scheduler.version == version
+
+
+def test_loading_a_file_skips_entries_that_cannot_be_scheduled(make_scheduler, tmp_path):
+    path = tmp_path / "schedules.json"
+    path.write_text(json.dumps([_message("Broken", "25:99", timezone="Europe/Berlin"),
+                                {"type": "message", "message": "no group", "time": "2030-03-21 08:00"},
+                                _message("Upcoming", "2030-03-21 09:00")]))
+    scheduler = make_scheduler()
+
+    scheduler.load_schedules_from_file(str(path))
+
+    assert [entry.group_name for entry in scheduler.scheduled_messages] == ["Upcoming"]
+    assert scheduler.next_due()[1].group_name == "Upcoming"
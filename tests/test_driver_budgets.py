@@ -0,0 +1,9 @@
+import pytest
+
+from whatsapp_standin import chrome_available, check_budgets
+
+
+@pytest.mark.skipif(not chrome_available(), reason="Chrome not found")
+def test_send_flows_stay_within_driver_budgets():
+    # Real bot and Chrome against the stand-in page; fails if any operation exceeds DRIVER_BUDGETS
+    assert check_budgets(headless=True)
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from conftest import START, run_for
+from due_index import DueIndex
+
+
+def test_add_moves_an_existing_key_and_discard_removes_it():
+    index = DueIndex()
+    index.add("a", 300, batch_id="b1")
+    index.add("b", 100)
+    index.add("a", 50, batch_id="b2")
+
+    assert len(index) == 2 and index.due("a") == 50
+    assert index.count(batch_id="b1") == 0 and index.count(batch_id="b2") == 1
+
+    index.discard("a")
+    index.discard("a")
+
+    assert "a" not in index and index.due("a") is None
+    assert index.next_due() == (100, "b")
+    assert index.count(batch_id="b2") == 0
+
+
+def test_range_queries_and_their_bounds():
+    index = DueIndex()
+    for key, due_ts in (("a", 100), ("b", 200), ("c", 200), ("d", 300)):
+        index.add(key, due_ts, batch_id="odd" if key in "ac" else None, item=key.upper())
+
+    # next_due and count are inclusive of after_ts; between excludes its start and includes its end
+    assert index.next_due(after_ts=200) == (200, "B")
+    assert index.next_due(after_ts=201) == (300, "D")
+    assert index.next_due(after_ts=301) is None
+    assert index.next_due(after_ts=101, batch_id="odd") == (200, "C")
+    assert index.between(100, 300) == [(200, "B"), (200, "C"), (300, "D")]
+    assert index.count(after_ts=200) == 3 and index.count(batch_id="odd", after_ts=150) == 1
+    assert index.any_between(150, 200) and not index.any_between(201, 299)
+    assert not index.any_between(0, 150, batch_id="none")
+
+
+def test_add_many_and_rebuild_match_one_by_one_adds():
+    rows = [("k%d" % n, float((n * 37) % 11), "b%d" % (n % 3), None) for n in range(20)]
+    one_by_one = DueIndex()
+    for key, due_ts, batch_id, item in rows:
+        one_by_one.add(key, due_ts, batch_id, item)
+
+    many = DueIndex()
+    many.add("k0", 999.0)
+    many.add_many(rows)
+    rebuilt = DueIndex()
+    rebuilt.add("stale", 1.0)
+    rebuilt.rebuild(rows)
+
+    for index in (many, rebuilt):
+        assert len(index) == 20 and "stale" not in index
+        assert index.between(-1, 20) == one_by_one.between(-1, 20)
+        assert [index.count(batch_id="b%d" % n) for n in range(3)] == [7, 7, 6]
+
+
+def test_only_entries_inside_the_horizon_get_a_timer(make_scheduler, clock):
+    scheduler = make_scheduler()
+    soon = scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi", "batch_id": "b1",
+                                   "time": (START + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M")})
+    later = scheduler.create_entry({"type": "message", "group_name": "B", "message": "hi", "batch_id": "b1",
+                                    "time": (START + timedelta(days=3)).strftime("%Y-%m-%d %H:%M")})
+
+    assert soon.job is not None and later.job is None
+    assert scheduler.next_due_entry() is soon and scheduler.batch_remaining("b1") == 2
+
+    run_for(scheduler, clock, timedelta(days=2, hours=1).total_seconds())
+
+    assert soon.status == "done" and later.job is not None
+    assert scheduler.next_due_entry(batch_id="b1") is later and scheduler.batch_remaining("b1") == 1
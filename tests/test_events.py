@@ -0,0 +1,123 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+import events
+import server
+from conftest import START, run_for
+
+
+def _parse(chunk: bytes):
+    fields = dict(line.split(": ", 1) for line in chunk.decode("utf-8").strip().split("\n"))
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+async def _read(stream, count):
+    return [await stream.__anext__() for _ in range(count)]
+
+
+def test_a_reconnecting_stream_replays_missed_events_then_goes_live():
+    bus = events.EventBus()
+    first = bus.publish(events.SCHEDULER, running=True)
+    bus.publish(events.SCHEDULES, version=1, count=1)
+    bus.publish(events.SCHEDULES, version=2, count=2)
+
+    async def scenario():
+        stream = bus.stream(str(first.id))
+        chunks = await _read(stream, 3)
+        # Published from another thread, like the scheduler loop does
+        threading.Thread(target=bus.publish, args=(events.JOB,), kwargs={"state": "done", "id": "e1"}).start()
+        chunks += await _read(stream, 1)
+        await stream.aclose()
+        return chunks
+
+    retry, *messages = asyncio.run(scenario())
+
+    assert retry == b"retry: 3000\n\n"
+    parsed = [_parse(chunk) for chunk in messages]
+    assert [(event_type, data.get("version") or data.get("state")) for _, event_type, data in parsed] == [
+        ("schedules", 1), ("schedules", 2), ("job", "done")]
+    assert [event_id for event_id, _, _ in parsed] == list(range(first.id + 1, first.id + 4))
+    assert bus.subscribers() == 0
+
+
+def test_ids_that_cannot_be_replayed_get_a_reset_event():
+    bus = events.EventBus(size=2)
+    first = bus.publish(events.SCHEDULER, running=True)
+    for version in range(3):
+        bus.publish(events.SCHEDULES, version=version, count=0)
+
+    async def first_message(last_event_id):
+        stream = bus.stream(last_event_id)
+        _, message = await _read(stream, 2)
+        await stream.aclose()
+        return _parse(message)
+
+    # Dropped from the buffer, from before a restart, and garbage
+    for last_event_id in (str(first.id), str(bus.last_id + 1000), "abc"):
+        event_id, event_type, data = asyncio.run(first_message(last_event_id))
+        assert (event_id, event_type, data["reason"]) == (bus.last_id, events.RESET, "missed_events")
+
+
+def test_idle_streams_get_heartbeats_and_lagging_ones_are_closed(monkeypatch):
+    monkeypatch.setattr(events, "HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(events, "BUFFER_SIZE", 2)
+    bus = events.EventBus()
+
+    async def scenario():
+        stream = bus.stream()
+        chunks = await _read(stream, 2)
+        for version in range(4):
+            bus.publish(events.SCHEDULES, version=version, count=0)
+        await asyncio.sleep(0)
+        chunks += [chunk async for chunk in stream]
+        return chunks
+
+    chunks = asyncio.run(scenario())
+
+    assert chunks[1] == b": heartbeat\n\n"
+    # Four events overflowed the two-event queue, so the stream ends and the client resumes from the buffer
+    assert [_parse(chunk)[2]["version"] for chunk in chunks[2:]] == [0]
+    assert bus.subscribers() == 0
+
+
+def test_worker_buses_forward_instead_of_publishing():
+    bus = events.EventBus()
+    last_id = bus.last_id
+    forwarded = []
+    bus.forward = lambda event_type, data: forwarded.append((event_type, data))
+
+    assert bus.publish(events.BROWSER, state="up") is None
+    assert forwarded == [(events.BROWSER, {"state": "up"})] and bus.last_id == last_id
+
+
+def test_a_send_publishes_its_job_states_and_the_list_change(make_scheduler, clock, monkeypatch):
+    published = []
+    monkeypatch.setattr(events.BUS, "forward", lambda event_type, data: published.append((event_type, data)))
+    scheduler = make_scheduler()
+    entry = scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi",
+                                    "time": (START + timedelta(minutes=5)).strftime("%Y-%m-%d %H:%M")})
+
+    run_for(scheduler, clock, 600)
+
+    job_states = [data["state"] for event_type, data in published if event_type == events.JOB and data["id"] == entry.id]
+    assert job_states[0] == "started" and job_states[-1] == "done"
+    assert (events.SCHEDULES, {"version": scheduler.version, "count": 0}) in published
+
+
+def test_events_endpoint_streams_from_the_last_event_id():
+    last = events.publish(events.SCHEDULER, running=False)
+    events.publish(events.SCHEDULES, version=7, count=3)
+
+    async def scenario():
+        response = await server.get_events(last_event_id=None, last_id=str(last.id))
+        chunks = await _read(response.body_iterator, 2)
+        await response.body_iterator.aclose()
+        return response, chunks
+
+    response, (_, message) = asyncio.run(scenario())
+
+    assert response.media_type == "text/event-stream" and response.headers["cache-control"] == "no-cache"
+    event_id, event_type, data = _parse(message)
+    assert (event_id, event_type, data["version"]) == (last.id + 1, events.SCHEDULES, 7)
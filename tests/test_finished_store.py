@@ -0,0 +1,172 @@
+import json
+import time
+
+from finished_store import FinishedScheduleStore
+
+
+def _record(n, **fields):
+    return dict({"type": "message", "group_name": f"Group {n}", "message": f"message {n}",
+                 "status": "done", "completed_at": f"2030-03-{n:02d} 09:00:00"}, **fields)
+
+
+def _store(tmp_path, **kwargs):
+    return FinishedScheduleStore(str(tmp_path / "finishedSchedules.jsonl"),
+                                 legacy_path=str(tmp_path / "finishedSchedules.json"), **kwargs)
+
+
+def _lines(store):
+    with open(store.file_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_pages_newest_first_with_record_id_cursor(tmp_path):
+    store = _store(tmp_path)
+    ids = [store.append(_record(n)) for n in range(1, 6)]
+
+    first, cursor = store.page(limit=2)
+    second, cursor2 = store.page(limit=2, cursor=cursor)
+    last, end = store.page(limit=2, cursor=cursor2)
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert [[r["record_id"] for r in page] for page in (first, second, last)] == [[5, 4], [3, 2], [1]]
+    assert end is None
+
+
+def test_appends_one_line_per_record_and_deletes_with_a_tombstone(tmp_path):
+    store = _store(tmp_path)
+    for n in range(1, 4):
+        store.append(_record(n))
+
+    assert store.delete(2) and not store.delete(2)
+
+    assert _lines(store)[-1] == {"record_id": 2, "tombstone": True}
+    assert len(_lines(store)) == 4 and store.count() == 2
+    assert store.get(2) is None and store.get(3)["group_name"] == "Group 3"
+
+
+def test_reopening_replays_tombstones_and_never_reuses_ids(tmp_path):
+    store = _store(tmp_path)
+    for n in range(1, 4):
+        store.append(_record(n))
+    store.delete(3)
+
+    reopened = _store(tmp_path)
+
+    assert [r["record_id"] for r in reopened.page()[0]] == [2, 1]
+    assert reopened.append(_record(4)) == 4
+
+
+def test_clear_keeps_ids_increasing_across_restarts(tmp_path):
+    store = _store(tmp_path)
+    store.append(_record(1))
+    store.append(_record(2))
+    store.clear()
+
+    reopened = _store(tmp_path)
+
+    assert reopened.count() == 0
+    assert reopened.append(_record(3)) == 3
+
+
+def test_compaction_drops_dead_lines_and_keeps_live_records_readable(tmp_path):
+    store = _store(tmp_path, compact_min_dead=1000)
+    for n in range(1, 11):
+        store.append(_record(n))
+    for record_id in range(1, 9):
+        store.delete(record_id)
+    assert len(_lines(store)) == 18
+
+    store.compact()
+
+    assert _lines(store) == [{"next_id": 11}, store.get(9), store.get(10)]
+    assert [r["group_name"] for r in store.page()[0]] == ["Group 10", "Group 9"]
+    reopened = _store(tmp_path)
+    assert reopened.count() == 2 and reopened.append(_record(11)) == 11
+
+
+def test_deletes_trigger_background_compaction(tmp_path):
+    store = _store(tmp_path, compact_min_dead=4, compact_ratio=0.5)
+    for n in range(1, 5):
+        store.append(_record(n))
+    for record_id in (1, 2):
+        store.delete(record_id)
+
+    # Compaction runs on its own thread
+    deadline = time.monotonic() + 5
+    while len(_lines(store)) != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [line.get("record_id") for line in _lines(store)] == [None, 3, 4]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    store = _store(tmp_path)
+    store.append(_record(1))
+    with open(store.file_path, "ab") as f:
+        f.write(b'{"record_id": 2, "gro')
+
+    reopened = _store(tmp_path)
+
+    assert [r["record_id"] for r in reopened.page()[0]] == [1]
+
+
+def test_legacy_json_history_is_imported_oldest_first(tmp_path):
+    legacy = [_record(3), _record(1), _record(2)]
+    (tmp_path / "finishedSchedules.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    store = _store(tmp_path)
+
+    assert [(r["record_id"], r["group_name"]) for r in store.page()[0]] == [(3, "Group 3"), (2, "Group 2"), (1, "Group 1")]
+    assert json.loads((tmp_path / "finishedSchedules.json").read_text(encoding="utf-8")) == legacy
+
+
+def _filled(tmp_path):
+    store = _store(tmp_path)
+    store.append(_record(1, group_name="Family", message="Dinner at eight"))
+    store.append(_record(2, group_name="family ", type="poll", question="Dinner where?", options=["Home", "Out"]))
+    store.append(_record(3, group_name="Work", status="failed", batch_id="b1", profile_name="second"))
+    store.append(_record(4, group_name="Work", batch_id="b1", completed_at="2030-03-04 23:59:59"))
+    return store
+
+
+def _ids(result):
+    items, _, total = result
+    assert total == len(items)
+    return [r["record_id"] for r in items]
+
+
+def test_exact_filters_and_case_insensitive_group(tmp_path):
+    store = _filled(tmp_path)
+
+    assert _ids(store.query(filters={"group_name": "FAMILY"})) == [2, 1]
+    assert _ids(store.query(filters={"type": "poll"})) == [2]
+    assert _ids(store.query(filters={"batch_id": "b1", "status": "done"})) == [4]
+    assert _ids(store.query(filters={"profile_name": "second", "group_name": None})) == [3]
+    assert _ids(store.query(filters={"group_name": "nobody"})) == []
+
+
+def test_date_range_with_whole_day_until(tmp_path):
+    store = _filled(tmp_path)
+
+    assert _ids(store.query(since="2030-03-02", until="2030-03-03")) == [3, 2]
+    # A date-only until covers the last second of that day
+    assert _ids(store.query(since="2030-03-04", until="2030-03-04")) == [4]
+    assert _ids(store.query(since="2030-03-03 09:00:01")) == [4]
+
+
+def test_text_search_matches_word_prefixes_in_any_content_field(tmp_path):
+    store = _filled(tmp_path)
+
+    assert _ids(store.query(text="dinn")) == [2, 1]
+    assert _ids(store.query(text="dinner eight")) == [1]
+    assert _ids(store.query(text="home")) == [2]
+    assert _ids(store.query(text="home", filters={"type": "message"})) == []
+
+
+def test_limit_zero_only_counts_and_deletes_leave_the_index(tmp_path):
+    store = _filled(tmp_path)
+    store.delete(1)
+
+    items, cursor, total = store.query(filters={"group_name": "family"}, limit=0)
+
+    assert (items, cursor, total) == ([], None, 1)
+    assert _ids(store.query(text="eight")) == []
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from conftest import START, run_for
+from latency_stats import LatencyDigest, LatencyStats
+
+
+def _finished(drift_ms, status="done", profile_name=None, type="message", due_at="2030-03-20 09:00:00"):
+    record = {"status": status, "type": type, "profile_name": profile_name, "due_at": due_at}
+    if status == "done":
+        record["latency_ms"] = {"scheduler": 100, "bot": drift_ms - 100, "drift": drift_ms, "total": drift_ms + 500}
+    return record
+
+
+def test_digest_percentiles_stay_within_the_bucket_error():
+    digest = LatencyDigest()
+    for ms in range(1, 1001):
+        digest.add(ms)
+    digest.add(-250)
+
+    for q in (50, 90, 99, 100):
+        assert digest.percentile(q) == pytest.approx(q * 10, rel=0.04)
+    assert digest.percentile(0) == pytest.approx(-250, rel=0.04)
+    assert (digest.min, digest.max) == (-250, 1000)
+    assert LatencyDigest.from_dict(digest.to_dict()).summary() == digest.summary()
+    assert LatencyDigest().summary() == {"count": 0}
+
+
+def test_slo_counts_late_and_unsent_occurrences_as_misses():
+    stats = LatencyStats(slo_seconds=60, objective=0.5)
+    for drift_ms in (1000, 2000, 59000):
+        stats.record(_finished(drift_ms))
+    stats.record(_finished(61000, profile_name="second", due_at="2030-03-20 18:30:00"))
+    stats.record(_finished(None, status="missed", type="poll"))
+
+    assert not stats.record({"status": "done", "type": "message"})
+    report = stats.report()
+    assert report["overall"]["sent"] == 4 and report["overall"]["not_sent"] == 1
+    assert report["slo"]["on_time_ratio"] == 0.6 and report["slo"]["met"] is True
+    assert report["overall"]["stages"]["drift"]["max_ms"] == 61000
+    assert report["by_profile"]["second"]["on_time"] == 0 and report["by_profile"]["default"]["not_sent"] == 1
+    assert report["by_type"]["poll"]["slo_met"] is False
+    assert sorted(report["by_hour"]) == ["09", "18"]
+
+
+def test_state_survives_a_restart_until_reset(tmp_path):
+    path = str(tmp_path / "latencyStats.json")
+    stats = LatencyStats(path)
+    stats.record(_finished(1500))
+    stats.record(_finished(2500))
+    stats.flush()
+
+    reopened = LatencyStats(path)
+    assert reopened.report() == stats.report()
+
+    reopened.reset()
+    assert LatencyStats(path).report()["overall"]["sent"] == 0
+
+
+def test_latency_endpoint_reports_sends_and_resets_with_the_history(make_scheduler, clock, monkeypatch):
+    scheduler = make_scheduler()
+    monkeypatch.setattr(server, "scheduler", scheduler)
+    client = TestClient(server.app)
+    scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi",
+                            "time": (START + timedelta(minutes=5)).strftime("%Y-%m-%d %H:%M")})
+    run_for(scheduler, clock, 600)
+
+    report = client.get("/stats/latency").json()
+
+    assert report["overall"]["sent"] == 1 and report["slo"]["met"] is True
+    assert 0 < report["overall"]["stages"]["drift"]["p50_ms"] < 60000
+    assert list(report["by_hour"]) == ["12"]
+
+    client.delete("/finished-schedules")
+    assert client.get("/stats/latency").json()["overall"]["sent"] == 0
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+import server
+from conftest import START, run_for
+from retry_policy import GROUP_NOT_FOUND
+
+
+def _registry():
+    registry = metrics.Registry()
+    sends = registry.register(metrics.Counter("sends_total", "Sends", ("type", "result")))
+    phases = registry.register(metrics.Histogram("phase_seconds", "Phases", ("phase",), buckets=(1, 10)))
+    depth = registry.register(metrics.Gauge("queue_depth", "Queue"))
+    return registry, sends, phases, depth
+
+
+def test_renders_the_prometheus_text_format():
+    registry, sends, phases, depth = _registry()
+    sends.inc(type="message", result="success")
+    sends.inc(2, type='say "hi"\n', result="failure")
+    for seconds in (0.5, 1, 4, 30):
+        phases.observe(seconds, phase="search")
+    depth.set_function(lambda: 7)
+
+    text = registry.render()
+
+    assert "# TYPE sends_total counter" in text and "# TYPE phase_seconds histogram" in text
+    assert 'sends_total{type="message",result="success"} 1' in text
+    assert 'sends_total{type="say \\"hi\\"\\n",result="failure"} 2' in text
+    # Buckets are cumulative and end with +Inf
+    assert 'phase_seconds_bucket{phase="search",le="1"} 2' in text
+    assert 'phase_seconds_bucket{phase="search",le="10"} 3' in text
+    assert 'phase_seconds_bucket{phase="search",le="+Inf"} 4' in text
+    assert 'phase_seconds_sum{phase="search"} 35.5' in text and 'phase_seconds_count{phase="search"} 4' in text
+    assert "queue_depth 7" in text
+
+
+def test_worker_dumps_are_added_in_but_gauges_are_not():
+    registry, sends, phases, depth = _registry()
+    worker, worker_sends, worker_phases, worker_depth = _registry()
+    sends.inc(type="message", result="success")
+    worker_sends.inc(3, type="message", result="success")
+    worker_sends.inc(type="poll", result="success")
+    worker_phases.observe(2, phase="ack")
+    depth.set(1)
+    worker_depth.set(5)
+
+    text = registry.render([worker.dump()])
+
+    assert 'sends_total{type="message",result="success"} 4' in text
+    assert 'sends_total{type="poll",result="success"} 1' in text
+    assert 'phase_seconds_count{phase="ack"} 1' in text
+    assert "queue_depth 1" in text and "queue_depth 5" not in text
+
+
+def test_sends_and_retries_are_counted_under_the_send_labels(make_scheduler, clock, bot):
+    scheduler = make_scheduler()
+    labels = {"profile": metrics.NO_PROFILE, "type": "message"}
+    successes = metrics.SENDS_TOTAL.value(result="success", **labels)
+    failures = metrics.SENDS_TOTAL.value(result="failure", **labels)
+    retries = metrics.SEND_RETRIES_TOTAL.value(failure=GROUP_NOT_FOUND, **labels)
+    bot.failure_rates["search"] = 1.0
+    scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi",
+                            "time": (START + timedelta(minutes=5)).strftime("%Y-%m-%d %H:%M")})
+
+    run_for(scheduler, clock, 3600)
+
+    # Group-not-found is retried once, so two failed attempts and one retry
+    assert metrics.SENDS_TOTAL.value(result="failure", **labels) == failures + 2
+    assert metrics.SEND_RETRIES_TOTAL.value(failure=GROUP_NOT_FOUND, **labels) == retries + 1
+    assert metrics.SENDS_TOTAL.value(result="success", **labels) == successes
+
+@pytest.mark.usefixtures("clock")
+def test_metrics_endpoint_reports_the_queue_depth(make_scheduler, monkeypatch):
+    scheduler = make_scheduler()
+    monkeypatch.setattr(server, "scheduler", scheduler)
+    scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi", "time": "2030-03-21 09:00"})
+
+    response = TestClient(server.app).get("/metrics")
+
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    assert "whatsapp_scheduler_queue_depth 1" in response.text
+    assert "# TYPE whatsapp_send_phase_seconds histogram" in response.text
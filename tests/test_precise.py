@@ -0,0 +1,36 @@
+from conftest import run_for
+
+
+def _message(group_name, time, **fields):
+    return dict({"type": "message", "group_name": group_name, "message": f"to {group_name}", "time": time}, **fields)
+
+
+def _drift_ms(scheduler):
+    """Milliseconds from due time to pressing send, by group, from the finished history."""
+    records, _ = scheduler.finished_store.page()
+    return {record["group_name"]: record["latency_ms"]["drift"] for record in records}
+
+
+def test_precise_entry_is_pressed_at_its_due_second(make_scheduler, clock):
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries([_message("Precise", "2030-03-20 12:10:00", precise=True)])
+
+    run_for(scheduler, clock, 1200)
+
+    assert _drift_ms(scheduler) == {"Precise": 0}
+
+
+def test_entry_due_while_a_precise_one_is_staged_is_not_held_up(make_scheduler, clock):
+    scheduler = make_scheduler()
+    # "Normal" falls inside the precise entry's 45s staging window
+    scheduler.reset_with_entries([_message("Precise", "2030-03-20 12:10:00", precise=True),
+                                  _message("Normal", "2030-03-20 12:09:50")])
+
+    run_for(scheduler, clock, 1200)
+
+    drift = _drift_ms(scheduler)
+    # Only search, paste and the loop tick stand between due and send, instead of waiting behind the precise press
+    assert drift["Normal"] < 6000
+    # Its composer was used by "Normal", so it is staged again just before the due second
+    assert 0 <= drift["Precise"] < 6000
+    assert scheduler.scheduled_messages == []
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from browser_planner import BrowserPlanner
+from conftest import START, run_for
+
+
+def _message(group_name, minutes):
+    return {"type": "message", "group_name": group_name, "message": "hi",
+            "time": (START + timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M")}
+
+
+def test_lead_time_follows_slow_measured_startups():
+    planner = BrowserPlanner(window=10, default_startup_seconds=60, safety_factor=1.5, min_lead_seconds=30)
+
+    assert planner.lead_time() == 90
+    for seconds in (10, 10, 10, 10, 10, 10, 10, 10, 10, 40):
+        planner.record_startup(seconds)
+    # The 90th percentile of ten samples is the slowest one
+    assert planner.expected_startup() == 40 and planner.lead_time() == 60
+
+    for _ in range(10):
+        planner.record_startup(5)
+    assert planner.lead_time() == 30
+
+    assert planner.should_prewarm(1030, now_ts=1000) and not planner.should_prewarm(1031, now_ts=1000)
+    assert not planner.should_prewarm(None, now_ts=1000)
+
+
+def test_keep_open_only_when_closing_would_not_pay_off():
+    planner = BrowserPlanner(default_startup_seconds=20, safety_factor=1.5, min_closed_seconds=120)
+
+    # Lead time is 30s, so a send 149s away would leave the browser closed for only 119s
+    assert planner.keep_open(1149, now_ts=1000)
+    assert not planner.keep_open(1150, now_ts=1000)
+    assert not planner.keep_open(None, now_ts=1000)
+
+
+def test_browser_is_started_one_lead_time_before_the_send(make_scheduler, clock, bot):
+    scheduler = make_scheduler()
+    scheduler.create_entry(_message("A", 60))
+    lead = scheduler.browser_planner.lead_time()
+
+    run_for(scheduler, clock, 3600 - lead - 5)
+    assert bot.driver is None
+
+    run_for(scheduler, clock, 10)
+    assert bot.driver is not None and bot.starts == 1
+
+    run_for(scheduler, clock, lead + 60)
+    # Start and load were done ahead, so only opening the chat and pasting remain after the due time
+    assert bot.last_send_clicked_at - (START + timedelta(minutes=60)).timestamp() < 10
+    assert scheduler.browser_planner.stats()["samples"] == 1
+
+
+def test_browser_stays_open_between_close_sends_and_closes_between_far_ones(make_scheduler, clock, bot):
+    scheduler = make_scheduler()
+    for group_name, minutes in (("A", 10), ("B", 11), ("C", 120)):
+        scheduler.create_entry(_message(group_name, minutes))
+
+    run_for(scheduler, clock, 12 * 60)
+    assert bot.starts == 1 and bot.driver is None
+
+    run_for(scheduler, clock, 2 * 3600)
+    assert bot.starts == 2 and bot.driver is None
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from selenium.common.exceptions import TimeoutException
+
+import whatsapp_bot
+from conftest import START, run_for
+from retry_policy import GROUP_NOT_FOUND, INVALID_CONTENT, UPLOAD_STALL, policy_for
+
+
+def _weekly(make_scheduler, bot, clock, failures):
+    """Schedule a Wednesday 13:00 entry (START is a Wednesday) whose first `failures` searches fail; return it and its send times."""
+    sent = []
+    remaining = [failures]
+    open_chat = bot._open_chat
+    send = bot.send_message_to_group
+
+    def flaky_open_chat(kind):
+        if remaining[0]:
+            remaining[0] -= 1
+            bot.last_error = GROUP_NOT_FOUND
+            return False
+        return open_chat(kind)
+
+    def recording_send(group_name, message):
+        ok = send(group_name, message)
+        if ok:
+            sent.append(clock.now())
+        return ok
+
+    bot._open_chat = flaky_open_chat
+    bot.send_message_to_group = recording_send
+    scheduler = make_scheduler()
+    scheduler.reset_with_entries([{"type": "message", "group_name": "Team", "message": "Weekly report",
+                                   "time": "13:00", "repeat": "wednesday"}])
+    return scheduler, sent
+
+
+def _wednesdays(*weeks):
+    return [(START + timedelta(weeks=week)).date() for week in weeks]
+
+
+def test_weekly_entry_fires_again_after_a_retried_send(make_scheduler, bot, clock):
+    scheduler, sent = _weekly(make_scheduler, bot, clock, failures=1)
+
+    run_for(scheduler, clock, 15 * 86400)
+
+    assert [when.date() for when in sent] == _wednesdays(0, 1, 2)
+    # The first send went out on its retry, after the 30-60s group-not-found backoff
+    assert sent[0] >= START.replace(hour=13, second=30)
+    assert scheduler._due_index.due(scheduler.scheduled_messages[0]) is not None
+
+
+def test_weekly_entry_without_retry_fires_every_week(make_scheduler, bot, clock):
+    scheduler, sent = _weekly(make_scheduler, bot, clock, failures=0)
+
+    run_for(scheduler, clock, 15 * 86400)
+
+    assert [when.date() for when in sent] == _wednesdays(0, 1, 2)
+
+
+class _NothingAppears:
+    """WebDriverWait stand-in for a page where no selector ever matches."""
+
+    def __init__(self, driver, timeout):
+        pass
+
+    def until(self, condition):
+        raise TimeoutException()
+
+
+def test_poll_failures_set_a_failure_class(monkeypatch):
+    bot = whatsapp_bot.WhatsAppBot(headless=True)
+
+    assert not bot.send_poll("Lunch?", ["Pizza"])
+    assert bot.last_error == INVALID_CONTENT and not policy_for(INVALID_CONTENT).should_retry(1)
+
+    monkeypatch.setattr(whatsapp_bot, "WebDriverWait", _NothingAppears)
+    bot.driver = object()
+    assert not bot.send_poll("Lunch?", ["Pizza", "Sushi"])
+    assert bot.last_error == UPLOAD_STALL
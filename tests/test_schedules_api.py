@@ -0,0 +1,145 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+@pytest.fixture
+def api(make_scheduler, monkeypatch):
+    """A TestClient on the server app with a virtual-clock scheduler (startup hooks do not run, so no browser)."""
+    scheduler = make_scheduler()
+    monkeypatch.setattr(server, "scheduler", scheduler)
+    return TestClient(server.app), scheduler
+
+
+def _message(group_name, time="2030-03-21 09:00", **fields):
+    return dict({"type": "message", "group_name": group_name, "message": "hello", "time": time}, **fields)
+
+
+def test_load_with_a_malformed_entry_is_rejected_with_its_index(api):
+    client, scheduler = api
+    client.post("/schedules/load", json={"entries": [_message("A")]})
+    before = client.get("/schedules").json()
+
+    response = client.post("/schedules/load", json={"entries": [dict(before[0], time="2030-03-21 10:00"),
+                                                                 _message("B", time="25:99")]})
+
+    assert response.status_code == 400 and "Entry 1" in response.json()["detail"]
+    assert client.get("/schedules").json() == before
+    assert scheduler.scheduled_messages[0].job is not None
+
+
+@pytest.mark.parametrize("entry", [
+    {},
+    {"type": "message", "group_name": "A", "message": "hello"},
+    _message("A", time="25:99"),
+    _message("A", time="2030-02-30 09:00"),
+    _message("", time="09:00"),
+    _message("A", type="sticker"),
+    _message("A", repeat="fortnightly"),
+    _message("A", repeat="cron:61 * * * *"),
+    _message("A", timezone="Mars/Olympus"),
+])
+def test_create_rejects_entries_that_cannot_be_scheduled(api, entry):
+    client, scheduler = api
+
+    response = client.post("/schedules", json=entry)
+
+    assert response.status_code == 400
+    assert client.get("/schedules").json() == [] and scheduler._by_id == {}
+    assert len(scheduler._due_index) == 0
+
+
+def test_update_to_a_bad_time_leaves_the_entry_armed(api):
+    client, scheduler = api
+    created = client.post("/schedules", json=_message("A")).json()
+    entry = scheduler.get_entry(created["id"])
+    job = entry.job
+
+    response = client.patch(f"/schedules/{created['id']}", json={"time": "25:99"})
+
+    assert response.status_code == 400
+    assert client.get(f"/schedules/{created['id']}").json() == created
+    assert entry.job is job and scheduler._due_index.due(entry) is not None
+
+
+def test_bulk_with_one_bad_operation_applies_none(api):
+    client, scheduler = api
+    created = client.post("/schedules", json=_message("A")).json()
+    before = client.get("/schedules").json()
+
+    response = client.post("/schedules/bulk", json={"operations": [
+        {"op": "create", "entry": _message("B")},
+        {"op": "update", "id": created["id"], "entry": {"repeat": "fortnightly"}},
+    ]})
+
+    assert response.status_code == 400
+    assert client.get("/schedules").json() == before
+
+
+def test_create_returns_the_entry_with_an_etag(api):
+    client, scheduler = api
+
+    response = client.post("/schedules", json=_message("A", repeat="daily", time="09:00"))
+
+    assert response.status_code == 201
+    assert response.headers["ETag"] == f'"{scheduler.version}"'
+    assert client.get("/schedules").json() == [response.json()]
+
+
+def test_finished_schedules_filters_and_count_only(api):
+    client, scheduler = api
+    for group_name, message in (("Family", "dinner"), ("Work", "standup"), ("family", "lunch")):
+        scheduler.finished_store.append({"type": "message", "group_name": group_name, "message": message,
+                                         "status": "done", "completed_at": "2030-03-20 12:00:00"})
+
+    page = client.get("/finished-schedules", params={"group": "FAMILY", "limit": 1}).json()
+    rest = client.get("/finished-schedules", params={"group": "FAMILY", "cursor": page["next_cursor"]}).json()
+    counted = client.get("/finished-schedules", params={"q": "stand", "count_only": "true"}).json()
+
+    assert [r["message"] for r in page["items"] + rest["items"]] == ["lunch", "dinner"]
+    assert page["total"] == 2 and rest["next_cursor"] is None
+    assert counted == {"count": 1}
+
+
+def test_snapshot_is_serialized_once_per_version(api):
+    client, scheduler = api
+    client.post("/schedules", json=_message("A"))
+
+    first = scheduler.snapshot_json()
+    assert scheduler.snapshot_json()[1] is first[1]
+
+    client.post("/schedules", json=_message("B"))
+    version, body = scheduler.snapshot_json()
+    assert version == scheduler.version != first[0] and body is not first[1]
+
+
+def test_list_is_not_modified_until_the_version_changes(api):
+    client, _ = api
+    client.post("/schedules", json=_message("A"))
+    listed = client.get("/schedules")
+    etag = listed.headers["ETag"]
+
+    for header in (etag, f"W/{etag}", f'"1", {etag}', "*"):
+        cached = client.get("/schedules", headers={"If-None-Match": header})
+        assert cached.status_code == 304 and cached.headers["ETag"] == etag and cached.content == b""
+
+    client.post("/schedules", json=_message("B"))
+    changed = client.get("/schedules", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag and len(changed.json()) == 2
+
+
+def test_if_match_rejects_changes_against_a_stale_list(api):
+    client, _ = api
+    entry = client.post("/schedules", json=_message("A")).json()
+    stale = client.get("/schedules").headers["ETag"]
+    client.post("/schedules", json=_message("B"))
+    current = client.get("/schedules").headers["ETag"]
+
+    conflict = client.patch(f"/schedules/{entry['id']}", json={"message": "edited"}, headers={"If-Match": stale})
+    invalid = client.delete(f"/schedules/{entry['id']}", headers={"If-Match": "not-a-version"})
+    assert (conflict.status_code, invalid.status_code) == (412, 400)
+    assert client.get(f"/schedules/{entry['id']}").json()["message"] == "hello"
+
+    updated = client.patch(f"/schedules/{entry['id']}", json={"message": "edited"}, headers={"If-Match": current})
+    assert updated.status_code == 200 and updated.headers["ETag"] != current
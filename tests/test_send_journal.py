@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+import pytest
+import schedule
+
+from conftest import START, run_for
+from send_journal import DISPATCHED, SendJournal
+from simulation import FakeBot
+
+MESSAGE = {"type": "message", "group_name": "Team", "message": "Standup in 5", "time": "2030-03-20 12:01"}
+# A weekly entry (START is a Wednesday) that has been sent before, so its status is already "done"
+WEEKLY = {"type": "message", "group_name": "Team", "message": "Weekly report", "time": "12:01",
+          "repeat": "wednesday", "status": "done"}
+
+
+class Crash(BaseException):
+    """The process dying between pressing send and recording the confirmation."""
+
+
+class CrashingBot(FakeBot):
+    """Presses send, leaves `chat_shows` as the chat's last outgoing message, then crashes."""
+
+    chat_shows = None
+
+    def _click(self, group_name, text):
+        if self.on_send_clicked:
+            self.on_send_clicked()
+        if self.chat_shows is not None:
+            self._last_text[group_name] = text if self.chat_shows == "sent" else self.chat_shows
+        raise Crash()
+
+
+def _crash_mid_send(clock, tmp_path, chat_shows, entry=MESSAGE):
+    """Run the entry until the process crashes right after send was pressed; return the bot's chat state."""
+    from scheduler import MessageScheduler
+    bot = CrashingBot(clock, seed=0)
+    bot.chat_shows = chat_shows
+    scheduler = MessageScheduler(bot, data_dir=str(tmp_path), clock=clock)
+    scheduler.reset_with_entries([entry])
+    scheduler.save_schedules_to_file(scheduler.schedules_file)
+    with pytest.raises(Crash):
+        run_for(scheduler, clock, 300)
+    # The process is gone, and its timers with it
+    schedule.clear()
+    assert [record["state"] for record in SendJournal(str(tmp_path / "sendJournal.jsonl")).open_records()] == [DISPATCHED]
+    return bot._last_text
+
+
+def _restart(make_scheduler, bot, chat):
+    """A new process on the same data directory, with the chat as the crash left it."""
+    bot._last_text = dict(chat)
+    sends = []
+    send = bot.send_message_to_group
+    bot.send_message_to_group = lambda group_name, message: sends.append(message) or send(group_name, message)
+    scheduler = make_scheduler()
+    scheduler.load_schedules_from_file(scheduler.schedules_file)
+    return scheduler, sends
+
+
+def test_send_seen_in_chat_after_crash_is_confirmed_not_resent(make_scheduler, bot, clock, tmp_path):
+    chat = _crash_mid_send(clock, tmp_path, chat_shows="sent")
+    scheduler, sends = _restart(make_scheduler, bot, chat)
+
+    summary = scheduler.start_background(catch_up_policy="immediate")
+    scheduler.stop_background()
+    run_for(scheduler, clock, 600)
+
+    assert summary["reconcile"] == {"confirmed": 1, "requeued": 0, "unconfirmed": 0}
+    assert sends == [] and scheduler.scheduled_messages == []
+    records, _ = scheduler.finished_store.page()
+    assert [(record["status"], record.get("reconciled")) for record in records] == [("done", True)]
+    assert scheduler.journal.open_records() == []
+
+
+def test_send_missing_from_chat_after_crash_is_sent_once(make_scheduler, bot, clock, tmp_path):
+    chat = _crash_mid_send(clock, tmp_path, chat_shows="an older message")
+    scheduler, sends = _restart(make_scheduler, bot, chat)
+
+    summary = scheduler.start_background(catch_up_policy="immediate")
+    scheduler.stop_background()
+    run_for(scheduler, clock, 600)
+
+    assert summary["reconcile"] == {"confirmed": 0, "requeued": 1, "unconfirmed": 0}
+    assert sends == [MESSAGE["message"]] and scheduler.scheduled_messages == []
+    assert scheduler.journal.open_records() == []
+
+
+def test_unverifiable_send_after_crash_is_not_resent(make_scheduler, bot, clock, tmp_path):
+    chat = _crash_mid_send(clock, tmp_path, chat_shows=None)
+    scheduler, sends = _restart(make_scheduler, bot, chat)
+
+    summary = scheduler.start_background(catch_up_policy="immediate")
+    scheduler.stop_background()
+    run_for(scheduler, clock, 600)
+
+    assert summary["reconcile"] == {"confirmed": 0, "requeued": 0, "unconfirmed": 1}
+    assert sends == [] and scheduler.scheduled_messages == []
+    records, _ = scheduler.finished_store.page()
+    assert [record["status"] for record in records] == ["unconfirmed"]
+
+
+def test_weekly_send_seen_in_chat_after_crash_is_confirmed(make_scheduler, bot, clock, tmp_path):
+    chat = _crash_mid_send(clock, tmp_path, chat_shows="sent", entry=WEEKLY)
+    scheduler, sends = _restart(make_scheduler, bot, chat)
+
+    summary = scheduler.start_background(catch_up_policy="immediate")
+    scheduler.stop_background()
+    records, _ = scheduler.finished_store.page()
+    run_for(scheduler, clock, 8 * 86400)
+
+    assert summary["reconcile"] == {"confirmed": 1, "requeued": 0, "unconfirmed": 0}
+    assert [(record["status"], record.get("reconciled")) for record in records] == [("done", True)]
+    # Not re-sent, and the following Wednesday still goes out
+    assert sends == [WEEKLY["message"]]
+    assert len(scheduler.scheduled_messages) == 1
+
+
+def test_unverifiable_weekly_send_after_crash_keeps_its_next_occurrence(make_scheduler, bot, clock, tmp_path):
+    chat = _crash_mid_send(clock, tmp_path, chat_shows=None, entry=WEEKLY)
+    scheduler, sends = _restart(make_scheduler, bot, chat)
+
+    summary = scheduler.start_background(catch_up_policy="immediate")
+    scheduler.stop_background()
+    entry = scheduler.scheduled_messages[0]
+    # The next Wednesday is past the horizon, so only the due index remembers it
+    assert entry.job is None
+    assert scheduler._due_index.due(entry) == (START + timedelta(weeks=1, minutes=1)).timestamp()
+    run_for(scheduler, clock, 8 * 86400)
+
+    assert summary["reconcile"] == {"confirmed": 0, "requeued": 0, "unconfirmed": 1}
+    assert sends == [WEEKLY["message"]]
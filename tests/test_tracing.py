@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+import tracing
+from conftest import START, run_for
+
+
+@pytest.fixture
+def traces_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(tmp_path / "traces.jsonl"))
+
+
+def test_spans_nest_under_the_open_span_and_record_errors(traces_on):
+    with tracing.trace("e1", group="A"):
+        with tracing.span("search") as search:
+            with tracing.span("find_element", by="xpath"):
+                pass
+        with pytest.raises(ValueError):
+            with tracing.span("upload"):
+                raise ValueError("stalled")
+        tracing.add_span("ack", 0.25)
+        tracing.annotate(result="success")
+        # A nested trace on the same thread is not started
+        with tracing.trace("e2") as nested:
+            assert nested is None
+
+    [record] = tracing.find_traces("e1")
+    root, *spans = record["spans"]
+    by_name = {s["name"]: s for s in spans}
+
+    assert record["attributes"] == {"group": "A", "result": "success"} and root["parent_id"] is None
+    assert by_name["search"]["span_id"] == search.span_id and by_name["search"]["parent_id"] == root["span_id"]
+    assert by_name["find_element"]["parent_id"] == search.span_id
+    assert by_name["upload"]["error"] == "ValueError: stalled"
+    assert by_name["ack"]["duration_ms"] == pytest.approx(250, abs=5)
+    assert tracing.find_traces("e2") == []
+
+
+def test_disabled_tracing_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+    monkeypatch.setattr(tracing, "TRACE_FILE", str(tmp_path / "traces.jsonl"))
+
+    with tracing.trace("e1") as job_trace, tracing.span("search") as span:
+        assert job_trace is None and span is None
+
+    assert tracing.trace_files() == []
+
+
+def test_rotated_files_are_searched_oldest_first(traces_on, monkeypatch):
+    # Each of these traces is about 600 bytes, so two fit in a file
+    monkeypatch.setattr(tracing, "TRACE_MAX_BYTES", 1500)
+    for attempt in range(10):
+        with tracing.trace("e1", attempt=attempt):
+            tracing.add_span("search", 0.1)
+
+    # The live file plus three backups keep the last eight
+    assert len(tracing.trace_files()) == 4
+    assert [t["attributes"]["attempt"] for t in tracing.find_traces("e1")] == list(range(2, 10))
+
+def test_job_trace_endpoint_returns_each_send_attempt(traces_on, make_scheduler, clock, monkeypatch):
+    scheduler = make_scheduler()
+    monkeypatch.setattr(server, "scheduler", scheduler)
+    client = TestClient(server.app)
+    entry = scheduler.create_entry({"type": "message", "group_name": "A", "message": "hi",
+                                    "time": (START + timedelta(minutes=5)).strftime("%Y-%m-%d %H:%M")})
+
+    assert client.get(f"/jobs/{entry.id}/trace").status_code == 404
+
+    run_for(scheduler, clock, 600)
+    response = client.get(f"/jobs/{entry.id}/trace").json()
+    otlp = client.get(f"/jobs/{entry.id}/trace", params={"format": "otlp"}).json()
+
+    [job_trace] = response["traces"]
+    assert job_trace["name"] == "job" and job_trace["attributes"]["result"] == "success"
+    assert job_trace["attributes"]["group"] == "A"
+    spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(spans) == len(job_trace["spans"]) and spans[0]["traceId"] == job_trace["trace_id"]
+    assert {"key": "entry.id", "value": {"stringValue": entry.id}} in spans[0]["attributes"]
@@ -0,0 +1,132 @@
+import os
+import logging
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Optional
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+    ZoneInfoNotFoundError = KeyError
+
+logger = logging.getLogger(__name__)
+
+UTC = timezone.utc
+
+# Zone used for entries without their own timezone; unset means the server's local time
+DEFAULT_TIMEZONE = os.environ.get("SCHEDULER_TIMEZONE") or None
+
+
+def _parse_profile_timezones(value: str) -> Dict[str, str]:
+    """Parse "Profile=Zone,Other=Zone" into a dict."""
+    mapping = {}
+    for part in value.split(","):
+        if "=" in part:
+            profile, name = part.split("=", 1)
+            mapping[profile.strip()] = name.strip()
+    return mapping
+
+
+# Timezone per Chrome profile, e.g. PROFILE_TIMEZONES="Cairo=Africa/Cairo,NYC=America/New_York"
+PROFILE_TIMEZONES: Dict[str, str] = _parse_profile_timezones(os.environ.get("PROFILE_TIMEZONES", ""))
+
+
+@lru_cache(maxsize=64)
+def get_zone(name: str) -> tzinfo:
+    """
+    Return the tzinfo for an IANA timezone name
+
+    Args:
+        name (str): IANA name such as "Europe/Berlin" (or "UTC")
+
+    Returns:
+        tzinfo: The zone (raises ValueError if it is unknown)
+    """
+    if name.upper() == "UTC":
+        return UTC
+    if ZoneInfo is None:
+        raise ValueError("Timezones need Python 3.9+ (zoneinfo)")
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{name}'")
+
+
+def zone_for(timezone_name: Optional[str], profile_name: Optional[str] = None) -> Optional[tzinfo]:
+    """
+    Resolve the zone an entry's times are written in: its own timezone, else its profile's, else the default
+
+    Returns:
+        Optional[tzinfo]: The zone, or None for the server's local time
+    """
+    name = timezone_name or PROFILE_TIMEZONES.get(profile_name or "") or DEFAULT_TIMEZONE
+    if not name:
+        return None
+    try:
+        return get_zone(name)
+    except ValueError as e:
+        logger.warning("%s; using server local time", e)
+        return None
+
+
+def localize(wall: Optional[datetime], tz: Optional[tzinfo]) -> Optional[datetime]:
+    """
+    Attach a zone to a wall-clock time (naive local time is returned unchanged when tz is None)
+
+    A time that falls in a spring-forward gap is moved forward by the gap
+    (02:30 on a day that jumps from 02:00 to 03:00 becomes 03:30). A time
+    that occurs twice when clocks go back means its first occurrence.
+    """
+    if wall is None or tz is None:
+        return wall
+    aware = wall.replace(tzinfo=tz, fold=0)
+    return aware.astimezone(UTC).astimezone(tz)
+
+
+def wall_clock(moment: datetime, tz: Optional[tzinfo]) -> datetime:
+    """Return a moment as naive wall-clock time in tz (server local time when tz is None)."""
+    if tz is None:
+        return moment.astimezone().replace(tzinfo=None) if moment.tzinfo else moment
+    return moment.astimezone(tz).replace(tzinfo=None)
+
+
+def next_fire_in_zone(spec, tz: Optional[tzinfo], after_ts: float) -> Optional[datetime]:
+    """
+    Return the next fire of a CronSpec after an epoch time, evaluated on the wall clock of tz
+
+    Rules are matched against local wall-clock time, so "daily at 09:00" stays
+    at 09:00 across DST changes. A wall time skipped by spring-forward fires
+    right after the jump; one repeated by fall-back fires once.
+
+    Args:
+        spec (CronSpec): Compiled rule
+        tz (Optional[tzinfo]): Zone of the rule (None for server local time)
+        after_ts (float): Epoch seconds; the result is strictly later
+
+    Returns:
+        Optional[datetime]: Aware datetime in tz (naive local time when tz is None), or None if the rule never fires
+    """
+    wall = wall_clock(datetime.fromtimestamp(after_ts, UTC), tz)
+    while True:
+        wall = spec.next_fire(wall)
+        if wall is None:
+            return None
+        fire = localize(wall, tz)
+        # Wall times in a fall-back hour can map to a moment already passed
+        if fire.timestamp() > after_ts:
+            return fire
+
+
+def utc_iso(moment: Optional[datetime]) -> Optional[str]:
+    """Format a moment as "YYYY-MM-DDTHH:MM:SSZ" in UTC (naive values are taken as server local time)."""
+    if moment is None:
+        return None
+    return moment.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def local_iso(moment: Optional[datetime]) -> Optional[str]:
+    """Format a moment as ISO 8601 with its UTC offset (naive values get the server's offset)."""
+    if moment is None:
+        return None
+    return (moment if moment.tzinfo else moment.astimezone()).isoformat(timespec="seconds")
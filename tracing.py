@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import glob
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Off by default; TRACING=1 records a trace per job occurrence
+TRACING_ENABLED = os.environ.get("TRACING") == "1"
+
+# Completed traces, one JSON object per line, rotated by size
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+TRACE_MAX_BYTES = int(os.environ.get("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUPS = 3
+
+# WebDriverWait polling can issue hundreds of commands; spans beyond this are only counted
+MAX_SPANS = 2000
+
+_local = threading.local()
+_file_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Optional[Dict] = None, start: float = None):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = time.time() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ts": self.start,
+            "end_ts": self.end,
+            "duration_ms": round((self.end - self.start) * 1000, 3) if self.end is not None else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """The spans recorded while one job occurrence ran."""
+
+    def __init__(self, entry_id: Optional[str], name: str, attributes: Dict):
+        self.trace_id = os.urandom(16).hex()
+        self.entry_id = entry_id
+        self.root = Span(name, None, attributes)
+        self.spans: List[Span] = [self.root]
+        self.stack: List[Span] = [self.root]
+        self.dropped = 0
+
+    def open(self, name: str, attributes: Optional[Dict] = None, start: float = None) -> Optional[Span]:
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped += 1
+            return None
+        span = Span(name, self.stack[-1].span_id, attributes, start)
+        self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "entry_id": self.entry_id,
+            "name": self.root.name,
+            "started_at": datetime.fromtimestamp(self.root.start).strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_ms": round((self.root.end - self.root.start) * 1000, 3) if self.root.end else None,
+            "attributes": self.root.attributes,
+            "dropped_spans": self.dropped,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ("trace", "name", "attributes", "span")
+
+    def __init__(self, trace: Trace, name: str, attributes: Dict):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Optional[Span]:
+        self.span = self.trace.open(self.name, self.attributes)
+        if self.span is not None:
+            self.trace.stack.append(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            self.span.end = time.time()
+            if exc is not None:
+                self.span.error = f"{exc_type.__name__}: {exc}"
+            self.trace.stack.pop()
+        return False
+
+
+def configure(path: Optional[str] = None, enabled: Optional[bool] = None):
+    """Change the trace file (supervisor workers write to their own data directory) or switch tracing on/off."""
+    global TRACE_FILE, TRACING_ENABLED
+    if path is not None:
+        TRACE_FILE = path
+    if enabled is not None:
+        TRACING_ENABLED = enabled
+
+
+def current() -> Optional[Trace]:
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def trace(entry_id: Optional[str], name: str = "job", **attributes):
+    """
+    Record a trace for the enclosed block (one job occurrence) and write it to TRACE_FILE
+
+    Does nothing when tracing is disabled or a trace is already open on this thread.
+    """
+    if not TRACING_ENABLED or current() is not None:
+        yield None
+        return
+    job_trace = Trace(entry_id, name, attributes)
+    _local.trace = job_trace
+    try:
+        yield job_trace
+    except BaseException as e:
+        job_trace.root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _local.trace = None
+        job_trace.root.end = time.time()
+        _write(job_trace.to_dict())
+
+
+def span(name: str, **attributes):
+    """Context manager timing a span inside the current trace (a no-op when none is open)."""
+    job_trace = current()
+    if job_trace is None:
+        return _NOOP
+    return _SpanContext(job_trace, name, attributes)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator recording each call as a span while a trace is open."""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            job_trace = current()
+            if job_trace is None:
+                return func(*args, **kwargs)
+            with _SpanContext(job_trace, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def add_span(name: str, seconds: float, **attributes):
+    """Record an already finished span that ended now and lasted seconds."""
+    job_trace = current()
+    if job_trace is None:
+        return
+    end = time.time()
+    recorded = job_trace.open(name, attributes, start=end - seconds)
+    if recorded is not None:
+        recorded.end = end
+
+
+def annotate(**attributes):
+    """Add attributes to the current trace's root span."""
+    job_trace = current()
+    if job_trace is not None:
+        job_trace.root.attributes.update(attributes)
+
+
+def instrument_driver(driver):
+    """Record every WebDriver command as a span (find_element, execute_script, send_keys, WebDriverWait polls...)."""
+    execute = driver.execute
+
+    def traced_execute(driver_command, params=None):
+        job_trace = current()
+        if job_trace is None:
+            return execute(driver_command, params)
+        with _SpanContext(job_trace, f"webdriver.{driver_command}", {}):
+            return execute(driver_command, params)
+
+    driver.execute = traced_execute
+    return driver
+
+
+# ----------------------------------------------------------------------
+# Trace file
+# ----------------------------------------------------------------------
+
+def _rotate(path: str):
+    for i in range(TRACE_BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def _write(record: Dict):
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+    path = TRACE_FILE
+    try:
+        with _file_lock:
+            if os.path.exists(path) and os.path.getsize(path) + len(line) > TRACE_MAX_BYTES:
+                _rotate(path)
+            with open(path, 'ab') as f:
+                f.write(line)
+    except OSError as e:
+        logger.warning("Could not write trace to %s: %s", path, e)
+
+
+def trace_files(path: Optional[str] = None) -> List[str]:
+    """Return a trace file and its rotated backups, newest first."""
+    path = path or TRACE_FILE
+    return [p for p in [path] + [f"{path}.{i}" for i in range(1, TRACE_BACKUPS + 1)] if os.path.exists(p)]
+
+
+def find_traces(entry_id: str, paths: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    Return the stored traces of an entry, oldest first
+
+    Args:
+        entry_id (str): Schedule entry id
+        paths (Iterable[str]): Trace files to search besides TRACE_FILE (e.g. supervisor workers' files)
+
+    Returns:
+        List[Dict]: Trace records
+    """
+    needle = f'"entry_id": {json.dumps(entry_id, ensure_ascii=False)}'
+    found = []
+    for base in [TRACE_FILE] + list(paths or []):
+        for path in trace_files(base):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if needle in line:
+                            try:
+                                found.append(json.loads(line))
+                            except ValueError:
+                                continue
+            except OSError:
+                continue
+    found.sort(key=lambda t: t["spans"][0]["start_ts"])
+    return found
+
+
+def worker_trace_files(data_root: str) -> List[str]:
+    """Return the trace files of supervisor workers under data_root."""
+    return glob.glob(os.path.join(data_root, "*", os.path.basename(TRACE_FILE)))
+
+
+# ----------------------------------------------------------------------
+# OpenTelemetry export
+# ----------------------------------------------------------------------
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": "" if value is None else str(value)}
+
+
+def to_otlp(traces: List[Dict], service_name: str = "whatsapp-scheduler") -> Dict:
+    """
+    Convert trace records to the OTLP/JSON shape (ExportTraceServiceRequest)
+
+    The result can be POSTed to an OpenTelemetry collector's /v1/traces endpoint.
+    """
+    spans = []
+    for record in traces:
+        for s in record["spans"]:
+            span = {
+                "traceId": record["trace_id"],
+                "spanId": s["span_id"],
+                "name": s["name"],
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(int(s["start_ts"] * 1e9)),
+                "endTimeUnixNano": str(int((s["end_ts"] or s["start_ts"]) * 1e9)),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in (s["attributes"] or {}).items()],
+                "status": {"code": 2, "message": s["error"]} if s["error"] else {"code": 1},
+            }
+            if s["parent_id"]:
+                span["parentSpanId"] = s["parent_id"]
+            else:
+                span["attributes"].append({"key": "entry.id", "value": _otlp_value(record["entry_id"])})
+            spans.append(span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}],
+        }]
+    }
@@ -11,25 +11,13 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
+from retry_policy import GROUP_NOT_FOUND, LOAD_TIMEOUT, UPLOAD_STALL, FILE_MISSING, INVALID_CONTENT
+import events
+import metrics
+import tracing
+import driver_accounting
+from logging_setup import setup_logging
 
-# Configure logging with UTF-8 encoding for emoji and RTL support
-
-# Create file handler with UTF-8 encoding
-file_handler = logging.FileHandler('whatsapp_bot.log', encoding='utf-8')
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-
-# Create stream handler with UTF-8 encoding
-stream_handler = logging.StreamHandler(sys.stdout)
-stream_handler.setLevel(logging.INFO)
-stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[file_handler, stream_handler]
-)
 logger = logging.getLogger(__name__)
 
 # Set console to UTF-8 mode on Windows
@@ -40,19 +28,48 @@ if sys.platform == 'win32':
         pass
 
 
+def _operation(name, phase=None):
+    """
+    Decorator for a bot operation: counts its WebDriver commands (driver_accounting), records a
+    trace span and, when phase is given, times it as that send phase in metrics
+    """
+    def decorate(func):
+        wrapped = driver_accounting.counted(name)(func)
+        if phase:
+            wrapped = metrics.timed(phase)(wrapped)
+        return tracing.traced(f"bot.{name}")(wrapped)
+    return decorate
+
+
 class WhatsAppBot:
     """WhatsApp Web automation bot for sending messages to groups"""
 
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, url=None):
         """
         Initialize the WhatsApp bot
 
         Args:
             headless (bool): Run browser in headless mode (not recommended for first run)
+            url (str): Page to open instead of WhatsApp Web (defaults to WHATSAPP_URL, e.g. the offline
+                stand-in from whatsapp_standin.py)
         """
         self.driver = None
         self.headless = headless
+        self.url = url or os.environ.get("WHATSAPP_URL") or "https://web.whatsapp.com"
         self.wait_time = 10  # Reduced from 30 for faster operations
+        # What stage_message/stage_image/stage_video left in the composer: (kind, element or None)
+        self._staged = None
+        # time.time() of the last Enter/send click, for measuring send-time error
+        self.last_send_clicked_at = None
+        # time.time() at which the last send was seen delivered (upload finished / verify wait over),
+        # before any trailing buffer sleep
+        self.last_confirmed_at = None
+        # Failure class of the last failed operation (see retry_policy), None if unknown
+        self.last_error = None
+        # Called right before the send key/button is pressed (used by the scheduler's send journal)
+        self.on_send_clicked = None
+        # time.monotonic() at which the current send phase (compose, send_click, upload, ack) began
+        self._phase_started = None
 
     def _convert_emoji_shortcuts(self, text):
         """
@@ -151,9 +168,9 @@ class WhatsAppBot:
             # Safely log text (handle emojis)
             try:
                 log_text = text[:50] if len(text) > 50 else text
-                logger.info(f"Attempting to type text: {log_text}...")
+                logger.debug("Attempting to type text: %s...", log_text)
             except:
-                logger.info(f"Attempting to type text with special characters...")
+                logger.debug("Attempting to type text with special characters...")
 
             # Use JavaScript to insert text properly with multiple events for WhatsApp
             # This handles emojis, RTL/LTR text, and special characters
@@ -186,9 +203,9 @@ class WhatsAppBot:
             # Safely log result
             try:
                 result_log = result[:50] if result and len(result) > 50 else result
-                logger.info(f"JavaScript typing succeeded. Content in box: {result_log if result else 'EMPTY'}...")
+                logger.debug("JavaScript typing succeeded. Content in box: %s...", result_log if result else 'EMPTY')
             except:
-                logger.info(f"JavaScript typing succeeded. Content has special characters...")
+                logger.debug("JavaScript typing succeeded. Content has special characters...")
 
             # Verify text was actually set
             if result and len(result) > 0:
@@ -196,20 +213,21 @@ class WhatsAppBot:
             else:
                 logger.warning("JavaScript set text but element is empty, trying send_keys")
                 element.send_keys(text)
-                logger.info(f"Text typed using send_keys fallback")
+                logger.info("Text typed using send_keys fallback")
                 return True
 
         except Exception as e:
-            logger.error(f"JavaScript typing failed with error: {str(e)}")
+            logger.error("JavaScript typing failed with error: %s", e)
             logger.info("Trying send_keys as fallback...")
             try:
                 element.send_keys(text)
-                logger.info(f"Text typed using send_keys fallback")
+                logger.info("Text typed using send_keys fallback")
                 return True
             except Exception as e2:
-                logger.error(f"send_keys also failed: {str(e2)}")
+                logger.error("send_keys also failed: %s", e2)
                 return False
 
+    @_operation("start", phase="browser_start")
     def start(self, profile_path: str = None):
         """
         Start the browser and open WhatsApp Web
@@ -231,7 +249,7 @@ class WhatsAppBot:
         os.makedirs(user_data_dir, exist_ok=True)
 
         options.add_argument(f"--user-data-dir={user_data_dir}")
-        logger.info(f"Using Chrome profile: {user_data_dir}")
+        logger.info("Using Chrome profile: %s", user_data_dir)
 
         # Fix for "DevTools remote debugging requires a non-default data directory"
         options.add_argument("--remote-debugging-port=9222")
@@ -319,12 +337,17 @@ class WhatsAppBot:
             service = Service(driver_path, log_output=os.devnull)
             self.driver = webdriver.Chrome(service=service, options=options)
         except Exception as e:
-            logger.warning(f"ChromeDriverManager failed: {str(e)}")
+            logger.warning("ChromeDriverManager failed: %s", e)
             logger.info("Trying to use system Chrome without explicit driver path...")
             # Fallback: let Selenium find the driver automatically
             service = Service(log_output=os.devnull)
             self.driver = webdriver.Chrome(service=service, options=options)
 
+        driver_accounting.instrument_driver(self.driver)
+        if tracing.TRACING_ENABLED:
+            tracing.instrument_driver(self.driver)
+        events.publish(events.BROWSER, state="up", profile_path=user_data_dir)
+
         self.driver.maximize_window()
 
         # Bring window to foreground using JavaScript
@@ -334,11 +357,12 @@ class WhatsAppBot:
             pass
 
         # Open WhatsApp Web
-        logger.info("Opening WhatsApp Web...")
-        self.driver.get("https://web.whatsapp.com")
+        logger.info("Opening WhatsApp Web (%s)...", self.url)
+        self.driver.get(self.url)
 
         logger.info("Please scan the QR code if this is your first time...")
 
+    @_operation("wait_for_whatsapp_load", phase="whatsapp_load")
     def wait_for_whatsapp_load(self, timeout=60):
         """
         Wait for WhatsApp to load completely
@@ -356,8 +380,10 @@ class WhatsAppBot:
             return True
         except TimeoutException:
             logger.error("Timeout waiting for WhatsApp to load")
+            self.last_error = LOAD_TIMEOUT
             return False
 
+    @_operation("search_group", phase="search")
     def search_group(self, group_name):
         """
         Search for a group by name
@@ -367,7 +393,7 @@ class WhatsAppBot:
         """
         # Strip whitespace to handle trailing/leading spaces
         group_name = group_name.strip()
-        logger.info(f"Searching for group: {group_name}")
+        logger.info("Searching for group: %s", group_name)
 
         try:
             # Find the search box
@@ -415,7 +441,7 @@ class WhatsAppBot:
 
             # Verify search box is empty
             current_text = self.driver.execute_script("return arguments[0].textContent;", search_box)
-            logger.info(f"Search box content after clearing: '{current_text}'")
+            logger.debug("Search box content after clearing: '%s'", current_text)
 
             # Copy group name to clipboard and paste (supports all Unicode)
             pyperclip.copy(group_name)
@@ -425,13 +451,13 @@ class WhatsAppBot:
             search_box.send_keys(Keys.CONTROL, 'v')
             time.sleep(0.3)
 
-            logger.info(f"Typed group name using clipboard paste: {group_name}")
+            logger.debug("Typed group name using clipboard paste: %s", group_name)
 
             # Wait for search results to appear (longer for complex text)
             time.sleep(1.5)  # Increased for RTL and emoji handling
 
             # Click on the first result - Try exact match first
-            logger.info(f"Clicking on group: {group_name}")
+            logger.debug("Clicking on group: %s", group_name)
             group_element = None
 
             try:
@@ -457,11 +483,12 @@ class WhatsAppBot:
             group_element.click()
             time.sleep(0.5)  # Reduced from 2s
 
-            logger.info(f"Successfully opened group: {group_name}")
+            logger.info("Successfully opened group: %s", group_name)
             return True
 
         except (TimeoutException, NoSuchElementException) as e:
-            logger.error(f"Failed to find group '{group_name}': {str(e)}")
+            logger.error("Failed to find group '%s': %s", group_name, e)
+            self.last_error = GROUP_NOT_FOUND
             return False
 
     def send_message(self, message, group_name=None):
@@ -471,14 +498,29 @@ class WhatsAppBot:
         Args:
             message (str): Message to send
         """
-        logger.info(f"Sending message: {message[:50]}...")
+        if not self.stage_message(message, group_name):
+            return False
+        return self.press_send()
+
+    @_operation("stage_message")
+    def stage_message(self, message, group_name=None):
+        """
+        Open the chat and paste a message into the composer without sending it
+
+        Args:
+            message (str): Message to stage
+            group_name (str): Optional group name to open first
+        """
+        self._staged = None
+        logger.info("Staging message: %s...", message[:50])
         if group_name:
             group_name = group_name.strip()
-            logger.info(f"Navigating to group for message: {group_name}")
+            logger.info("Navigating to group for message: %s", group_name)
             if not self.search_group(group_name):
-                logger.error(f"Cannot open group '{group_name}' to send message")
+                logger.error("Cannot open group '%s' to send message", group_name)
                 return False
 
+        self._phase_start()
         try:
             # Find the message input box
             message_box = WebDriverWait(self.driver, self.wait_time).until(
@@ -499,16 +541,94 @@ class WhatsAppBot:
 
             # Verify message was pasted
             pasted_text = self.driver.execute_script("return arguments[0].textContent;", message_box)
-            logger.info(f"Message pasted successfully, length: {len(pasted_text)}")
+            logger.info("Message pasted successfully, length: %s", len(pasted_text))
 
             # Scroll to bottom to show all text
             self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", message_box)
             time.sleep(0.5)
 
+            self._staged = ("message", message_box)
+            self._phase_done("compose")
+            return True
+
+        except (TimeoutException, NoSuchElementException) as e:
+            logger.error("Failed to prepare message: %s", e)
+            return False
+
+    @_operation("press_send")
+    def press_send(self):
+        """
+        Send whatever stage_message/stage_image/stage_video left in the composer
+
+        Returns:
+            bool: True if sent
+        """
+        if not self._staged:
+            logger.error("Nothing staged to send")
+            return False
+        kind, element = self._staged
+        self._staged = None
+        if kind == "image":
+            return self._press_image_send()
+        if kind == "video":
+            return self._press_video_send()
+        return self._press_message_send(element)
+
+    def _mark_send_clicked(self):
+        """Record the send press time and notify on_send_clicked, right before pressing send."""
+        self.last_send_clicked_at = time.time()
+        self.last_confirmed_at = None
+        if self.on_send_clicked:
+            self.on_send_clicked()
+        self._phase_start()
+
+    def _mark_confirmed(self):
+        """Record that the last send went through (see last_confirmed_at)."""
+        self.last_confirmed_at = time.time()
+
+    def _phase_start(self):
+        self._phase_started = time.monotonic()
+
+    def _phase_done(self, phase):
+        """Record the time since the last phase mark as one send phase (see metrics.PHASES) and start the next."""
+        now = time.monotonic()
+        if self._phase_started is not None:
+            metrics.observe_phase(phase, now - self._phase_started)
+            tracing.add_span(f"phase.{phase}", now - self._phase_started)
+            events.progress(phase, now - self._phase_started)
+        self._phase_started = now
+
+    @_operation("last_outgoing_text")
+    def last_outgoing_text(self, group_name):
+        """
+        Open a chat and return the text of the last message sent from this account
+
+        Args:
+            group_name (str): Name of the group to check
+
+        Returns:
+            str: Text of the last outgoing message, or None if it could not be read
+        """
+        if not self.search_group(group_name):
+            return None
+        try:
+            time.sleep(1)  # let the conversation render
+            outgoing = self.driver.find_elements(By.CSS_SELECTOR, 'div.message-out')
+            if not outgoing:
+                return ""
+            return outgoing[-1].text
+        except Exception as e:
+            logger.warning("Could not read last outgoing message in '%s': %s", group_name, e)
+            return None
+
+    def _press_message_send(self, message_box):
+        try:
             # Send the message - Try multiple methods
             try:
                 # Method 1: Press Enter key
+                self._mark_send_clicked()
                 message_box.send_keys(Keys.ENTER)
+                self._phase_done("send_click")
                 time.sleep(0.5)  # Reduced from 1s
             except:
                 pass
@@ -530,10 +650,12 @@ class WhatsAppBot:
             # Wait 5 seconds to verify message was sent
             logger.info("Waiting 5 seconds to verify message was sent...")
             time.sleep(5)
+            self._mark_confirmed()
+            self._phase_done("ack")
             return True
 
         except (TimeoutException, NoSuchElementException) as e:
-            logger.error(f"Failed to send message: {str(e)}")
+            logger.error("Failed to send message: %s", e)
             return False
 
     def send_image(self, image_path, caption=None, group_name=None):
@@ -544,23 +666,40 @@ class WhatsAppBot:
             image_path (str): Path to the image file
             caption (str): Optional caption for the image
         """
+        if not self.stage_image(image_path, caption, group_name):
+            return False
+        return self.press_send()
+
+    @_operation("stage_image")
+    def stage_image(self, image_path, caption=None, group_name=None):
+        """
+        Open the chat and load an image (and caption) into the preview window without sending it
+
+        Args:
+            image_path (str): Path to the image file
+            caption (str): Optional caption for the image
+            group_name (str): Optional group name to open first
+        """
         import os
 
-        logger.info(f"Sending image: {image_path}")
+        self._staged = None
+        logger.info("Staging image: %s", image_path)
         if group_name:
             group_name = group_name.strip()
-            logger.info(f"Navigating to group for image: {group_name}")
+            logger.info("Navigating to group for image: %s", group_name)
             if not self.search_group(group_name):
-                logger.error(f"Cannot open group '{group_name}' to send image")
+                logger.error("Cannot open group '%s' to send image", group_name)
                 return False
 
         if not os.path.exists(image_path):
-            logger.error(f"Image file not found: {image_path}")
+            logger.error("Image file not found: %s", image_path)
+            self.last_error = FILE_MISSING
             return False
 
+        self._phase_start()
         try:
             absolute_path = os.path.abspath(image_path)
-            logger.info(f"Absolute path: {absolute_path}")
+            logger.debug("Absolute path: %s", absolute_path)
 
             # IMPORTANT: Click the attachment button first to open the menu
             # This ensures the preview window appears
@@ -581,16 +720,17 @@ class WhatsAppBot:
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
                     attach_button.click()
-                    logger.info(f"Clicked attach button with selector: {selector}")
+                    logger.debug("Clicked attach button with selector: %s", selector)
                     attach_clicked = True
                     time.sleep(0.8)  # Reduced from 2s
                     break
                 except Exception as e:
-                    logger.debug(f"Attach selector {selector} failed: {str(e)}")
+                    logger.debug("Attach selector %s failed: %s", selector, e)
                     continue
 
             if not attach_clicked:
                 logger.error("Could not find or click attachment button")
+                self.last_error = UPLOAD_STALL
                 return False
 
             # Now find and use the file input (should open preview window)
@@ -607,11 +747,11 @@ class WhatsAppBot:
                     file_input = WebDriverWait(self.driver, 5).until(  # Reduced from 10s
                         EC.presence_of_element_located((By.XPATH, selector))
                     )
-                    logger.info(f"Found file input with selector: {selector}")
+                    logger.debug("Found file input with selector: %s", selector)
 
                     # Send the file path - this should open the preview window
                     file_input.send_keys(absolute_path)
-                    logger.info(f"Image file path sent: {absolute_path}")
+                    logger.info("Image file path sent: %s", absolute_path)
                     file_uploaded = True
 
                     # Wait for preview window to appear
@@ -619,11 +759,12 @@ class WhatsAppBot:
                     time.sleep(1)  # Reduced from 5s -> 2s -> 1s
                     break
                 except Exception as e:
-                    logger.debug(f"File input selector {selector} failed: {str(e)}")
+                    logger.debug("File input selector %s failed: %s", selector, e)
                     continue
 
             if not file_uploaded:
                 logger.error("Could not upload file")
+                self.last_error = UPLOAD_STALL
                 return False
 
             # If there's a caption, add it to the preview window
@@ -652,7 +793,7 @@ class WhatsAppBot:
                             # Make sure it's not the search box by checking data-tab attribute
                             data_tab = caption_box.get_attribute('data-tab')
                             if data_tab == '3':  # Skip search box
-                                logger.debug(f"Skipping search box (data-tab=3)")
+                                logger.debug("Skipping search box (data-tab=3)")
                                 continue
 
                             # Click and add caption
@@ -665,23 +806,34 @@ class WhatsAppBot:
                             caption_box.send_keys(Keys.CONTROL, 'v')
                             time.sleep(0.3)
 
-                            logger.info(f"[OK] Caption added successfully: {caption}")
+                            logger.info("[OK] Caption added successfully: %s", caption)
                             caption_added = True
                             time.sleep(0.3)
                             break
 
                         except Exception as e:
-                            logger.debug(f"Caption selector {selector} failed: {str(e)}")
+                            logger.debug("Caption selector %s failed: %s", selector, e)
                             continue
 
                     if not caption_added:
                         logger.warning("⚠ Could not add caption to preview window")
 
                 except Exception as e:
-                    logger.warning(f"Error adding caption: {str(e)}")
+                    logger.warning("Error adding caption: %s", e)
 
-            # Click the send button
+            # Let the preview settle so the send button is ready when pressed
             time.sleep(0.5)  # Reduced from 2s
+            self._staged = ("image", None)
+            self._phase_done("compose")
+            return True
+
+        except Exception as e:
+            logger.error("Failed to prepare image: %s", e, exc_info=True)
+            return False
+
+    def _press_image_send(self):
+        try:
+            # Click the send button
             send_selectors = [
                 '//span[@data-icon="send"]',
                 '//button[@aria-label="Send"]',
@@ -695,8 +847,10 @@ class WhatsAppBot:
                     send_button = WebDriverWait(self.driver, 2).until(  # Reduced from 5s
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
+                    self._mark_send_clicked()
                     send_button.click()
-                    logger.info(f"Image send button clicked using selector: {selector}!")
+                    self._phase_done("send_click")
+                    logger.info("Image send button clicked using selector: %s!", selector)
 
                     # Wait for image to upload completely (important for high-quality images!)
                     logger.info("Waiting for image to upload and send...")
@@ -716,7 +870,7 @@ class WhatsAppBot:
                             # Look for upload progress indicator (clock icon or progress bar)
                             uploading = self.driver.find_elements(By.XPATH, '//span[@data-icon="msg-time" or @data-icon="msg-check" or @data-icon="status-time"]')
                             if uploading:
-                                logger.info(f"Upload in progress... ({elapsed}s)")
+                                logger.debug("Upload in progress... (%ss)", elapsed)
                                 continue
                             else:
                                 # No upload indicator found, likely sent
@@ -724,20 +878,22 @@ class WhatsAppBot:
                         except:
                             pass
 
-                    logger.info(f"Image upload completed after {elapsed} seconds!")
+                    logger.info("Image upload completed after %s seconds!", elapsed)
+                    self._phase_done("upload")
+                    self._mark_confirmed()
                     # Extra buffer to ensure message is fully sent
                     time.sleep(2)
+                    self._phase_done("ack")
                     return True
                 except:
                     continue
 
             logger.error("Could not find send button for image")
+            self.last_error = UPLOAD_STALL
             return False
 
         except Exception as e:
-            logger.error(f"Failed to send image: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Failed to send image: %s", e, exc_info=True)
             return False
 
     def send_video(self, video_path, caption=None, group_name=None):
@@ -749,23 +905,40 @@ class WhatsAppBot:
             caption (str): Optional caption for the video
             group_name (str): Optional group name to send to
         """
+        if not self.stage_video(video_path, caption, group_name):
+            return False
+        return self.press_send()
+
+    @_operation("stage_video")
+    def stage_video(self, video_path, caption=None, group_name=None):
+        """
+        Open the chat and load a video (and caption) into the preview window without sending it
+
+        Args:
+            video_path (str): Path to the video file
+            caption (str): Optional caption for the video
+            group_name (str): Optional group name to open first
+        """
         import os
 
-        logger.info(f"Sending video: {video_path}")
+        self._staged = None
+        logger.info("Staging video: %s", video_path)
         if group_name:
             group_name = group_name.strip()
-            logger.info(f"Navigating to group for video: {group_name}")
+            logger.info("Navigating to group for video: %s", group_name)
             if not self.search_group(group_name):
-                logger.error(f"Cannot open group '{group_name}' to send video")
+                logger.error("Cannot open group '%s' to send video", group_name)
                 return False
 
         if not os.path.exists(video_path):
-            logger.error(f"Video file not found: {video_path}")
+            logger.error("Video file not found: %s", video_path)
+            self.last_error = FILE_MISSING
             return False
 
+        self._phase_start()
         try:
             absolute_path = os.path.abspath(video_path)
-            logger.info(f"Absolute path: {absolute_path}")
+            logger.debug("Absolute path: %s", absolute_path)
 
             # Click the attachment button first to open the menu
             logger.info("Clicking attachment button to open menu...")
@@ -785,16 +958,17 @@ class WhatsAppBot:
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
                     attach_button.click()
-                    logger.info(f"Clicked attach button with selector: {selector}")
+                    logger.debug("Clicked attach button with selector: %s", selector)
                     attach_clicked = True
                     time.sleep(0.8)
                     break
                 except Exception as e:
-                    logger.debug(f"Attach selector {selector} failed: {str(e)}")
+                    logger.debug("Attach selector %s failed: %s", selector, e)
                     continue
 
             if not attach_clicked:
                 logger.error("Could not find or click attachment button")
+                self.last_error = UPLOAD_STALL
                 return False
 
             # Find and use the file input (should open preview window)
@@ -811,11 +985,11 @@ class WhatsAppBot:
                     file_input = WebDriverWait(self.driver, 5).until(
                         EC.presence_of_element_located((By.XPATH, selector))
                     )
-                    logger.info(f"Found file input with selector: {selector}")
+                    logger.debug("Found file input with selector: %s", selector)
 
                     # Send the file path - this should open the preview window
                     file_input.send_keys(absolute_path)
-                    logger.info(f"Video file path sent: {absolute_path}")
+                    logger.info("Video file path sent: %s", absolute_path)
                     file_uploaded = True
 
                     # Wait for preview window to appear
@@ -823,11 +997,12 @@ class WhatsAppBot:
                     time.sleep(2)  # Give time for video to load in preview
                     break
                 except Exception as e:
-                    logger.debug(f"File input selector {selector} failed: {str(e)}")
+                    logger.debug("File input selector %s failed: %s", selector, e)
                     continue
 
             if not file_uploaded:
                 logger.error("Could not upload video file")
+                self.last_error = UPLOAD_STALL
                 return False
 
             # If there's a caption, add it to the preview window
@@ -852,7 +1027,7 @@ class WhatsAppBot:
                             # Make sure it's not the search box by checking data-tab attribute
                             data_tab = caption_box.get_attribute('data-tab')
                             if data_tab == '3':  # Skip search box
-                                logger.debug(f"Skipping search box (data-tab=3)")
+                                logger.debug("Skipping search box (data-tab=3)")
                                 continue
 
                             # Click and add caption
@@ -865,23 +1040,34 @@ class WhatsAppBot:
                             caption_box.send_keys(Keys.CONTROL, 'v')
                             time.sleep(0.3)
 
-                            logger.info(f"[OK] Caption added successfully: {caption}")
+                            logger.info("[OK] Caption added successfully: %s", caption)
                             caption_added = True
                             time.sleep(0.3)
                             break
 
                         except Exception as e:
-                            logger.debug(f"Caption selector {selector} failed: {str(e)}")
+                            logger.debug("Caption selector %s failed: %s", selector, e)
                             continue
 
                     if not caption_added:
                         logger.warning("⚠ Could not add caption to preview window")
 
                 except Exception as e:
-                    logger.warning(f"Error adding caption: {str(e)}")
+                    logger.warning("Error adding caption: %s", e)
 
-            # Click the send button
+            # Let the preview settle so the send button is ready when pressed
             time.sleep(0.5)
+            self._staged = ("video", None)
+            self._phase_done("compose")
+            return True
+
+        except Exception as e:
+            logger.error("Failed to prepare video: %s", e, exc_info=True)
+            return False
+
+    def _press_video_send(self):
+        try:
+            # Click the send button
             send_selectors = [
                 '//span[@data-icon="send"]',
                 '//button[@aria-label="Send"]',
@@ -895,8 +1081,10 @@ class WhatsAppBot:
                     send_button = WebDriverWait(self.driver, 2).until(
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
+                    self._mark_send_clicked()
                     send_button.click()
-                    logger.info(f"Video send button clicked using selector: {selector}!")
+                    self._phase_done("send_click")
+                    logger.info("Video send button clicked using selector: %s!", selector)
 
                     # Wait for video to upload completely - videos take much longer than images!
                     logger.info("Waiting for video to upload and send...")
@@ -926,33 +1114,36 @@ class WhatsAppBot:
                             )
 
                             if uploading_indicators or progress_bars:
-                                logger.info(f"Video upload in progress... ({elapsed}s / {max_wait}s)")
+                                logger.debug("Video upload in progress... (%ss / %ss)", elapsed, max_wait)
                                 continue
                             else:
                                 # No upload indicator found, video likely sent
                                 logger.info("No upload indicators found - video appears to be sent")
                                 break
                         except Exception as e:
-                            logger.debug(f"Error checking upload status: {e}")
+                            logger.debug("Error checking upload status: %s", e)
                             pass
 
-                    logger.info(f"Video upload completed after {elapsed} seconds!")
+                    logger.info("Video upload completed after %s seconds!", elapsed)
+                    self._phase_done("upload")
+                    self._mark_confirmed()
                     # Extra buffer to ensure video is fully sent and processed
                     logger.info("Waiting additional 10 seconds to ensure video is fully sent...")
                     time.sleep(10)
+                    self._phase_done("ack")
                     return True
                 except:
                     continue
 
             logger.error("Could not find send button for video")
+            self.last_error = UPLOAD_STALL
             return False
 
         except Exception as e:
-            logger.error(f"Failed to send video: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Failed to send video: %s", e, exc_info=True)
             return False
 
+    @_operation("send_poll")
     def send_poll(self, question, options, allow_multiple_answers=False, group_name=None):
         """
         Create and send a poll to the currently open chat
@@ -962,24 +1153,27 @@ class WhatsAppBot:
             options (list): List of option strings (max 12 options)
             allow_multiple_answers (bool): Allow users to select multiple answers
         """
-        logger.info(f"Creating poll with question: {question}")
-        logger.info(f"Options: {options}")
-        logger.info(f"Allow multiple answers: {allow_multiple_answers}")
+        logger.info("Creating poll with question: %s", question)
+        logger.info("Options: %s", options)
+        logger.info("Allow multiple answers: %s", allow_multiple_answers)
         if group_name:
             group_name = group_name.strip()
-            logger.info(f"Navigating to group for poll: {group_name}")
+            logger.info("Navigating to group for poll: %s", group_name)
             if not self.search_group(group_name):
-                logger.error(f"Cannot open group '{group_name}' to send poll")
+                logger.error("Cannot open group '%s' to send poll", group_name)
                 return False
 
         if len(options) < 2:
             logger.error("Poll must have at least 2 options")
+            self.last_error = INVALID_CONTENT
             return False
 
         if len(options) > 12:
             logger.error("Poll can have maximum 12 options")
+            self.last_error = INVALID_CONTENT
             return False
 
+        self._phase_start()
         try:
             # Click the attachment button to open menu
             logger.info("Clicking attachment button...")
@@ -998,16 +1192,17 @@ class WhatsAppBot:
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
                     attach_button.click()
-                    logger.info(f"Clicked attach button with selector: {selector}")
+                    logger.debug("Clicked attach button with selector: %s", selector)
                     attach_clicked = True
                     time.sleep(0.8)  # Reduced from 2s
                     break
                 except Exception as e:
-                    logger.debug(f"Attach selector {selector} failed: {str(e)}")
+                    logger.debug("Attach selector %s failed: %s", selector, e)
                     continue
 
             if not attach_clicked:
                 logger.error("Could not find or click attachment button")
+                self.last_error = UPLOAD_STALL
                 return False
 
             # Click the poll option
@@ -1027,16 +1222,17 @@ class WhatsAppBot:
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
                     poll_button.click()
-                    logger.info(f"Clicked poll button with selector: {selector}")
+                    logger.debug("Clicked poll button with selector: %s", selector)
                     poll_clicked = True
                     time.sleep(0.8)  # Reduced from 2s
                     break
                 except Exception as e:
-                    logger.debug(f"Poll selector {selector} failed: {str(e)}")
+                    logger.debug("Poll selector %s failed: %s", selector, e)
                     continue
 
             if not poll_clicked:
                 logger.error("Could not find or click poll option")
+                self.last_error = UPLOAD_STALL
                 return False
 
             # Enter the question
@@ -1063,16 +1259,17 @@ class WhatsAppBot:
                     question_box.send_keys(Keys.CONTROL, 'v')
                     time.sleep(0.3)
 
-                    logger.info(f"Question entered: {question}")
+                    logger.info("Question entered: %s", question)
                     question_entered = True
                     time.sleep(0.3)  # Reduced from 1s
                     break
                 except Exception as e:
-                    logger.debug(f"Question selector {selector} failed: {str(e)}")
+                    logger.debug("Question selector %s failed: %s", selector, e)
                     continue
 
             if not question_entered:
                 logger.error("Could not enter poll question")
+                self.last_error = UPLOAD_STALL
                 return False
 
             # Wait for poll form to fully load
@@ -1085,23 +1282,23 @@ class WhatsAppBot:
             try:
                 # Look for all text inputs in the poll creation dialog
                 all_text_inputs = self.driver.find_elements(By.XPATH, '//div[contains(@class, "copyable-text")]//div[@contenteditable="true"]')
-                logger.info(f"Found {len(all_text_inputs)} contenteditable fields total")
+                logger.debug("Found %s contenteditable fields total", len(all_text_inputs))
 
                 # Alternative: look for input elements
                 all_inputs = self.driver.find_elements(By.XPATH, '//input[@type="text"]')
-                logger.info(f"Found {len(all_inputs)} text input fields")
+                logger.debug("Found %s text input fields", len(all_inputs))
             except Exception as e:
-                logger.debug(f"Error counting input fields: {str(e)}")
+                logger.debug("Error counting input fields: %s", e)
 
             for i, option in enumerate(options):
-                logger.info(f"Entering option {i+1}: {option}")
+                logger.info("Entering option %s: %s", i+1, option)
                 option_entered = False
 
                 # Method 1: Try data-tab="2" for option fields (tab index after question)
                 if not option_entered:
                     try:
                         option_boxes = self.driver.find_elements(By.XPATH, '//div[@contenteditable="true"][@data-tab="2"]')
-                        logger.info(f"Method 1: Found {len(option_boxes)} option fields with data-tab=2")
+                        logger.debug("Method 1: Found %s option fields with data-tab=2", len(option_boxes))
                         if i < len(option_boxes):
                             option_boxes[i].click()
                             time.sleep(0.3)
@@ -1112,17 +1309,17 @@ class WhatsAppBot:
                             option_boxes[i].send_keys(Keys.CONTROL, 'v')
                             time.sleep(0.2)
 
-                            logger.info(f"[OK] Option {i+1} entered successfully (method 1)")
+                            logger.debug("[OK] Option %s entered successfully (method 1)", i+1)
                             option_entered = True
                             time.sleep(0.3)
                     except Exception as e:
-                        logger.debug(f"Method 1 failed for option {i+1}: {str(e)}")
+                        logger.debug("Method 1 failed for option %s: %s", i+1, e)
 
                 # Method 2: Find all contenteditable textboxes and skip the first (question)
                 if not option_entered:
                     try:
                         all_textboxes = self.driver.find_elements(By.XPATH, '//div[@contenteditable="true"][@role="textbox"]')
-                        logger.info(f"Method 2: Found {len(all_textboxes)} total textboxes")
+                        logger.debug("Method 2: Found %s total textboxes", len(all_textboxes))
                         # First one is question, rest are options
                         if i + 1 < len(all_textboxes):
                             all_textboxes[i + 1].click()
@@ -1134,17 +1331,17 @@ class WhatsAppBot:
                             all_textboxes[i + 1].send_keys(Keys.CONTROL, 'v')
                             time.sleep(0.2)
 
-                            logger.info(f"[OK] Option {i+1} entered successfully (method 2)")
+                            logger.debug("[OK] Option %s entered successfully (method 2)", i+1)
                             option_entered = True
                             time.sleep(0.3)
                     except Exception as e:
-                        logger.debug(f"Method 2 failed for option {i+1}: {str(e)}")
+                        logger.debug("Method 2 failed for option %s: %s", i+1, e)
 
                 # Method 3: Look for copyable-text divs with contenteditable
                 if not option_entered:
                     try:
                         copyable_fields = self.driver.find_elements(By.XPATH, '//div[contains(@class, "copyable-text")]//div[@contenteditable="true"]')
-                        logger.info(f"Method 3: Found {len(copyable_fields)} copyable-text fields")
+                        logger.debug("Method 3: Found %s copyable-text fields", len(copyable_fields))
                         # First is question, rest are options
                         if i + 1 < len(copyable_fields):
                             copyable_fields[i + 1].click()
@@ -1156,18 +1353,18 @@ class WhatsAppBot:
                             copyable_fields[i + 1].send_keys(Keys.CONTROL, 'v')
                             time.sleep(0.2)
 
-                            logger.info(f"[OK] Option {i+1} entered successfully (method 3)")
+                            logger.debug("[OK] Option %s entered successfully (method 3)", i+1)
                             option_entered = True
                             time.sleep(0.3)
                     except Exception as e:
-                        logger.debug(f"Method 3 failed for option {i+1}: {str(e)}")
+                        logger.debug("Method 3 failed for option %s: %s", i+1, e)
 
                 if not option_entered:
-                    logger.warning(f"⚠ Could not enter option {i+1}: {option}")
+                    logger.warning("⚠ Could not enter option %s: %s", i+1, option)
 
             # Ensure the multiple-answers toggle matches desired state
             try:
-                logger.info(f"Setting multiple answers to: {allow_multiple_answers}")
+                logger.info("Setting multiple answers to: %s", allow_multiple_answers)
                 toggle_candidates = [
                     # Native checkbox near the label
                     '//label[contains(., "Allow multiple answers")]//input[@type="checkbox"]',
@@ -1243,17 +1440,18 @@ class WhatsAppBot:
                         toggle_set = True
                         break
                     except Exception as e:
-                        logger.debug(f"Multiple answers toggle selector {selector} failed: {str(e)}")
+                        logger.debug("Multiple answers toggle selector %s failed: %s", selector, e)
                         continue
 
                 if not toggle_set:
                     logger.warning("Could not locate multiple answers toggle; proceeding with default")
             except Exception as e:
-                logger.warning(f"Error while setting multiple answers: {str(e)}")
+                logger.warning("Error while setting multiple answers: %s", e)
 
             # Click send button
             logger.info("Sending poll...")
             time.sleep(0.5)  # Reduced from 2s
+            self._phase_done("compose")
             send_selectors = [
                 '//span[@data-icon="send"]',
                 '//button[@aria-label="Send"]',
@@ -1266,25 +1464,29 @@ class WhatsAppBot:
                     send_button = WebDriverWait(self.driver, 2).until(  # Reduced from 5s
                         EC.element_to_be_clickable((By.XPATH, selector))
                     )
+                    self._mark_send_clicked()
                     send_button.click()
-                    logger.info(f"Poll sent successfully using selector: {selector}!")
+                    self._phase_done("send_click")
+                    logger.info("Poll sent successfully using selector: %s!", selector)
                     # Wait 4 seconds to verify poll was sent
                     logger.info("Waiting 4 seconds to verify poll was sent...")
                     time.sleep(4)
+                    self._mark_confirmed()
+                    self._phase_done("ack")
                     return True
                 except Exception as e:
-                    logger.debug(f"Send selector {selector} failed: {str(e)}")
+                    logger.debug("Send selector %s failed: %s", selector, e)
                     continue
 
             logger.error("Could not find send button for poll")
+            self.last_error = UPLOAD_STALL
             return False
 
         except Exception as e:
-            logger.error(f"Failed to send poll: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Failed to send poll: %s", e, exc_info=True)
             return False
 
+    @_operation("send_message_to_group")
     def send_message_to_group(self, group_name, message):
         """
         Send a message to a specific group
@@ -1302,14 +1504,15 @@ class WhatsAppBot:
             pass
 
         group_name = group_name.strip()
-        logger.info(f"Sending message to group '{group_name}'")
+        logger.info("Sending message to group '%s'", group_name)
 
         if self.search_group(group_name):
             return self.send_message(message)
         else:
-            logger.error(f"Failed to send message to group '{group_name}'")
+            logger.error("Failed to send message to group '%s'", group_name)
             return False
 
+    @_operation("send_image_to_group")
     def send_image_to_group(self, group_name, image_path, caption=None):
         """
         Send an image to a specific group
@@ -1328,14 +1531,15 @@ class WhatsAppBot:
             pass
 
         group_name = group_name.strip()
-        logger.info(f"Sending image to group '{group_name}'")
+        logger.info("Sending image to group '%s'", group_name)
 
         if self.search_group(group_name):
             return self.send_image(image_path, caption)
         else:
-            logger.error(f"Failed to send image to group '{group_name}'")
+            logger.error("Failed to send image to group '%s'", group_name)
             return False
 
+    @_operation("send_video_to_group")
     def send_video_to_group(self, group_name, video_path, caption=None):
         """
         Send a video to a specific group
@@ -1354,14 +1558,15 @@ class WhatsAppBot:
             pass
 
         group_name = group_name.strip()
-        logger.info(f"Sending video to group '{group_name}'")
+        logger.info("Sending video to group '%s'", group_name)
 
         if self.search_group(group_name):
             return self.send_video(video_path, caption)
         else:
-            logger.error(f"Failed to send video to group '{group_name}'")
+            logger.error("Failed to send video to group '%s'", group_name)
             return False
 
+    @_operation("send_poll_to_group")
     def send_poll_to_group(self, group_name, question, options, allow_multiple_answers=False):
         """
         Send a poll to a specific group
@@ -1373,23 +1578,32 @@ class WhatsAppBot:
             allow_multiple_answers (bool): Allow users to select multiple answers
         """
         group_name = group_name.strip()
-        logger.info(f"Sending poll to group '{group_name}'")
+        logger.info("Sending poll to group '%s'", group_name)
 
         if self.search_group(group_name):
             return self.send_poll(question, options, allow_multiple_answers)
         else:
-            logger.error(f"Failed to send poll to group '{group_name}'")
+            logger.error("Failed to send poll to group '%s'", group_name)
             return False
 
+    @_operation("close")
     def close(self):
         """Close the browser"""
         if self.driver:
             logger.info("Closing browser...")
-            self.driver.quit()
+            try:
+                self.driver.quit()
+            finally:
+                # Lets the scheduler tell a closed browser from a running one without touching the driver
+                self.driver = None
+                events.publish(events.BROWSER, state="down")
             logger.info("Browser closed successfully")
 
 
 if __name__ == "__main__":
+    # Log with UTF-8 encoding for emoji and RTL support (LOG_QUEUE=1: queued, rotated, see logging_setup)
+    setup_logging('whatsapp_bot.log')
+
     # Simple test
     bot = WhatsAppBot()
 
@@ -1406,6 +1620,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Error occurred: {str(e)}")
+        logger.error("Error occurred: %s", e)
     finally:
         bot.close()
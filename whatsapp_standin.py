@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Serve an offline stand-in for WhatsApp Web, for end-to-end bot tests and benchmarks.
+
+standin/index.html reproduces the parts of the WhatsApp Web DOM that
+WhatsAppBot uses (search box, chat results, composer, attach menu, media
+preview, poll dialog and delivery ticks) with configurable latencies. Point
+the bot at it with WHATSAPP_URL or WhatsAppBot(url=...); every message the
+page sends is recorded and listed at GET /sent.
+
+    python whatsapp_standin.py --port 8765 --load-ms 200
+    WHATSAPP_URL=http://127.0.0.1:8765/ python main.py
+    python whatsapp_standin.py --check-budgets    # WebDriver command budgets (needs Chrome)
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PAGE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "standin", "index.html")
+
+# Placeholder in index.html replaced with the page configuration
+CONFIG_PLACEHOLDER = "window.STANDIN = {};"
+
+DEFAULT_GROUPS = ["Cairo", "Family", "Team Updates"]
+
+# 1x1 PNG used by the budget check's image send
+_PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+
+# Executables that count as an installed Chrome for the budget check, its test and the stand-in benchmark
+CHROME_EXECUTABLES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+
+def chrome_available() -> bool:
+    """Return True if a Chrome or Chromium executable is on the PATH."""
+    return any(shutil.which(name) for name in CHROME_EXECUTABLES)
+
+
+class StandinServer:
+    """
+    HTTP server for the stand-in page.
+
+    Latencies are in milliseconds: load_ms until the chat list shows,
+    search_ms until search results show, open_chat_ms until a chat opens,
+    upload_base_ms plus size / upload_kb_per_s for a media upload, and
+    ack_ms from the single to the double tick.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, groups: Optional[List[str]] = None,
+                 load_ms: int = 1500, search_ms: int = 300, open_chat_ms: int = 200,
+                 upload_base_ms: int = 500, upload_kb_per_s: int = 2000, ack_ms: int = 800):
+        """
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 picks a free one, see url)
+            groups (List[str]): Group chats the page knows (defaults to group_names.json, else a few samples)
+        """
+        self.config = {
+            "groups": groups or self._default_groups(),
+            "load_ms": load_ms,
+            "search_ms": search_ms,
+            "open_chat_ms": open_chat_ms,
+            "upload_base_ms": upload_base_ms,
+            "upload_kb_per_s": upload_kb_per_s,
+            "ack_ms": ack_ms,
+        }
+        self._sent: List[Dict] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @staticmethod
+    def _default_groups() -> List[str]:
+        try:
+            with open("group_names.json", 'r', encoding='utf-8') as f:
+                groups = json.load(f).get("groups", [])
+            if groups:
+                return groups
+        except (OSError, ValueError, AttributeError):
+            pass
+        return list(DEFAULT_GROUPS)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "StandinServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("WhatsApp stand-in serving at %s", self.url)
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def sent(self) -> List[Dict]:
+        """Return the messages sent through the page so far, oldest first."""
+        with self._lock:
+            return list(self._sent)
+
+    def reset(self):
+        """Forget the recorded messages."""
+        with self._lock:
+            self._sent.clear()
+
+    def _page(self) -> bytes:
+        with open(PAGE_FILE, 'r', encoding='utf-8') as f:
+            page = f.read()
+        config = json.dumps(self.config, ensure_ascii=False).replace("</", "<\\/")
+        return page.replace(CONFIG_PLACEHOLDER, f"window.STANDIN = {config};", 1).encode('utf-8')
+
+    def _record(self, message: Dict):
+        message["received_at"] = time.time()
+        with self._lock:
+            self._sent.append(message)
+        logger.info("Stand-in received %s for '%s'", message.get('kind'), message.get('group'))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _reply_json(self, status: int, data):
+                self._reply(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), "application/json")
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path in ("/", "/index.html"):
+                    self._reply(200, server._page(), "text/html; charset=utf-8")
+                elif path == "/sent":
+                    self._reply_json(200, server.sent())
+                else:
+                    self._reply_json(404, {"detail": "Not found"})
+
+            def do_POST(self):
+                if self.path != "/sent":
+                    self._reply_json(404, {"detail": "Not found"})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    message = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._reply_json(400, {"detail": "Invalid JSON"})
+                    return
+                server._record(message)
+                self._reply_json(200, {"success": True})
+
+            def do_DELETE(self):
+                if self.path != "/sent":
+                    self._reply_json(404, {"detail": "Not found"})
+                    return
+                server.reset()
+                self._reply_json(200, {"success": True})
+
+            def log_message(self, format, *args):
+                logger.debug("%s %s", self.address_string(), format % args)
+
+        return Handler
+
+
+def check_budgets(headless: bool = True) -> bool:
+    """
+    Send a message, an image, a video, a poll and a staged message with the real bot (Chrome)
+    through the stand-in page and check every operation against driver_accounting.DRIVER_BUDGETS
+
+    Returns:
+        bool: True if all sends went through within budget
+    """
+    import driver_accounting
+    from whatsapp_bot import WhatsAppBot
+
+    group = "Budget Check"
+    server = StandinServer(groups=[group], load_ms=0, search_ms=50, open_chat_ms=0,
+                           upload_base_ms=50, ack_ms=50).start()
+    work_dir = tempfile.mkdtemp(prefix="standin-")
+    image_path = os.path.join(work_dir, "pixel.png")
+    with open(image_path, 'wb') as f:
+        f.write(_PIXEL_PNG)
+    video_path = os.path.join(work_dir, "clip.mp4")
+    with open(video_path, 'wb') as f:
+        f.write(b"\0" * 2048)
+    bot = WhatsAppBot(headless=headless, url=server.url)
+    calls = []
+    try:
+        bot.start(profile_path=os.path.join(work_dir, "chrome_data"))
+        try:
+            with driver_accounting.enforce_budgets() as calls:
+                if not bot.wait_for_whatsapp_load(timeout=30):
+                    logger.error("Stand-in page did not load")
+                    return False
+                sent = [bot.send_message_to_group(group, "Budget check message"),
+                        bot.send_image_to_group(group, image_path, "Budget check caption"),
+                        bot.send_video_to_group(group, video_path, "Budget check video"),
+                        bot.send_poll_to_group(group, "Budget check?", ["Yes", "No"]),
+                        bot.stage_message("Budget check staged", group_name=group) and bot.press_send()]
+        except driver_accounting.BudgetExceeded as e:
+            logger.error(str(e))
+            return False
+        if not all(sent) or len(server.sent()) != len(sent):
+            logger.error("Sends failed on the stand-in page: results %s, page recorded %s", sent, len(server.sent()))
+            return False
+        return True
+    finally:
+        worst: Dict[str, int] = {}
+        for name, count in calls:
+            worst[name] = max(worst.get(name, 0), count)
+        for name, count in sorted(worst.items()):
+            budget = driver_accounting.DRIVER_BUDGETS.get(name)
+            print(f"{name:<26} {count:5d} commands" + (f"  (budget {budget})" if budget else ""), file=sys.stderr)
+        bot.close()
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an offline WhatsApp Web stand-in page")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument("--group", action="append", dest="groups", metavar="NAME",
+                        help="Group chat name (repeatable; default: group_names.json)")
+    parser.add_argument("--load-ms", type=int, default=1500, help="Chat list load time (default: 1500)")
+    parser.add_argument("--search-ms", type=int, default=300, help="Search results delay (default: 300)")
+    parser.add_argument("--open-chat-ms", type=int, default=200, help="Chat open delay (default: 200)")
+    parser.add_argument("--upload-base-ms", type=int, default=500, help="Fixed media upload time (default: 500)")
+    parser.add_argument("--upload-kb-per-s", type=int, default=2000, help="Upload throughput (default: 2000)")
+    parser.add_argument("--ack-ms", type=int, default=800, help="Delay before the double tick (default: 800)")
+    parser.add_argument("--check-budgets", action="store_true",
+                        help="Run the bot in headless Chrome against the page and check its WebDriver command budgets")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.check_budgets:
+        sys.exit(0 if check_budgets() else 1)
+    server = StandinServer(args.host, args.port, groups=args.groups, load_ms=args.load_ms,
+                           search_ms=args.search_ms, open_chat_ms=args.open_chat_ms,
+                           upload_base_ms=args.upload_base_ms, upload_kb_per_s=args.upload_kb_per_s,
+                           ack_ms=args.ack_ms)
+    logger.info("Serving WhatsApp stand-in at %s (Ctrl+C to stop)", server.url)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()